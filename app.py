@@ -1,33 +1,36 @@
+import os
 from flask import Flask
-from config import Config
 from models import db, User
+from caching import cache
+import instrumentation
+import passwords
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flask_caching import Cache
-from werkzeug.security import generate_password_hash
 from dotenv import load_dotenv
 
 load_dotenv()
 
 app = Flask(__name__)
-app.config.from_object(Config)
+app.config.from_object(os.environ.get('APP_CONFIG') or 'config.Config')
 
 db.init_app(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, render_as_batch=True)
 jwt = JWTManager(app)
 CORS(app)
-cache = Cache(app)
+cache.init_app(app)
+passwords.init_app(app)
 
 from routes import bp as main_bp
 app.register_blueprint(main_bp)
+instrumentation.init_app(app)
 
 def create_admin():
     with app.app_context():
         db.create_all()
         if not User.query.filter_by(role='admin').first():
             print("Creating Admin User...")
-            hashed_password = generate_password_hash('admin123')
+            hashed_password = passwords.hash_password('admin123')
             admin = User(username='admin', email='admin@hospital.com', role='admin', password=hashed_password)
             db.session.add(admin)
             db.session.commit()
@@ -0,0 +1,99 @@
+"""
+Doctor availability stored as AvailabilitySlot rows.
+
+The API still speaks the original JSON shape ({"2024-01-15": ["09:00", ...]}),
+but saving it is applied as a diff against the existing slots, and free-slot
+lookups across doctors are a single indexed query instead of parsing every
+doctor's JSON blob.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy.orm import contains_eager
+from models import db, Doctor, Appointment, AvailabilitySlot
+
+SLOT_LENGTH = timedelta(hours=1)
+
+
+def parse_availability(data):
+    """
+    Turn {"YYYY-MM-DD": ["HH:MM", ...]} into a set of slot start datetimes.
+    Starts are truncated to the minute, as booking.parse_slot does with
+    bookings, so a slot given with seconds can still be claimed.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Availability must be an object of date -> list of times")
+    starts = set()
+    for day, times in data.items():
+        if not isinstance(times, list):
+            raise ValueError(f"Times for {day} must be a list")
+        for t in times:
+            starts.add(datetime.fromisoformat(f"{day}T{t}").replace(second=0, microsecond=0))
+    return starts
+
+
+def availability_json(doctor_id):
+    """A doctor's declared slots in the legacy {"date": ["HH:MM", ...]} shape"""
+    result = {}
+    rows = db.session.query(AvailabilitySlot.start).filter(
+        AvailabilitySlot.doctor_id == doctor_id
+    ).order_by(AvailabilitySlot.start)
+    for (start,) in rows:
+        result.setdefault(start.date().isoformat(), []).append(start.strftime('%H:%M'))
+    return result
+
+
+def apply_availability(doctor_id, data):
+    """
+    Replace a doctor's declared availability with data, touching only the
+    slots that changed. Slots that still hold a booking are kept.
+    Returns (added, removed) counts; the caller commits.
+    """
+    wanted = parse_availability(data)
+    existing = {
+        slot.start: slot
+        for slot in AvailabilitySlot.query.filter_by(doctor_id=doctor_id)
+    }
+
+    removed = 0
+    for start, slot in existing.items():
+        if start not in wanted and slot.booked_count == 0:
+            db.session.delete(slot)
+            removed += 1
+
+    added = [start for start in wanted if start not in existing]
+    if added:
+        db.session.execute(db.insert(AvailabilitySlot), [
+            {'doctor_id': doctor_id, 'start': start, 'end': start + SLOT_LENGTH,
+             'capacity': 1, 'booked_count': 0}
+            for start in added
+        ])
+    return len(added), removed
+
+
+def free_slots(specialization=None, start=None, end=None, limit=50):
+    """
+    Earliest free slots across approved doctors, optionally restricted to a
+    specialization and a [start, end) window. One query, driven by the
+    (start, doctor_id) index.
+    """
+    # booked_count is kept current by booking.py; the anti-join also catches
+    # Booked rows written outside it (e.g. bulk-imported appointments) and is
+    # a single probe of the booked-slot unique index per candidate.
+    booked = db.exists().where(
+        Appointment.doctor_id == AvailabilitySlot.doctor_id,
+        Appointment.date_time == AvailabilitySlot.start,
+        Appointment.status == 'Booked'
+    )
+    query = AvailabilitySlot.query.join(AvailabilitySlot.doctor).join(Doctor.user).options(
+        contains_eager(AvailabilitySlot.doctor).contains_eager(Doctor.user)
+    ).filter(
+        Doctor.is_approved == True,
+        AvailabilitySlot.booked_count < AvailabilitySlot.capacity,
+        AvailabilitySlot.start >= (start or datetime.now()),
+        ~booked
+    )
+    if end:
+        query = query.filter(AvailabilitySlot.start < end)
+    if specialization:
+        query = query.filter(Doctor.specialization == specialization)
+    return query.order_by(AvailabilitySlot.start, AvailabilitySlot.doctor_id).limit(limit).all()
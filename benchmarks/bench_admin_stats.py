@@ -0,0 +1,107 @@
+"""
+Benchmark for /api/admin/stats
+
+Seeds a throwaway SQLite database and compares the old five separate COUNT(*)
+queries with the single aggregate query, and with a cached endpoint hit.
+
+Usage:
+    python benchmarks/bench_admin_stats.py --appointments 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+import random
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'hms_bench_admin_stats.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, User, Doctor, Patient, Appointment
+from queries import dashboard_stats
+from flask_jwt_extended import create_access_token
+
+
+def seed(n_appointments, n_doctors=100, n_patients=1000, chunk=50000):
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'role': 'doctor' if i < n_doctors else 'patient'}
+        for i in range(n_doctors + n_patients)
+    ])
+    db.session.execute(db.insert(Doctor), [
+        {'user_id': i + 1, 'specialization': 'General'} for i in range(n_doctors)
+    ])
+    db.session.execute(db.insert(Patient), [
+        {'user_id': n_doctors + i + 1} for i in range(n_patients)
+    ])
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=365)
+    statuses = ['Booked', 'Completed', 'Completed', 'Cancelled']
+    for offset in range(0, n_appointments, chunk):
+        db.session.execute(db.insert(Appointment), [
+            {'doctor_id': rng.randint(1, n_doctors),
+             'patient_id': rng.randint(1, n_patients),
+             'date_time': start + timedelta(minutes=rng.randint(0, 60 * 24 * 400)),
+             'status': rng.choice(statuses)}
+            for _ in range(min(chunk, n_appointments - offset))
+        ])
+    db.session.commit()
+
+
+def five_counts():
+    """The pre-aggregate implementation, kept here for comparison"""
+    return {
+        'total_doctors': Doctor.query.count(),
+        'total_patients': Patient.query.count(),
+        'total_appointments': Appointment.query.count(),
+        'today_appointments': Appointment.query.filter(
+            db.func.date(Appointment.date_time) == date.today()
+        ).count(),
+        'completed_appointments': Appointment.query.filter_by(status='Completed').count()
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f"Seeding {args.appointments} appointments into {DB_PATH}...")
+        seed(args.appointments)
+        assert five_counts() == dashboard_stats(date.today())
+
+        old_ms = timed(five_counts, args.repeat)
+        new_ms = timed(lambda: dashboard_stats(date.today()), args.repeat)
+        token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + token}
+    client.get('/api/admin/stats', headers=headers)  # warm the cache
+    cached_ms = timed(lambda: client.get('/api/admin/stats', headers=headers), args.repeat)
+
+    print(f"five COUNT(*) queries : {old_ms:9.1f} ms")
+    print(f"single aggregate      : {new_ms:9.1f} ms")
+    print(f"cached endpoint hit   : {cached_ms:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
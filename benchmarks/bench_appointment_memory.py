@@ -0,0 +1,108 @@
+"""
+Per-request memory of the appointment list routes
+
+Seeds one doctor and one patient with appointments carrying long clinical
+notes, then measures the peak Python allocation (tracemalloc) of each
+appointment listing, so the cost of loading diagnosis / prescription /
+notes on routes that never return them shows up directly.
+
+Usage:
+    python benchmarks/bench_appointment_memory.py --appointments 2000 --note-kb 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'hms_bench_appointment_memory.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from app import app
+from caching import cache
+from models import db, User, Doctor, Patient, Appointment
+
+WORDS = ['patient', 'reports', 'mild', 'pain', 'since', 'last', 'visit', 'advised', 'rest', 'fluids',
+         'follow', 'up', 'in', 'two', 'weeks', 'blood', 'pressure', 'stable', 'no', 'allergies']
+
+
+def seed(n_appointments, note_kb, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [
+        {'username': 'doctor', 'email': 'doctor@example.com', 'password': 'x', 'role': 'doctor'},
+        {'username': 'patient', 'email': 'patient@example.com', 'password': 'x', 'role': 'patient'},
+    ])
+    db.session.execute(db.insert(Doctor), [{'user_id': 1, 'specialization': 'Cardiology'}])
+    db.session.execute(db.insert(Patient), [{'user_id': 2}])
+
+    def text(kb):
+        words = []
+        while sum(len(w) + 1 for w in words) < kb * 1024:
+            words.append(rng.choice(WORDS))
+        return ' '.join(words)
+
+    # Spread over the next few days so the upcoming-week list covers them all
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+    db.session.execute(db.insert(Appointment), [
+        {'patient_id': 1, 'doctor_id': 1, 'date_time': start + timedelta(minutes=i), 'status': 'Booked',
+         'diagnosis': text(note_kb / 8), 'prescription': text(note_kb / 8), 'notes': text(note_kb),
+         'updated_at': start}
+        for i in range(n_appointments)
+    ])
+    db.session.commit()
+
+
+def measure(client, url, headers, repeat):
+    peaks, times = [], []
+    for _ in range(repeat):
+        with app.app_context():
+            cache.clear()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        res = client.get(url, headers=headers)
+        times.append((time.perf_counter() - t0) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert res.status_code == 200, res.get_json()
+    return min(peaks) / 1024, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=2000)
+    parser.add_argument('--note-kb', type=float, default=4.0, help='Size of each appointment\'s notes')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(args.appointments, args.note_kb)
+        admin = {'Authorization': 'Bearer ' + create_access_token(identity='0', additional_claims={'role': 'admin'})}
+        doctor = {'Authorization': 'Bearer ' + create_access_token(
+            identity='1', additional_claims={'role': 'doctor', 'profile_id': 1})}
+        patient = {'Authorization': 'Bearer ' + create_access_token(
+            identity='2', additional_claims={'role': 'patient', 'profile_id': 1})}
+    print(f"{args.appointments} appointments, {args.note_kb:g} KB notes each")
+
+    cases = {
+        'admin appointments (200)': ('/api/admin/appointments?limit=200', admin),
+        'patient appointments': ('/api/patient/appointments', patient),
+        'doctor upcoming': ('/api/doctor/appointments/upcoming', doctor),
+        'doctor appointments (200)': ('/api/doctor/appointments?limit=200', doctor),
+    }
+    client = app.test_client()
+    for name, (url, headers) in cases.items():
+        peak_kb, ms = measure(client, url, headers, args.repeat)
+        print(f"{name:26s} peak {peak_kb:9.0f} KB   {ms:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark for the monthly report engine
+
+Seeds last month with appointments for many doctors, then times the
+single-scan engine (reports.generate_monthly_reports) against the old
+per-doctor pattern: one query per doctor, a lazy patient/user load per row,
+and HTML built by string concatenation. The old pattern runs on a sample of
+doctors and is extrapolated.
+
+Usage:
+    python benchmarks/bench_monthly_reports.py --doctors 1000 --per-doctor 300
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'hms_bench_reports.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, User, Doctor, Patient, Appointment
+from reports import generate_monthly_reports, last_month
+
+STATUSES = ['Completed', 'Completed', 'Completed', 'Cancelled', 'Booked']
+
+
+def seed(n_doctors, per_doctor, n_patients, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'role': 'doctor' if i < n_doctors else 'patient'}
+        for i in range(n_doctors + n_patients)
+    ])
+    db.session.execute(db.insert(Doctor), [
+        {'user_id': i + 1, 'specialization': 'General'} for i in range(n_doctors)
+    ])
+    db.session.execute(db.insert(Patient), [
+        {'user_id': n_doctors + i + 1} for i in range(n_patients)
+    ])
+
+    start, end = last_month()
+    minutes = int((end - start).total_seconds() // 60)
+    batch = []
+    for doctor_id in range(1, n_doctors + 1):
+        for _ in range(per_doctor):
+            status = rng.choice(STATUSES)
+            batch.append({
+                'doctor_id': doctor_id,
+                'patient_id': rng.randint(1, n_patients),
+                'date_time': start + timedelta(minutes=rng.randrange(minutes)),
+                # Cancel everything but Completed so the booked-slot unique index never trips
+                'status': 'Cancelled' if status == 'Booked' else status,
+                'diagnosis': 'Routine check' if status == 'Completed' else None
+            })
+        if len(batch) >= 50000:
+            db.session.execute(db.insert(Appointment), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Appointment), batch)
+    db.session.commit()
+
+
+def legacy_report(doctor, start, end, out_dir):
+    """The pre-engine per-doctor task body, minus the Celery wrapper"""
+    appointments = Appointment.query.filter(
+        Appointment.doctor_id == doctor.id,
+        Appointment.date_time >= start,
+        Appointment.date_time < end
+    ).all()
+    completed = len([a for a in appointments if a.status == 'Completed'])
+    cancelled = len([a for a in appointments if a.status == 'Cancelled'])
+    html_content = f"<h1>Dr. {doctor.user.username}</h1><p>{len(appointments)} {completed} {cancelled}</p><table>"
+    for appt in appointments:
+        html_content += f"""
+            <tr>
+                <td>{appt.date_time.strftime('%Y-%m-%d %H:%M')}</td>
+                <td>{appt.patient.user.username}</td>
+                <td>{appt.status}</td>
+                <td>{appt.diagnosis or 'N/A'}</td>
+            </tr>
+        """
+    with open(os.path.join(out_dir, f'legacy_{doctor.id}.html'), 'w') as f:
+        f.write(html_content + "</table>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=1000)
+    parser.add_argument('--per-doctor', type=int, default=300)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--legacy-sample', type=int, default=50,
+                        help='doctors to run the old per-doctor path for (0 to skip)')
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix='hms_reports_')
+    try:
+        with app.app_context():
+            t0 = time.perf_counter()
+            seed(args.doctors, args.per_doctor, args.patients)
+            print(f"Seeded {args.doctors * args.per_doctor} appointments in {time.perf_counter() - t0:.1f}s")
+
+            t0 = time.perf_counter()
+            written = generate_monthly_reports(out_dir=out_dir)
+            engine = time.perf_counter() - t0
+            print(f"engine: {len(written)} reports in {engine:.2f}s "
+                  f"({args.doctors * args.per_doctor / engine:,.0f} rows/s)")
+
+            if args.legacy_sample:
+                db.session.remove()
+                start, end = last_month()
+                t0 = time.perf_counter()
+                for doctor in Doctor.query.limit(args.legacy_sample).all():
+                    legacy_report(doctor, start, end, out_dir)
+                legacy = (time.perf_counter() - t0) / args.legacy_sample * args.doctors
+                print(f"legacy: ~{legacy:.2f}s extrapolated from {args.legacy_sample} doctors "
+                      f"({legacy / engine:.1f}x slower)")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+"""
+Latency and query-count budgets for every /api route (pytest-benchmark)
+
+Seeds a throwaway SQLite database at each --sizes appointment count with
+create_sample_data.py and benchmarks every /api/* route through the Flask
+test client as the busiest doctor / patient (or the admin), counting the SQL
+statements each call runs with a before_cursor_execute listener. A route's
+test fails when it answers with an error, when its median time is over its
+budget, when it runs more statements than its budget, or when it runs more
+statements at a larger size than at the smallest one (an N+1 that grows with
+the data). Routes that exist in the app but have no entry in ROUTES fail
+too, so new endpoints have to come with a budget.
+
+The cache is cleared before every call, so the numbers are for the
+uncached path. The statement counts and sizes go into each benchmark's
+extra_info, so they are part of the --benchmark-json output.
+
+Usage (pip install -r requirements-dev.txt):
+    python -m pytest benchmarks/bench_routes.py --sizes 1000,100000
+    python -m pytest benchmarks/bench_routes.py --sizes 1000,1000000 --benchmark-json routes.json
+"""
+
+import io
+from collections import namedtuple
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import app
+from caching import cache
+from create_sample_data import create_sample_data
+from models import db, User, Doctor, Patient, Appointment, AvailabilitySlot
+from tasks import celery
+
+IMPORT_ROWS = 100
+DEFAULT_MS = 250
+DEFAULT_QUERIES = 8
+SLOW_MS = 2000  # password hashing, exports
+
+# method, url rule, caller role, prepare(fixture) -> test client kwargs, budgets.
+# streams=True: the route reads its result in fixed-size batches, so its
+# statement count is allowed to grow with the data.
+Route = namedtuple('Route', 'method rule role prepare max_ms max_queries streams',
+                   defaults=(DEFAULT_MS, DEFAULT_QUERIES, False))
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.active = False
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        if self.active:
+            self.count += 1
+
+    def close(self):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+class Fixture:
+    """Ids and tokens of the accounts the routes are called as, for one seeded size"""
+
+    def __init__(self, client):
+        self.client = client
+        self.serial = 0
+        busiest = lambda column: db.session.query(column).group_by(column).order_by(
+            db.func.count().desc(), column).limit(1).scalar()
+        doctor = db.session.get(Doctor, busiest(Appointment.doctor_id))
+        patient = db.session.get(Patient, busiest(Appointment.patient_id))
+        admin = User.query.filter_by(role='admin').first()
+        self.doctor_id, self.specialization, self.patient_id = doctor.id, doctor.specialization, patient.id
+        self.doctor_name = doctor.user.username
+        self.tokens = {
+            'admin': create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'}),
+            'doctor': create_access_token(identity=str(doctor.user_id),
+                                          additional_claims={'role': 'doctor', 'profile_id': doctor.id}),
+            'patient': create_access_token(identity=str(patient.user_id),
+                                           additional_claims={'role': 'patient', 'profile_id': patient.id}),
+        }
+        self.completed_id = db.session.query(db.func.max(Appointment.id)).filter(
+            Appointment.doctor_id == doctor.id, Appointment.status == 'Completed'
+        ).scalar()
+        self.export_id = None
+        self.import_id = None
+        self.seeded_at = datetime.now()
+
+    def unique(self, prefix):
+        self.serial += 1
+        return f"bench_{prefix}_{self.serial}"
+
+    def call(self, role, method, path, **kwargs):
+        headers = {'Authorization': 'Bearer ' + self.tokens[role]}
+        res = self.client.open(path, method=method, headers=headers, **kwargs)
+        return res.status_code, res.get_json(silent=True)
+
+    def free_slot(self, doctor_id=None):
+        query = AvailabilitySlot.query.join(Doctor).filter(
+            Doctor.is_approved.is_(True),
+            AvailabilitySlot.booked_count < AvailabilitySlot.capacity,
+            AvailabilitySlot.start > datetime.now()
+        )
+        if doctor_id is not None:
+            query = query.filter(AvailabilitySlot.doctor_id == doctor_id)
+        return query.order_by(AvailabilitySlot.start, AvailabilitySlot.doctor_id).first()
+
+    def booked_appointment(self):
+        """Book a fresh slot for the patient (outside the timed call); returns (id, doctor_id)"""
+        slot = self.free_slot()
+        status, payload = self.call('patient', 'POST', '/api/patient/book',
+                                    json={'doctor_id': slot.doctor_id, 'date_time': slot.start.isoformat()})
+        assert status == 201, payload
+        return payload['appointment_id'], slot.doctor_id
+
+    def new_account(self, role):
+        user = User(username=self.unique(role), email=self.unique(role) + '@example.com', password='x', role=role)
+        db.session.add(user)
+        db.session.flush()
+        profile = Doctor(user_id=user.id, specialization='General Medicine') if role == 'doctor' else Patient(user_id=user.id)
+        db.session.add(profile)
+        db.session.commit()
+        return profile.id
+
+    def export_task(self):
+        if self.export_id is None:
+            status, payload = self.call('patient', 'POST', '/api/patient/export', json={'format': 'csv'})
+            assert status == 202, payload
+            self.export_id = payload['task_id']
+        return self.export_id
+
+    def import_task(self):
+        if self.import_id is None:
+            status, payload = self.call('admin', 'POST', '/api/admin/import/patients', **self.upload('patients'))
+            assert status == 202, payload
+            self.import_id = payload['task_id']
+        return self.import_id
+
+    def upload(self, entity):
+        if entity == 'appointments':
+            when = datetime.now() - timedelta(days=400)
+            lines = ['patient_id,doctor_id,date_time,status,diagnosis'] + [
+                f"{self.patient_id},{self.doctor_id},{(when + timedelta(hours=i)).isoformat()},Completed,Checkup"
+                for i in range(IMPORT_ROWS)
+            ]
+        else:
+            extra = 'specialization' if entity == 'doctors' else 'address'
+            lines = [f'username,email,password_hash,{extra}']
+            for _ in range(IMPORT_ROWS):
+                name = self.unique(entity)
+                lines.append(f"{name},{name}@example.com,x,General Medicine")
+        return {'data': {'file': (io.BytesIO('\n'.join(lines).encode()), f'{entity}.csv')},
+                'content_type': 'multipart/form-data'}
+
+
+def _get(path):
+    return lambda fx: {'path': path(fx) if callable(path) else path}
+
+
+def _book(fx):
+    slot = fx.free_slot()
+    return {'path': '/api/patient/book', 'json': {'doctor_id': slot.doctor_id, 'date_time': slot.start.isoformat()}}
+
+
+def _reschedule(fx):
+    appt_id, doctor_id = fx.booked_appointment()
+    slot = fx.free_slot(doctor_id)
+    return {'path': f'/api/patient/appointment/{appt_id}', 'json': {'date_time': slot.start.isoformat()}}
+
+
+def _account(role, with_spec):
+    def prepare(fx):
+        name = fx.unique(role)
+        body = {'username': name, 'email': name + '@example.com', 'password': 'bench123'}
+        if with_spec:
+            body['specialization'] = 'General Medicine'
+        return {'path': '/api/admin/doctors' if with_spec else '/api/register', 'json': body}
+    return prepare
+
+
+ROUTES = [
+    # --- Auth ---
+    Route('POST', '/api/login', None,
+          lambda fx: {'path': '/api/login', 'json': {'username': 'admin', 'password': 'admin123'}}, max_ms=SLOW_MS),
+    Route('POST', '/api/register', None, _account('patient', False), max_ms=SLOW_MS),
+    # --- Admin ---
+    Route('GET', '/api/admin/stats', 'admin', _get('/api/admin/stats')),
+    Route('GET', '/api/admin/doctors', 'admin', _get('/api/admin/doctors')),
+    Route('POST', '/api/admin/doctors', 'admin', _account('doctor', True), max_ms=SLOW_MS),
+    Route('PUT', '/api/admin/doctor/<int:id>', 'admin',
+          lambda fx: {'path': f'/api/admin/doctor/{fx.doctor_id}', 'json': {'specialization': fx.specialization}}),
+    Route('DELETE', '/api/admin/doctor/<int:id>', 'admin',
+          lambda fx: {'path': f"/api/admin/doctor/{fx.new_account('doctor')}"}, max_queries=12),
+    Route('GET', '/api/admin/appointments', 'admin', _get('/api/admin/appointments')),
+    Route('GET', '/api/admin/patients', 'admin', _get('/api/admin/patients')),
+    Route('DELETE', '/api/admin/patient/<int:id>', 'admin',
+          lambda fx: {'path': f"/api/admin/patient/{fx.new_account('patient')}"}, max_queries=12),
+    # The busiest doctor's name and specialization, so every size has matches to load
+    Route('GET', '/api/admin/search/doctors', 'admin',
+          _get(lambda fx: f"/api/admin/search/doctors?q={fx.doctor_name[:5]}&specialization={fx.specialization.split()[0].lower()}")),
+    Route('GET', '/api/admin/search/patients', 'admin', _get('/api/admin/search/patients?q=patient1')),
+    Route('GET', '/api/admin/cache/stats', 'admin', _get('/api/admin/cache/stats')),
+    Route('GET', '/api/admin/export/<any(appointments, patients, doctors):entity>', 'admin',
+          _get(lambda fx: f"/api/admin/export/appointments?since={fx.seeded_at.isoformat()}")),
+    Route('POST', '/api/admin/import/<any(doctors, patients, appointments):entity>', 'admin',
+          lambda fx: dict(fx.upload('appointments'), path='/api/admin/import/appointments'), max_ms=SLOW_MS),
+    Route('GET', '/api/admin/import/<uuid:task_id>', 'admin',
+          _get(lambda fx: f'/api/admin/import/{fx.import_task()}')),
+    # --- Doctor ---
+    Route('GET', '/api/doctor/appointments', 'doctor', _get('/api/doctor/appointments')),
+    Route('GET', '/api/doctor/appointments/upcoming', 'doctor', _get('/api/doctor/appointments/upcoming')),
+    Route('PUT', '/api/doctor/appointment/<int:id>', 'doctor',
+          lambda fx: {'path': f'/api/doctor/appointment/{fx.completed_id}', 'json': {'notes': fx.unique('note')}}),
+    Route('GET', '/api/doctor/patient/<int:patient_id>/history', 'doctor',
+          _get(lambda fx: f'/api/doctor/patient/{fx.patient_id}/history')),
+    Route('GET', '/api/clinical/search', 'doctor', _get('/api/clinical/search?q=migraine&limit=20')),
+    Route('GET', '/api/doctor/patients', 'doctor', _get('/api/doctor/patients?sort=last_visit')),
+    Route('GET', '/api/doctor/availability', 'doctor', _get('/api/doctor/availability')),
+    Route('POST', '/api/doctor/availability', 'doctor',
+          lambda fx: {'path': '/api/doctor/availability', 'json': fx.call('doctor', 'GET', '/api/doctor/availability')[1]}),
+    Route('GET', '/api/doctor/<int:doctor_id>/availability', 'patient',
+          _get(lambda fx: f'/api/doctor/{fx.doctor_id}/availability')),
+    # --- Patient ---
+    Route('GET', '/api/patient/doctors', 'patient', _get('/api/patient/doctors')),
+    Route('GET', '/api/patient/search/doctors', 'patient', _get('/api/patient/search/doctors?q=doctor1')),
+    Route('GET', '/api/patient/appointments', 'patient', _get('/api/patient/appointments')),
+    Route('GET', '/api/patient/treatment-history', 'patient', _get('/api/patient/treatment-history')),
+    Route('POST', '/api/patient/book', 'patient', _book),
+    Route('PUT', '/api/patient/appointment/<int:id>', 'patient', _reschedule),
+    Route('DELETE', '/api/patient/appointment/<int:id>', 'patient',
+          lambda fx: {'path': f'/api/patient/appointment/{fx.booked_appointment()[0]}'}),
+    Route('GET', '/api/patient/profile', 'patient', _get('/api/patient/profile')),
+    Route('PUT', '/api/patient/profile', 'patient',
+          lambda fx: {'path': '/api/patient/profile', 'json': {'address': fx.unique('street')}}),
+    Route('POST', '/api/patient/export', 'patient',
+          lambda fx: {'path': '/api/patient/export', 'json': {'format': 'csv'}}, max_ms=SLOW_MS, streams=True),
+    Route('GET', '/api/patient/export/<uuid:task_id>', 'patient',
+          _get(lambda fx: f'/api/patient/export/{fx.export_task()}')),
+    Route('GET', '/api/patient/export/<uuid:task_id>/download', 'patient',
+          _get(lambda fx: f'/api/patient/export/{fx.export_task()}/download')),
+    # --- Shared ---
+    Route('GET', '/api/specializations', None, _get('/api/specializations')),
+    Route('GET', '/api/slots/search', None, _get('/api/slots/search?limit=20')),
+    Route('GET', '/api/bootstrap/<any(admin, doctor, patient):role>', 'patient', _get('/api/bootstrap/patient')),
+    # EventSource sends its token in the query string
+    Route('GET', '/api/stream/appointments', None,
+          _get(lambda fx: f"/api/stream/appointments?token={fx.tokens['doctor']}")),
+]
+
+
+def missing_routes():
+    """(method, rule) pairs served by the app that have no entry in ROUTES"""
+    covered = {(r.method, r.rule) for r in ROUTES}
+    served = {
+        (method, rule.rule)
+        for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    return sorted(served - covered)
+
+
+def scale(n_appointments):
+    """Doctor / patient counts that keep roughly the demo data's proportions"""
+    return max(5, n_appointments // 500), max(5, n_appointments // 10)
+
+
+def sizes(config):
+    return sorted(int(size) for size in config.getoption('sizes').split(','))
+
+
+def pytest_generate_tests(metafunc):
+    # Module scope: each size is seeded once and all routes run against it
+    if 'size' in metafunc.fixturenames:
+        metafunc.parametrize('size', sizes(metafunc.config), scope='module', ids=lambda size: f'{size}appts')
+
+
+@pytest.fixture(scope='module')
+def eager_celery():
+    always_eager = celery.conf.task_always_eager
+    celery.conf.task_always_eager = True
+    yield
+    celery.conf.task_always_eager = always_eager
+
+
+@pytest.fixture(scope='module')
+def counter():
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    yield counter
+    counter.close()
+
+
+@pytest.fixture(scope='module')
+def fx(size, counter, eager_celery):
+    """The accounts to call the routes as, after seeding size appointments"""
+    with redirect_stdout(io.StringIO()):
+        create_sample_data(*scale(size), size, seed=1)
+    with app.app_context():
+        yield Fixture(app.test_client())
+        db.session.remove()
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    """Statement counts per route at the smallest size"""
+    return {}
+
+
+def test_every_route_has_a_budget():
+    assert missing_routes() == []
+
+
+@pytest.mark.parametrize('route', ROUTES, ids=lambda route: f"{route.method} {route.rule}")
+def test_route_budget(benchmark, route, size, fx, counter, baseline, request):
+    name = f"{route.method} {route.rule}"
+    calls = []
+
+    def setup():
+        kwargs = route.prepare(fx)
+        db.session.remove()
+        cache.clear()
+        headers = {'Authorization': 'Bearer ' + fx.tokens[route.role]} if route.role else {}
+        counter.count = 0
+        return (), dict(kwargs, method=route.method, headers=headers)
+
+    def call(**kwargs):
+        counter.active = True
+        try:
+            res = fx.client.open(**kwargs)
+            if res.mimetype == 'text/event-stream':
+                next(res.response)  # an open-ended stream: time to its first frame
+                res.close()
+            else:
+                res.get_data()  # drain streamed bodies inside the timed window
+        finally:
+            counter.active = False
+        calls.append((res.status_code, counter.count))
+
+    benchmark.group = f"{size} appointments"
+    benchmark.pedantic(call, setup=setup, rounds=request.config.getoption('repeat'), warmup_rounds=1)
+    measured = calls if benchmark.disabled else calls[1:]
+    statuses = {status for status, _ in measured}
+    statements = max(count for _, count in measured)
+    benchmark.extra_info.update(size=size, statements=statements, status=sorted(statuses))
+
+    assert all(200 <= status < 300 for status in statuses), f"{name}: status {sorted(statuses)}"
+    if not benchmark.disabled:
+        median_ms = benchmark.stats.stats.median * 1000
+        assert median_ms <= route.max_ms, f"{name}: {median_ms:.1f} ms > {route.max_ms} ms budget"
+    if route.streams:
+        return
+    assert statements <= route.max_queries, f"{name}: {statements} statements > {route.max_queries} budget"
+    if size == sizes(request.config)[0]:
+        baseline[name] = statements
+    elif name in baseline:
+        assert statements <= baseline[name], f"{name}: statements grow with data ({baseline[name]} -> {statements})"
@@ -0,0 +1,113 @@
+"""
+Benchmark for the doctor / patient directory search
+
+Seeds patients with surname-style usernames (the search index is filled by
+its triggers as the rows go in) and times the admin and patient search
+endpoints for prefix, substring, multi-word, typo and no-match queries.
+
+Usage:
+    python benchmarks/bench_search.py --patients 1000000 --doctors 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'hms_bench_search.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+from app import app
+from caching import cache
+from models import db, User, Doctor, Patient
+
+SURNAMES = ['smith', 'johnson', 'williams', 'brown', 'garcia', 'miller', 'davis', 'rodriguez', 'martinez', 'wilson']
+SPECIALIZATIONS = ['Cardiology', 'Neurology', 'Orthopedics', 'Pediatrics', 'Dermatology',
+                   'Oncology', 'Psychiatry', 'Radiology', 'Urology', 'Gastroenterology']
+BATCH = 100000
+
+
+def seed(n_patients, n_doctors, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    for start in range(0, n_patients, BATCH):
+        end = min(n_patients, start + BATCH)
+        db.session.execute(db.insert(User), [
+            {'username': f'{rng.choice(SURNAMES)}_{i}', 'email': f'patient{i}@example.com',
+             'password': 'x', 'role': 'patient'}
+            for i in range(start, end)
+        ])
+        db.session.execute(db.insert(Patient), [{'user_id': i + 1} for i in range(start, end)])
+        db.session.commit()
+    db.session.execute(db.insert(User), [
+        {'username': f'dr_{rng.choice(SURNAMES)}_{i}', 'email': f'doctor{i}@hospital.com',
+         'password': 'x', 'role': 'doctor'}
+        for i in range(n_doctors)
+    ])
+    db.session.execute(db.insert(Doctor), [
+        {'user_id': n_patients + i + 1, 'specialization': SPECIALIZATIONS[i % len(SPECIALIZATIONS)],
+         'is_approved': i % 10 != 0}
+        for i in range(n_doctors)
+    ])
+    db.session.commit()
+
+
+def timed(client, url, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        cache.clear()
+        t0 = time.perf_counter()
+        res = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert res.status_code == 200, res.get_json()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], len(res.get_json()['items'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with app.app_context():
+        seed(args.patients, args.doctors)
+        admin = {'Authorization': 'Bearer ' + create_access_token(identity='1', additional_claims={'role': 'admin'})}
+        patient = {'Authorization': 'Bearer ' + create_access_token(identity='1', additional_claims={'role': 'patient'})}
+    print(f"{args.patients} patients, {args.doctors} doctors seeded in {time.perf_counter() - t0:.0f}s")
+
+    some = args.patients // 2
+    cases = {
+        'patient prefix': ('/api/admin/search/patients?q=smi', admin),
+        'patient 2 chars': ('/api/admin/search/patients?q=wi', admin),
+        'patient exact': (f'/api/admin/search/patients?q=patient{some}', admin),
+        'patient substring': (f'/api/admin/search/patients?q={str(some)[:4]}', admin),
+        'patient 2 words': ('/api/admin/search/patients?q=rodriguez+777', admin),
+        'patient typo': (f'/api/admin/search/patients?q=patinet{some}', admin),
+        'patient no match': ('/api/admin/search/patients?q=zzzzzzzz', admin),
+        'doctor + spec': ('/api/admin/search/doctors?q=smith&specialization=cardio', admin),
+        'doctor spec only': ('/api/admin/search/doctors?specialization=neuro', admin),
+        'public doctors': ('/api/patient/search/doctors?q=garcia', patient),
+    }
+    client = app.test_client()
+    worst = 0
+    for name, (url, headers) in cases.items():
+        p50, p95, hits = timed(client, url, headers, args.repeat)
+        worst = max(worst, p95)
+        print(f"{name:18s} {hits:4d} hits   p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+    print("PASS" if worst < args.budget_ms else f"FAIL (p95 over {args.budget_ms} ms)")
+    sys.exit(0 if worst < args.budget_ms else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for /api/slots/search
+
+Seeds doctors with a month of hourly availability, books a share of the
+slots, and times the cross-doctor free-slot search with and without filters.
+
+Usage:
+    python benchmarks/bench_slot_search.py --doctors 500 --days 30
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), 'hms_bench_slot_search.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, User, Doctor, Patient, Appointment, AvailabilitySlot
+
+SPECIALIZATIONS = ['Cardiology', 'Neurology', 'Orthopedics', 'Pediatrics', 'Dermatology',
+                   'Oncology', 'Psychiatry', 'Radiology', 'Urology', 'Gastroenterology']
+HOURS = range(9, 18)
+
+
+def seed(n_doctors, days, booked_share, seed_value=42):
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'role': 'doctor' if i < n_doctors else 'patient'}
+        for i in range(n_doctors + 1)
+    ])
+    db.session.execute(db.insert(Doctor), [
+        {'user_id': i + 1, 'specialization': SPECIALIZATIONS[i % len(SPECIALIZATIONS)]}
+        for i in range(n_doctors)
+    ])
+    db.session.execute(db.insert(Patient), [{'user_id': n_doctors + 1}])
+
+    first_day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    slots, appointments = [], []
+    for doctor_id in range(1, n_doctors + 1):
+        for day in range(days):
+            for hour in HOURS:
+                start = first_day + timedelta(days=day, hours=hour)
+                booked = rng.random() < booked_share
+                slots.append({'doctor_id': doctor_id, 'start': start, 'end': start + timedelta(hours=1),
+                              'capacity': 1, 'booked_count': int(booked)})
+                if booked:
+                    appointments.append({'doctor_id': doctor_id, 'patient_id': 1,
+                                         'date_time': start, 'status': 'Booked'})
+    db.session.execute(db.insert(AvailabilitySlot), slots)
+    db.session.execute(db.insert(Appointment), appointments)
+    db.session.commit()
+    return len(slots), first_day
+
+
+def timed(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        res = client.get(url)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert res.status_code == 200, res.get_json()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--booked-share', type=float, default=0.7)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    with app.app_context():
+        n_slots, first_day = seed(args.doctors, args.days, args.booked_share)
+    print(f"{args.doctors} doctors, {n_slots} slots, {args.booked_share:.0%} booked")
+
+    mid = (first_day + timedelta(days=args.days // 2)).date().isoformat()
+    last = (first_day + timedelta(days=args.days - 1)).date().isoformat()
+    cases = {
+        'earliest 20': '/api/slots/search?limit=20',
+        'specialization': '/api/slots/search?specialization=Urology&limit=20',
+        'spec + late window': f'/api/slots/search?specialization=Urology&from={mid}&to={last}&limit=20',
+        'earliest 200': '/api/slots/search?limit=200',
+    }
+    client = app.test_client()
+    worst = 0
+    for name, url in cases.items():
+        p50, p95 = timed(client, url, args.repeat)
+        worst = max(worst, p95)
+        print(f"{name:20s} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+    print("PASS" if worst < args.budget_ms else f"FAIL (p95 over {args.budget_ms} ms)")
+    sys.exit(0 if worst < args.budget_ms else 1)
+
+
+if __name__ == '__main__':
+    main()
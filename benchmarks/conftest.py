@@ -0,0 +1,21 @@
+"""
+Settings for the pytest-benchmark modules here (bench_routes.py). Like
+tests/conftest.py, the app is imported with the in-process TestConfig, but
+against a database file that is reseeded at every benchmarked size.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'hms_bench_routes.db')
+os.environ.setdefault('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'hms_bench_exports'))
+os.environ.setdefault('IMPORT_DIR', os.path.join(tempfile.gettempdir(), 'hms_bench_imports'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('hms', 'route budgets')
+    group.addoption('--sizes', default='1000,100000', help='comma-separated appointment counts to seed')
+    group.addoption('--repeat', type=int, default=5, help='timed calls per route and size')
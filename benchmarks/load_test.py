@@ -0,0 +1,244 @@
+"""
+Mixed-workload load test for the HMS API
+
+Replays a weighted mix of logins, doctor listing, slot search, booking and
+the patient / doctor / admin dashboard loads from concurrent virtual users,
+then prints p50/p95/p99 latency per endpoint.
+
+By default the app runs in-process (Flask test client, one per worker thread)
+against whatever DATABASE_URL points at. Pass --base-url to hit a running
+server over HTTP instead. Seed the database first with create_sample_data.py,
+whose synthetic accounts (doctor<N> / patient<N>) the virtual users log in as.
+
+Usage:
+    python create_sample_data.py --doctors 200 --patients 5000 --appointments 100000
+    python benchmarks/load_test.py --users 20 --duration 60
+    python benchmarks/load_test.py --base-url http://localhost:5000 --json results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# action -> relative weight
+WORKLOAD = {
+    'login': 5,
+    'list_doctors': 25,
+    'search_slots': 10,
+    'book': 10,
+    'patient_dashboard': 25,
+    'doctor_dashboard': 15,
+    'admin_dashboard': 10,
+}
+
+# Requests answered with these statuses are expected outcomes, not errors
+EXPECTED = {200, 201, 202, 304, 400, 409}
+
+
+class InProcessClient:
+    """Flask test client with the same call shape as HttpClient"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Authorization': 'Bearer ' + token} if token else {}
+        res = self.client.open(path, method=method, headers=headers, json=body)
+        return res.status_code, res.get_json(silent=True)
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = 'Bearer ' + token
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as res:
+                status, payload = res.status, res.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, elapsed_ms, status):
+        with self.lock:
+            self.samples[name].append(elapsed_ms)
+            if status not in EXPECTED:
+                self.errors[name] += 1
+
+    def summary(self):
+        result = {}
+        for name, samples in sorted(self.samples.items()):
+            samples.sort()
+            pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+            result[name] = {
+                'count': len(samples),
+                'errors': self.errors[name],
+                'p50_ms': round(pick(0.50), 2),
+                'p95_ms': round(pick(0.95), 2),
+                'p99_ms': round(pick(0.99), 2),
+            }
+        return result
+
+
+class VirtualUser:
+    def __init__(self, client, recorder, rng, args):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.args = args
+        self.tokens = {}
+
+    def call(self, name, method, path, token=None, body=None):
+        started = time.perf_counter()
+        status, payload = self.client.request(method, path, token, body)
+        self.recorder.record(name, (time.perf_counter() - started) * 1000, status)
+        return status, payload
+
+    def login(self, username, password, force=False):
+        if username not in self.tokens or force:
+            status, payload = self.call('POST /api/login', 'POST', '/api/login',
+                                        body={'username': username, 'password': password})
+            if status != 200:
+                return None
+            self.tokens[username] = payload['access_token']
+        return self.tokens[username]
+
+    def patient(self):
+        return f"patient{self.rng.randrange(5, self.args.patients)}"
+
+    def doctor(self):
+        return f"doctor{self.rng.randrange(5, self.args.doctors)}"
+
+    # --- actions ---
+
+    def do_login(self):
+        self.login(self.patient(), 'patient123', force=True)
+
+    def do_list_doctors(self):
+        self.call('GET /api/patient/doctors', 'GET', '/api/patient/doctors')
+
+    def do_search_slots(self):
+        self.call('GET /api/slots/search', 'GET', '/api/slots/search?limit=20')
+
+    def do_book(self):
+        token = self.login(self.patient(), 'patient123')
+        if not token:
+            return
+        status, slots = self.call('GET /api/slots/search', 'GET', '/api/slots/search?limit=50')
+        if status != 200 or not slots:
+            return
+        slot = self.rng.choice(slots)
+        status, payload = self.call('POST /api/patient/book', 'POST', '/api/patient/book', token,
+                                    {'doctor_id': slot['doctor_id'], 'date_time': slot['start']})
+        # Give half of the slots back so the free pool does not drain during long runs
+        if status == 201 and payload and 'appointment_id' in payload and self.rng.random() < 0.5:
+            self.call('DELETE /api/patient/appointment/<id>', 'DELETE',
+                      f"/api/patient/appointment/{payload['appointment_id']}", token)
+
+    def do_patient_dashboard(self):
+        token = self.login(self.patient(), 'patient123')
+        if not token:
+            return
+        self.call('GET /api/bootstrap/patient', 'GET', '/api/bootstrap/patient', token)
+
+    def do_doctor_dashboard(self):
+        token = self.login(self.doctor(), 'doctor123')
+        if not token:
+            return
+        self.call('GET /api/bootstrap/doctor', 'GET', '/api/bootstrap/doctor', token)
+        self.call('GET /api/doctor/appointments/upcoming', 'GET', '/api/doctor/appointments/upcoming', token)
+        self.call('GET /api/doctor/patients', 'GET', '/api/doctor/patients', token)
+
+    def do_admin_dashboard(self):
+        token = self.login('admin', 'admin123')
+        if not token:
+            return
+        self.call('GET /api/bootstrap/admin', 'GET', '/api/bootstrap/admin', token)
+        self.call('GET /api/admin/appointments', 'GET', '/api/admin/appointments', token)
+
+    def run(self, deadline, stop_after):
+        actions = list(WORKLOAD)
+        weights = list(WORKLOAD.values())
+        done = 0
+        while time.perf_counter() < deadline and done < stop_after:
+            getattr(self, 'do_' + self.rng.choices(actions, weights)[0])()
+            done += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--base-url', help='hit a running server instead of the in-process app')
+    parser.add_argument('--users', type=int, default=10, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--actions', type=int, default=10 ** 9, help='stop each user after this many actions')
+    parser.add_argument('--doctors', type=int, default=200, help='doctor<N> accounts that exist')
+    parser.add_argument('--patients', type=int, default=5000, help='patient<N> accounts that exist')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='also write the summary to this file')
+    args = parser.parse_args()
+
+    if args.base_url:
+        make_client = lambda: HttpClient(args.base_url)
+        target = args.base_url
+    else:
+        from app import app
+        make_client = lambda: InProcessClient(app)
+        target = f"in-process ({app.config['SQLALCHEMY_DATABASE_URI']})"
+
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.duration
+    print(f"{args.users} users for {args.duration:.0f}s against {target}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.users) as pool:
+        futures = [
+            pool.submit(VirtualUser(make_client(), recorder, random.Random(args.seed + i), args).run,
+                        deadline, args.actions)
+            for i in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    summary = recorder.summary()
+    total = sum(row['count'] for row in summary.values())
+    print(f"\n{'endpoint':42s} {'count':>7s} {'err':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}")
+    for name, row in summary.items():
+        print(f"{name:42s} {row['count']:7d} {row['errors']:5d} "
+              f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'generated_at': datetime.now().isoformat(), 'target': target,
+                       'users': args.users, 'duration_s': round(elapsed, 2),
+                       'endpoints': summary}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Booking service for patient appointments.
+
+Slot uniqueness is enforced by the database rather than a SELECT-then-INSERT
+check: ix_appointment_doctor_slot_booked is a partial unique index on
+(doctor_id, date_time) over Booked rows, so only one of several concurrent
+requests for the same slot can commit. The losers' IntegrityError is reported
+as a 409 instead of a 500.
+
+For doctors who declare availability, each booking also claims its
+AvailabilitySlot (booked_count < capacity) and releases it again when the
+appointment stops being Booked.
+"""
+
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from models import db, Doctor, Appointment, AvailabilitySlot
+
+SLOT_TAKEN = "This time slot is already booked. Please choose another time."
+
+
+class BookingError(Exception):
+    """A booking request that cannot be honoured; status is the HTTP code"""
+
+    def __init__(self, msg, status=400):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+
+def parse_slot(value):
+    """Parse an ISO date_time and truncate it to the minute"""
+    try:
+        date_time = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise BookingError("Invalid date_time")
+    return date_time.replace(second=0, microsecond=0)
+
+
+def claim_slot(doctor_id, date_time):
+    """
+    Count a booking against the doctor's declared slot with a conditional
+    UPDATE, so capacity can't be overrun by concurrent requests. Doctors who
+    have not declared any slots accept any time.
+    """
+    claimed = db.session.execute(
+        db.update(AvailabilitySlot).where(
+            AvailabilitySlot.doctor_id == doctor_id,
+            AvailabilitySlot.start == date_time,
+            AvailabilitySlot.booked_count < AvailabilitySlot.capacity
+        ).values(booked_count=AvailabilitySlot.booked_count + 1)
+    ).rowcount
+    if claimed:
+        return
+    if AvailabilitySlot.query.filter_by(doctor_id=doctor_id, start=date_time).first():
+        raise BookingError(SLOT_TAKEN, 409)
+    if AvailabilitySlot.query.filter_by(doctor_id=doctor_id).first():
+        raise BookingError("The doctor is not available at this time. Please choose one of their open slots.")
+
+
+def release_slot(doctor_id, date_time):
+    """Give a Booked appointment's slot back (no-op for undeclared times)"""
+    db.session.execute(
+        db.update(AvailabilitySlot).where(
+            AvailabilitySlot.doctor_id == doctor_id,
+            AvailabilitySlot.start == date_time,
+            AvailabilitySlot.booked_count > 0
+        ).values(booked_count=AvailabilitySlot.booked_count - 1)
+    )
+
+
+def commit_slot():
+    """Commit a change that may claim a slot; a lost race becomes a 409"""
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise BookingError(SLOT_TAKEN, 409)
+
+
+def book(patient_id, doctor_id, value):
+    """Book a slot for a patient; returns the new Appointment"""
+    date_time = parse_slot(value)
+    if date_time < datetime.now():
+        raise BookingError("Cannot book appointments in the past")
+
+    doctor = db.session.get(Doctor, doctor_id) if doctor_id else None
+    if not doctor or not doctor.is_approved:
+        raise BookingError("Doctor not found", 404)
+    claim_slot(doctor.id, date_time)
+
+    appt = Appointment(patient_id=patient_id, doctor_id=doctor.id, date_time=date_time, status='Booked')
+    db.session.add(appt)
+    commit_slot()
+    return appt
+
+
+def reschedule(appt, value):
+    """Move a Booked appointment to a new slot with the same doctor"""
+    if appt.status != 'Booked':
+        raise BookingError("Can only reschedule booked appointments")
+
+    date_time = parse_slot(value)
+    if date_time < datetime.now():
+        raise BookingError("Cannot reschedule to a past date")
+    if date_time == appt.date_time:
+        return appt
+
+    try:
+        release_slot(appt.doctor_id, appt.date_time)
+        claim_slot(appt.doctor_id, date_time)
+    except BookingError:
+        db.session.rollback()
+        raise
+    appt.date_time = date_time
+    appt.reminder_sent_at = None
+    commit_slot()
+    return appt
+
+
+def change_status(appt, status):
+    """Set an appointment's status, keeping slot counters in step; caller commits"""
+    if appt.status == 'Booked' and status != 'Booked':
+        release_slot(appt.doctor_id, appt.date_time)
+    elif appt.status != 'Booked' and status == 'Booked':
+        claim_slot(appt.doctor_id, appt.date_time)
+    appt.status = status
+
+
+def cancel(appt):
+    change_status(appt, 'Cancelled')
+    commit_slot()
@@ -0,0 +1,169 @@
+"""
+Cache helpers shared by the routes.
+
+The Flask-Caching instance lives here (rather than in app.py) so routes and
+tasks can import it without a circular import; app.py binds it to the app.
+Redis is optional for this project, so the wrappers below treat a failing
+backend as a cache miss instead of failing the request.
+"""
+
+import hashlib
+import uuid
+from collections import Counter
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request, Response
+from flask_caching import Cache
+from flask_jwt_extended import get_jwt_identity
+
+cache = Cache()
+
+# Per-process hit/miss counters, keyed by (namespace, 'hit' | 'miss')
+cache_stats = Counter()
+
+
+def cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception as e:
+        current_app.logger.warning(f"[CACHE] get {key} failed: {e}")
+        return None
+
+
+def cache_set(key, value, timeout=None):
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception as e:
+        current_app.logger.warning(f"[CACHE] set {key} failed: {e}")
+
+
+def cache_delete(key):
+    try:
+        cache.delete(key)
+    except Exception as e:
+        current_app.logger.warning(f"[CACHE] delete {key} failed: {e}")
+
+
+# --- Versioned view cache ---
+#
+# Every namespace has a generation token stored in the cache. Cached responses
+# are keyed by (namespace, generation, path + sorted query string), so bumping
+# the generation makes all of a namespace's entries unreachable at once and
+# writes are visible immediately instead of after the TTL. The token is random
+# rather than an incrementing number so an evicted generation can never come
+# back and resurrect old entries.
+
+def generation(namespace):
+    key = f"gen:{namespace}"
+    gen = cache_get(key)
+    if gen is None:
+        try:
+            cache.add(key, uuid.uuid4().hex, timeout=0)
+        except Exception as e:
+            current_app.logger.warning(f"[CACHE] add {key} failed: {e}")
+        gen = cache_get(key)
+    return gen
+
+
+def bump_generation(*namespaces):
+    """Invalidate every cached view in the given namespaces"""
+    for namespace in namespaces:
+        cache_set(f"gen:{namespace}", uuid.uuid4().hex, timeout=0)
+
+
+def _request_key():
+    return request.path + '?' + urlencode(sorted(request.args.items(multi=True)))
+
+
+def cached_value(namespace, name, build, timeout=None):
+    """build() memoized under the namespace's generation, for data shared by several views"""
+    gen = generation(namespace)
+    if gen is None:
+        return build()
+    key = f"value:{namespace}:{gen}:{name}"
+    value = cache_get(key)
+    if value is not None:
+        cache_stats[(namespace.split(':')[0], 'hit')] += 1
+        return value
+    cache_stats[(namespace.split(':')[0], 'miss')] += 1
+    value = build()
+    cache_set(key, value, timeout=timeout)
+    return value
+
+
+def cached_view(namespace, timeout=None):
+    """
+    Cache a view's successful responses per query string. namespace may be a
+    string or a callable taking the view's kwargs, for per-object namespaces.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            ns = namespace(**kwargs) if callable(namespace) else namespace
+            gen = generation(ns)
+            if gen is None:
+                # Cache backend unavailable
+                return fn(*args, **kwargs)
+
+            key = f"view:{ns}:{gen}:{_request_key()}"
+            cached = cache_get(key)
+            if cached is not None:
+                cache_stats[(ns.split(':')[0], 'hit')] += 1
+                body, status, mimetype = cached
+                return Response(body, status=status, mimetype=mimetype)
+
+            cache_stats[(ns.split(':')[0], 'miss')] += 1
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                cache_set(key, (response.get_data(), response.status_code, response.mimetype), timeout=timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+# --- Conditional GET ---
+#
+# The same generation tokens double as cheap change markers: a strong ETag is
+# a hash of the request, the caller's identity and the tokens of every
+# namespace the response depends on. If-None-Match is answered with 304
+# before the view (and its queries) runs.
+
+def _identity():
+    try:
+        return get_jwt_identity() or ''
+    except RuntimeError:
+        # Public route, no JWT verified for this request
+        return ''
+
+
+def conditional_view(*namespaces):
+    """
+    Add ETag / If-None-Match handling to a GET view. Each namespace may be a
+    string or a callable taking the view's kwargs. Apply it below
+    jwt_required so the caller's identity is part of the tag.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return fn(*args, **kwargs)
+
+            tokens = [generation(ns(**kwargs) if callable(ns) else ns) for ns in namespaces]
+            if None in tokens:
+                # Cache backend unavailable, so there is no reliable marker
+                return fn(*args, **kwargs)
+
+            identity = str(_identity())
+            etag = hashlib.sha1('|'.join([_request_key(), identity] + tokens).encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache' if identity else 'no-cache'
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
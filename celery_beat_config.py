@@ -2,7 +2,7 @@ from celery import Celery
 from celery.schedules import crontab
 from config import Config
 
-def make_celery(app_name=__name__()):
+def make_celery(app_name=__name__):
     celery_app = Celery(
         app_name,
         broker=Config.CELERY_BROKER_URL,
@@ -24,6 +24,11 @@ celery.conf.beat_schedule = {
         'task': 'tasks.generate_all_monthly_reports',
         'schedule': crontab(day_of_month=1, hour=9, minute=0),  # 1st day of month at 9:00 AM
     },
+    # Delete patient exports past EXPORT_RETENTION_HOURS, every hour
+    'cleanup-exports': {
+        'task': 'tasks.cleanup_exports',
+        'schedule': crontab(minute=15),
+    },
 }
 
 celery.conf.timezone = 'Asia/Kolkata'  # Set to Indian timezone
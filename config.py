@@ -5,14 +5,61 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///hms.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-this'
+    JWT_QUERY_STRING_NAME = 'token'  # only read by the SSE stream (EventSource can't send headers)
     
     # Celery Config
     CELERY_BROKER_URL = 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
     
     # Cache Config
-    CACHE_TYPE = 'RedisCache'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'RedisCache'
     CACHE_REDIS_HOST = 'localhost'
     CACHE_REDIS_PORT = 6379
     CACHE_REDIS_DB = 1
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
+    
+    # Notifications
+    NOTIFIER_BACKEND = os.environ.get('NOTIFIER_BACKEND') or 'console'
+    SMTP_HOST = os.environ.get('SMTP_HOST') or 'localhost'
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 1025)
+    MAIL_SENDER = os.environ.get('MAIL_SENDER') or 'noreply@hospital.com'
+    REMINDER_CHUNK_SIZE = 500  # appointments per Celery sub-task
+    REMINDER_SEND_BATCH = 50   # messages per notifier call / marker commit
+    
+    # Live appointment events (/api/stream/appointments)
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND') or 'redis'  # redis | memory (single process)
+    EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL') or 'redis://localhost:6379/2'
+    EVENTS_KEEPALIVE = 15  # seconds between keepalive comments on an idle stream
+    EVENTS_MAX_STREAM = 300  # seconds before a stream is cut and the browser reconnects (tokens last 15 minutes)
+    
+    # Generated files
+    REPORT_DIR = os.environ.get('REPORT_DIR') or '.'
+    EXPORT_DIR = os.environ.get('EXPORT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+    EXPORT_RETENTION_HOURS = int(os.environ.get('EXPORT_RETENTION_HOURS') or 24)  # patient exports hold clinical records
+    
+    # Instrumentation (opt-in): request/SQL metrics at /metrics, slow-query log, ?_profile=1 for admins
+    INSTRUMENTATION_ENABLED = (os.environ.get('INSTRUMENTATION_ENABLED') or '').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS') or 200)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # bearer token for /metrics, which is off without one
+    
+    # Passwords: scheme and cost for new hashes; older ones are upgraded on login
+    PASSWORD_SCHEME = os.environ.get('PASSWORD_SCHEME') or 'pbkdf2_sha256'  # pbkdf2_sha256 | bcrypt | argon2
+    PASSWORD_ROUNDS = int(os.environ.get('PASSWORD_ROUNDS') or 0) or None  # None = 600000 for pbkdf2_sha256, 12 for bcrypt, passlib's default for argon2
+    PASSWORD_HASH_THREADS = int(os.environ.get('PASSWORD_HASH_THREADS') or 0) or None  # None = one per CPU
+    LOGIN_QUEUE_LIMIT = None  # logins waiting for a hashing thread before 503 (None = 4 per thread)
+    LOGIN_MAX_FAILURES = 5  # per username ...
+    LOGIN_MAX_FAILURES_PER_IP = 50  # ... and per client IP, within
+    LOGIN_FAILURE_WINDOW = 300  # seconds
+    
+    # Bulk import
+    IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS') or 0)  # 0 = one per CPU (import-data CLI only)
+    IMPORT_DIR = os.environ.get('IMPORT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imports')  # HTTP uploads and their reports
+
+
+class TestConfig(Config):
+    """In-process settings for tests and benchmarks (no Redis needed)"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite://'
+    CACHE_TYPE = 'SimpleCache'
+    NOTIFIER_BACKEND = 'memory'
+    EVENTS_BACKEND = 'memory'
@@ -1,140 +1,260 @@
 """
 Sample Data Generator for Hospital Management System
 Run this script to populate the database with test data
+
+    python create_sample_data.py                      # small demo set
+    python create_sample_data.py --doctors 2000 --patients 500000 --appointments 5000000 --seed 7
+
+The first five doctors and patients are the named demo accounts; the rest are
+doctor<N> / patient<N>. Everything after the admin is written with bulk
+INSERTs, and each role shares one password hash so large runs are not
+dominated by hashing.
 """
 
-from app import app
-from models import db, User, Doctor, Patient, Appointment
-from werkzeug.security import generate_password_hash
-from datetime import datetime, timedelta
+import argparse
 import random
+import time
+from datetime import datetime, timedelta
+from app import app
+from models import db, User, Doctor, Patient, Appointment, AvailabilitySlot
+from passwords import hash_password
+
+BATCH_SIZE = 20000
+
+DOCTORS_DATA = [
+    {'username': 'dr_smith', 'email': 'smith@hospital.com', 'specialization': 'Cardiology'},
+    {'username': 'dr_johnson', 'email': 'johnson@hospital.com', 'specialization': 'Neurology'},
+    {'username': 'dr_williams', 'email': 'williams@hospital.com', 'specialization': 'Orthopedics'},
+    {'username': 'dr_brown', 'email': 'brown@hospital.com', 'specialization': 'Pediatrics'},
+    {'username': 'dr_davis', 'email': 'davis@hospital.com', 'specialization': 'Dermatology'},
+]
+
+PATIENTS_DATA = [
+    {'username': 'john_doe', 'email': 'john@example.com', 'address': '123 Main St'},
+    {'username': 'jane_smith', 'email': 'jane@example.com', 'address': '456 Oak Ave'},
+    {'username': 'bob_wilson', 'email': 'bob@example.com', 'address': '789 Pine Rd'},
+    {'username': 'alice_brown', 'email': 'alice@example.com', 'address': '321 Elm St'},
+    {'username': 'charlie_davis', 'email': 'charlie@example.com', 'address': '654 Maple Dr'},
+]
+
+# Rough share of doctors per specialization
+SPECIALIZATIONS = {
+    'General Medicine': 20, 'Pediatrics': 12, 'Cardiology': 10, 'Orthopedics': 10,
+    'Dermatology': 8, 'Gynecology': 8, 'Neurology': 6, 'Psychiatry': 6,
+    'ENT': 5, 'Ophthalmology': 5, 'Oncology': 4, 'Urology': 3, 'Nephrology': 3,
+}
+
+DIAGNOSES = ['Common Cold', 'Hypertension', 'Diabetes', 'Migraine', 'Back Pain',
+             'Allergic Rhinitis', 'Gastritis', 'Anxiety', 'Sprain', 'Dermatitis']
+PRESCRIPTIONS = [
+    'Take rest and drink fluids',
+    'Blood pressure medication - 1 tablet daily',
+    'Insulin - as per doctor instructions',
+    'Pain reliever - 2 tablets when needed',
+    'Antihistamine - 1 tablet at night',
+    'Physiotherapy - twice a week',
+]
+
+CLINIC_HOURS = range(9, 18)  # hourly slots, 09:00 - 17:00
+HISTORY_DAYS = 365           # appointments go back a year ...
+FUTURE_DAYS = 60             # ... and forward two months
+
+
+def _insert(model, rows, returning=False):
+    """Bulk insert in BATCH_SIZE chunks; optionally return the new ids in order"""
+    ids = []
+    for i in range(0, len(rows), BATCH_SIZE):
+        chunk = rows[i:i + BATCH_SIZE]
+        if returning:
+            ids.extend(db.session.scalars(
+                db.insert(model).returning(model.id, sort_by_parameter_order=True), chunk
+            ).all())
+        else:
+            db.session.execute(db.insert(model), chunk)
+    return ids
+
+
+def _skewed_weights(rng, n):
+    """Heavy-tailed activity weights: a few very busy doctors / frequent patients"""
+    return [rng.paretovariate(3) for _ in range(n)]
+
 
-def create_sample_data():
+def _appointment_time(rng, now):
+    """Weekday-heavy, clinic-hours start time within [-HISTORY_DAYS, FUTURE_DAYS]"""
+    while True:
+        day = now.date() + timedelta(days=rng.randint(-HISTORY_DAYS, FUTURE_DAYS))
+        # Weekends are ~1/4 as busy as weekdays
+        if day.weekday() < 5 or rng.random() < 0.25:
+            break
+    hour = rng.choice(CLINIC_HOURS)
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+
+
+def _status(rng, date_time, now):
+    if date_time < now:
+        return 'Completed' if rng.random() < 0.85 else 'Cancelled'
+    return 'Booked' if rng.random() < 0.9 else 'Cancelled'
+
+
+def create_sample_data(n_doctors=5, n_patients=5, n_appointments=20, seed=None, slot_days=14):
+    rng = random.Random(seed)
     with app.app_context():
         print("Creating sample data...")
-        
+        started = time.perf_counter()
+
         # Reset Database
         print("Resetting database...")
         db.drop_all()
         db.create_all()
-        
+
         # Create Admin
         print("Creating Admin User...")
-        hashed_password = generate_password_hash('admin123')
+        hashed_password = hash_password('admin123')
         admin = User(username='admin', email='admin@hospital.com', role='admin', password=hashed_password)
         db.session.add(admin)
         db.session.commit()
         print("Admin User Created.")
-        
-        # Create sample doctors
-        print("\nCreating doctors...")
-        doctors_data = [
-            {'username': 'dr_smith', 'email': 'smith@hospital.com', 'password': 'doctor123', 'specialization': 'Cardiology'},
-            {'username': 'dr_johnson', 'email': 'johnson@hospital.com', 'password': 'doctor123', 'specialization': 'Neurology'},
-            {'username': 'dr_williams', 'email': 'williams@hospital.com', 'password': 'doctor123', 'specialization': 'Orthopedics'},
-            {'username': 'dr_brown', 'email': 'brown@hospital.com', 'password': 'doctor123', 'specialization': 'Pediatrics'},
-            {'username': 'dr_davis', 'email': 'davis@hospital.com', 'password': 'doctor123', 'specialization': 'Dermatology'},
-        ]
-        
-        doctors = []
-        for data in doctors_data:
-            hashed_pw = generate_password_hash(data['password'])
-            user = User(username=data['username'], email=data['email'], password=hashed_pw, role='doctor')
-            db.session.add(user)
-            db.session.flush()
-            
-            doctor = Doctor(user_id=user.id, specialization=data['specialization'], is_approved=True)
-            db.session.add(doctor)
-            db.session.flush()
-            doctors.append(doctor)
-            print(f"  ✓ Created doctor: {data['username']} ({data['specialization']})")
-        
-        db.session.commit()
-        
-        # Create sample patients
-        print("\nCreating patients...")
-        patients_data = [
-            {'username': 'john_doe', 'email': 'john@example.com', 'password': 'patient123', 'address': '123 Main St'},
-            {'username': 'jane_smith', 'email': 'jane@example.com', 'password': 'patient123', 'address': '456 Oak Ave'},
-            {'username': 'bob_wilson', 'email': 'bob@example.com', 'password': 'patient123', 'address': '789 Pine Rd'},
-            {'username': 'alice_brown', 'email': 'alice@example.com', 'password': 'patient123', 'address': '321 Elm St'},
-            {'username': 'charlie_davis', 'email': 'charlie@example.com', 'password': 'patient123', 'address': '654 Maple Dr'},
-        ]
-        
-        patients = []
-        for data in patients_data:
-            hashed_pw = generate_password_hash(data['password'])
-            user = User(username=data['username'], email=data['email'], password=hashed_pw, role='patient')
-            db.session.add(user)
-            db.session.flush()
-            
-            patient = Patient(user_id=user.id, address=data['address'])
-            db.session.add(patient)
-            db.session.flush()
-            patients.append(patient)
-            print(f"  ✓ Created patient: {data['username']}")
-        
+
+        # Create doctors
+        print(f"\nCreating {n_doctors} doctors...")
+        doctor_hash = hash_password('doctor123')
+        specializations = list(SPECIALIZATIONS)
+        spec_weights = list(SPECIALIZATIONS.values())
+        doctors_data = []
+        for i in range(n_doctors):
+            if i < len(DOCTORS_DATA):
+                doctors_data.append(DOCTORS_DATA[i])
+            else:
+                doctors_data.append({
+                    'username': f'doctor{i}',
+                    'email': f'doctor{i}@hospital.com',
+                    'specialization': rng.choices(specializations, spec_weights)[0]
+                })
+        user_ids = _insert(User, [
+            {'username': d['username'], 'email': d['email'], 'password': doctor_hash, 'role': 'doctor'}
+            for d in doctors_data
+        ], returning=True)
+        doctor_ids = _insert(Doctor, [
+            {'user_id': user_id, 'specialization': d['specialization'], 'is_approved': True}
+            for user_id, d in zip(user_ids, doctors_data)
+        ], returning=True)
         db.session.commit()
-        
-        # Create sample appointments
-        print("\nCreating appointments...")
-        statuses = ['Booked', 'Completed', 'Cancelled']
-        diagnoses = ['Common Cold', 'Hypertension', 'Diabetes', 'Migraine', 'Back Pain', None]
-        prescriptions = [
-            'Take rest and drink fluids',
-            'Blood pressure medication - 1 tablet daily',
-            'Insulin - as per doctor instructions',
-            'Pain reliever - 2 tablets when needed',
-            None
-        ]
-        
-        appointment_count = 0
-        for i in range(20):  # Create 20 appointments
-            patient = random.choice(patients)
-            doctor = random.choice(doctors)
-            
-            # Random date within last 30 days or next 30 days
-            days_offset = random.randint(-30, 30)
-            appt_date = datetime.now() + timedelta(days=days_offset, hours=random.randint(9, 17))
-            
-            status = random.choice(statuses)
-            
-            # Only completed appointments have diagnosis/prescription
-            if status == 'Completed':
-                diagnosis = random.choice([d for d in diagnoses if d is not None])
-                prescription = random.choice([p for p in prescriptions if p is not None])
+
+        # Create patients
+        print(f"Creating {n_patients} patients...")
+        patient_hash = hash_password('patient123')
+        patients_data = []
+        for i in range(n_patients):
+            if i < len(PATIENTS_DATA):
+                patients_data.append(PATIENTS_DATA[i])
             else:
-                diagnosis = None
-                prescription = None
-            
-            appointment = Appointment(
-                patient_id=patient.id,
-                doctor_id=doctor.id,
-                date_time=appt_date,
-                status=status,
-                diagnosis=diagnosis,
-                prescription=prescription
-            )
-            db.session.add(appointment)
-            appointment_count += 1
-        
+                patients_data.append({
+                    'username': f'patient{i}',
+                    'email': f'patient{i}@example.com',
+                    'address': f'{rng.randint(1, 999)} {rng.choice(["Main St", "Oak Ave", "Pine Rd", "Elm St", "Maple Dr"])}'
+                })
+        user_ids = _insert(User, [
+            {'username': p['username'], 'email': p['email'], 'password': patient_hash, 'role': 'patient'}
+            for p in patients_data
+        ], returning=True)
+        patient_ids = _insert(Patient, [
+            {'user_id': user_id, 'address': p['address']}
+            for user_id, p in zip(user_ids, patients_data)
+        ], returning=True)
         db.session.commit()
-        print(f"  ✓ Created {appointment_count} appointments")
-        
+
+        # Create availability for the coming days
+        now = datetime.now()
+        today = datetime.combine(now.date(), datetime.min.time())
+        if doctor_ids and slot_days:
+            print(f"Creating {slot_days} days of availability...")
+            slots = []
+            for doctor_id in doctor_ids:
+                for day in range(1, slot_days + 1):
+                    for hour in CLINIC_HOURS:
+                        start = today + timedelta(days=day, hours=hour)
+                        slots.append({'doctor_id': doctor_id, 'start': start, 'end': start + timedelta(hours=1)})
+                if len(slots) >= BATCH_SIZE:
+                    _insert(AvailabilitySlot, slots)
+                    slots = []
+            _insert(AvailabilitySlot, slots)
+            db.session.commit()
+
+        # Create appointments
+        print(f"Creating {n_appointments} appointments...")
+        created = 0
+        if doctor_ids and patient_ids and n_appointments:
+            doctor_weights = _skewed_weights(rng, len(doctor_ids))
+            patient_weights = _skewed_weights(rng, len(patient_ids))
+            booked = set()  # (doctor_id, date_time) of Booked rows: one per slot
+            rows = []
+            while created < n_appointments:
+                count = min(BATCH_SIZE, n_appointments - created)
+                for doctor_id, patient_id in zip(
+                    rng.choices(doctor_ids, doctor_weights, k=count),
+                    rng.choices(patient_ids, patient_weights, k=count)
+                ):
+                    date_time = _appointment_time(rng, now)
+                    status = _status(rng, date_time, now)
+                    if status == 'Booked':
+                        if (doctor_id, date_time) in booked:
+                            status = 'Cancelled'
+                        else:
+                            booked.add((doctor_id, date_time))
+
+                    # Only completed appointments have diagnosis/prescription
+                    completed = status == 'Completed'
+                    rows.append({
+                        'patient_id': patient_id,
+                        'doctor_id': doctor_id,
+                        'date_time': date_time,
+                        'status': status,
+                        'diagnosis': rng.choice(DIAGNOSES) if completed else None,
+                        'prescription': rng.choice(PRESCRIPTIONS) if completed else None
+                    })
+                _insert(Appointment, rows)
+                db.session.commit()
+                created += len(rows)
+                rows = []
+                if n_appointments > BATCH_SIZE:
+                    print(f"  {created}/{n_appointments}")
+
+            # Slot counters follow the Booked rows that landed on declared slots
+            db.session.execute(
+                db.update(AvailabilitySlot).values(booked_count=db.select(db.func.count()).where(
+                    Appointment.doctor_id == AvailabilitySlot.doctor_id,
+                    Appointment.date_time == AvailabilitySlot.start,
+                    Appointment.status == 'Booked'
+                ).scalar_subquery())
+            )
+            db.session.commit()
+        print(f"  ✓ Created {created} appointments")
+
         print("\n" + "="*60)
-        print("Sample data created successfully!")
+        print(f"Sample data created successfully in {time.perf_counter() - started:.1f}s!")
         print("="*60)
         print("\n📋 TEST CREDENTIALS:\n")
         print("ADMIN:")
         print("  Username: admin")
         print("  Password: admin123\n")
         print("DOCTORS (all use password: doctor123):")
-        for data in doctors_data:
+        for data in doctors_data[:len(DOCTORS_DATA)]:
             print(f"  Username: {data['username']} ({data['specialization']})")
+        if n_doctors > len(DOCTORS_DATA):
+            print(f"  ... plus doctor{len(DOCTORS_DATA)} to doctor{n_doctors - 1}")
         print("\nPATIENTS (all use password: patient123):")
-        for data in patients_data:
+        for data in patients_data[:len(PATIENTS_DATA)]:
             print(f"  Username: {data['username']}")
+        if n_patients > len(PATIENTS_DATA):
+            print(f"  ... plus patient{len(PATIENTS_DATA)} to patient{n_patients - 1}")
         print("\n" + "="*60)
 
 if __name__ == '__main__':
-    create_sample_data()
+    parser = argparse.ArgumentParser(description="Populate the database with sample data")
+    parser.add_argument('--doctors', type=int, default=5)
+    parser.add_argument('--patients', type=int, default=5)
+    parser.add_argument('--appointments', type=int, default=20)
+    parser.add_argument('--slot-days', type=int, default=14, help='days of hourly availability per doctor')
+    parser.add_argument('--seed', type=int, help='random seed for a reproducible data set')
+    args = parser.parse_args()
+    create_sample_data(args.doctors, args.patients, args.appointments, args.seed, args.slot_days)
@@ -0,0 +1,158 @@
+"""
+Live appointment events for the /api/stream/appointments Server-Sent Events
+stream.
+
+Writes publish a small JSON event on each affected user's channel (the same
+appointments:user:<id> names as the view cache namespaces) after their
+commit; each open stream subscribes to its own user's channel. The broker is
+chosen by the EVENTS_BACKEND config key: 'redis' (default, pub/sub, so events
+reach streams held by any web worker) or 'memory' (in-process queues, for
+tests and single-process runs).
+
+Pub/sub keeps nothing: a stream that is disconnected misses the events sent
+meanwhile, so clients reload their lists each time the stream opens. Streams
+are cut after EVENTS_MAX_STREAM seconds so none holds a worker for long.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+
+RETRY_MS = 3000  # how long a browser waits before reconnecting a dropped stream
+
+
+class MemorySubscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue()
+
+    def get(self, timeout):
+        """The next message, or None when none arrives within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """Fans messages out to subscriber queues within this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.queue.put(message)
+
+    def subscribe(self, channel):
+        subscription = MemorySubscription(self, channel)
+        with self.lock:
+            self.subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return message['data'].decode() if message else None
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """Redis pub/sub; the client's connection pool is shared by all threads"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    def subscribe(self, channel):
+        # Each subscription holds its own connection for as long as the stream is open
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(channel)
+        return RedisSubscription(pubsub)
+
+
+_memory = MemoryBroker()
+_redis = {}
+
+
+def get_broker(config):
+    """The broker named by config['EVENTS_BACKEND']"""
+    backend = config.get('EVENTS_BACKEND', 'redis')
+    if backend == 'memory':
+        return _memory
+    if backend == 'redis':
+        url = config['EVENTS_REDIS_URL']
+        if url not in _redis:
+            _redis[url] = RedisBroker(url)
+        return _redis[url]
+    raise ValueError(f"Unknown EVENTS_BACKEND {backend!r}")
+
+
+def user_channel(user_id):
+    return f"appointments:user:{user_id}"
+
+
+def publish(user_id, event):
+    """Send event (a JSON-able dict) to the user's open streams; a broker failure is logged, not raised"""
+    try:
+        get_broker(current_app.config).publish(user_channel(user_id), json.dumps(event))
+    except Exception as e:
+        current_app.logger.warning(f"[EVENTS] publish to user {user_id} failed: {e}")
+
+
+def sse(data, event=None):
+    """One Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ''
+    return frame + ''.join(f"data: {line}\n" for line in data.splitlines()) + "\n"
+
+
+def stream(subscription, keepalive, expires=None, max_age=None):
+    """
+    SSE frames for a subscription: each message as an 'appointment' event and
+    a comment every keepalive seconds. After max_age seconds the stream just
+    ends and the browser reconnects; at the Unix time expires (the token's
+    exp) it ends with an 'expired' event instead, as a reconnect would be
+    refused. Closes the subscription when the client goes away.
+    """
+    deadline = expires
+    if max_age is not None and (deadline is None or time.time() + max_age < deadline):
+        deadline = time.time() + max_age
+    try:
+        yield f"retry: {RETRY_MS}\n: connected\n\n"
+        while True:
+            remaining = deadline - time.time() if deadline is not None else keepalive
+            if remaining <= 0:
+                if deadline == expires:
+                    yield sse('{}', 'expired')
+                return
+            message = subscription.get(min(keepalive, remaining))
+            yield sse(message, 'appointment') if message is not None else ": keepalive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,285 @@
+"""
+Patient history exports and admin bulk exports.
+
+Patient history rows are streamed from a yield_per query straight into the
+output file, so a worker never holds more than one batch of a long history
+in memory. Files land in EXPORT_DIR as patient_<patient_id>_<task_id>.<ext>;
+they are written under a .part name and renamed when complete, so an
+existing file is always a finished export. A .requested marker, left when
+the export is queued, tells a pending export from an unknown task id.
+Files and markers are deleted after EXPORT_RETENTION_HOURS by the
+cleanup_exports task, as they hold patients' clinical records.
+
+Admin exports are generated for a streaming response instead: rows are read
+in keyset batches and each batch is encoded (NDJSON or CSV) and yielded
+before the next is fetched.
+"""
+
+import csv
+import gzip
+import json
+import os
+import time
+from io import StringIO
+from flask import current_app
+from sqlalchemy.orm import aliased
+from models import db, User, Doctor, Patient, Appointment
+
+EXPORT_BATCH = 1000
+
+# format -> (file extension, mimetype)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+HISTORY_COLUMNS = [
+    'Appointment ID',
+    'Date',
+    'Doctor',
+    'Specialization',
+    'Diagnosis',
+    'Prescription',
+    'Notes'
+]
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_path(patient_id, task_id, fmt):
+    extension, _ = EXPORT_FORMATS[fmt]
+    return os.path.join(current_app.config['EXPORT_DIR'], f"patient_{patient_id}_{task_id}.{extension}")
+
+
+def _marker_path(patient_id, task_id):
+    return os.path.join(current_app.config['EXPORT_DIR'], f"patient_{patient_id}_{task_id}.requested")
+
+
+def mark_requested(patient_id, task_id):
+    """Record that the patient queued this export"""
+    path = _marker_path(patient_id, task_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+
+
+def export_requested(patient_id, task_id):
+    return os.path.exists(_marker_path(patient_id, task_id))
+
+
+def cleanup_exports(max_age):
+    """Delete patient export files, markers and leftovers older than max_age seconds; returns how many"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = os.scandir(current_app.config['EXPORT_DIR'])
+    except FileNotFoundError:
+        return 0
+    with entries:
+        for entry in entries:
+            if entry.name.startswith('patient_') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+    return removed
+
+
+def find_export(patient_id, task_id):
+    """(path, format) of a finished export, or None if it is not there (yet)"""
+    for fmt in EXPORT_FORMATS:
+        path = export_path(patient_id, task_id, fmt)
+        if os.path.exists(path):
+            return path, fmt
+    return None
+
+
+def history_rows(patient_id):
+    """Completed appointments for a patient as CSV-ready tuples, streamed in batches"""
+    query = db.session.query(
+        Appointment.id,
+        Appointment.date_time,
+        User.username,
+        Doctor.specialization,
+        Appointment.diagnosis,
+        Appointment.prescription,
+        Appointment.notes
+    ).join(Doctor, Doctor.id == Appointment.doctor_id).join(
+        User, User.id == Doctor.user_id
+    ).filter(
+        Appointment.patient_id == patient_id,
+        Appointment.status == 'Completed'
+    ).order_by(Appointment.date_time, Appointment.id).yield_per(EXPORT_BATCH)
+
+    for appt_id, date_time, doctor, specialization, diagnosis, prescription, notes in query:
+        yield (
+            appt_id,
+            date_time.strftime('%Y-%m-%d %H:%M'),
+            doctor,
+            specialization,
+            diagnosis or '',
+            prescription or '',
+            notes or ''
+        )
+
+
+def _write_csv(rows, path, compress):
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_COLUMNS)
+        writer.writerows(rows)
+
+
+def _write_parquet(rows, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.int64() if i == 0 else pa.string()) for i, name in enumerate(HISTORY_COLUMNS)])
+    with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+        def flush(batch):
+            writer.write_table(pa.Table.from_pylist([dict(zip(HISTORY_COLUMNS, row)) for row in batch], schema))
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH:
+                flush(batch)
+                batch = []
+        flush(batch)
+
+
+def write_patient_history(patient_id, task_id, fmt='csv.gz'):
+    """Stream a patient's history to EXPORT_DIR; returns the finished file path"""
+    path = export_path(patient_id, task_id, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+    rows = history_rows(patient_id)
+    try:
+        if fmt == 'parquet':
+            _write_parquet(rows, partial)
+        else:
+            _write_csv(rows, partial, compress=fmt == 'csv.gz')
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return path
+
+
+# --- Admin bulk exports ---
+
+ADMIN_EXPORT_BATCH = 1000
+
+# format -> mimetype
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _appointments_export(since):
+    patient_user = aliased(User)
+    doctor_user = aliased(User)
+    query = db.session.query(
+        Appointment.id,
+        Appointment.patient_id,
+        patient_user.username.label('patient_name'),
+        Appointment.doctor_id,
+        doctor_user.username.label('doctor_name'),
+        Appointment.date_time,
+        Appointment.status,
+        Appointment.diagnosis,
+        Appointment.prescription,
+        Appointment.notes,
+        Appointment.updated_at
+    ).join(Patient, Patient.id == Appointment.patient_id).join(
+        patient_user, patient_user.id == Patient.user_id
+    ).join(Doctor, Doctor.id == Appointment.doctor_id).join(
+        doctor_user, doctor_user.id == Doctor.user_id
+    )
+    if since:
+        # Inserts and updates only: appointments deleted with their doctor / patient leave no row to report
+        query = query.filter(Appointment.updated_at >= since)
+    return query, {'updated_at': Appointment.updated_at, 'id': Appointment.id}
+
+
+def _patients_export(since):
+    query = db.session.query(
+        Patient.id,
+        Patient.user_id,
+        User.username,
+        User.email,
+        Patient.address
+    ).join(User, User.id == Patient.user_id)
+    return query, {'id': Patient.id}
+
+
+def _doctors_export(since):
+    query = db.session.query(
+        Doctor.id,
+        Doctor.user_id,
+        User.username,
+        User.email,
+        Doctor.specialization,
+        Doctor.is_approved
+    ).join(User, User.id == Doctor.user_id)
+    return query, {'id': Doctor.id}
+
+
+# entity -> query builder returning (query, {sort key name: column})
+ADMIN_EXPORTS = {
+    'appointments': _appointments_export,
+    'patients': _patients_export,
+    'doctors': _doctors_export,
+}
+
+
+def _batches(query, keys):
+    """Walk an export query in keyset order, ADMIN_EXPORT_BATCH rows at a time"""
+    columns = list(keys.values())
+    last = None
+    while True:
+        page = query
+        if last is not None:
+            page = page.filter(db.tuple_(*columns) > last)
+        rows = page.order_by(*columns).limit(ADMIN_EXPORT_BATCH).all()
+        if not rows:
+            return
+        yield rows
+        last = tuple(getattr(rows[-1], name) for name in keys)
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def stream_export(entity, fmt, since=None):
+    """Generator of NDJSON lines / CSV chunks for an admin export"""
+    query, keys = ADMIN_EXPORTS[entity](since)
+    names = [col['name'] for col in query.column_descriptions]
+
+    if fmt == 'csv':
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for rows in _batches(query, keys):
+            writer.writerows([_plain(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    for rows in _batches(query, keys):
+        yield ''.join(
+            json.dumps(dict(zip(names, map(_plain, row)))) + '\n' for row in rows
+        )
@@ -0,0 +1,386 @@
+"""
+Bulk import of doctors, patients and historical appointments.
+
+Records are read from CSV or NDJSON and handled IMPORT_BATCH at a time. Each
+batch is checked against itself and against the database with a few IN
+queries. Passwords are hashed in a process pool (in-process when run by a
+Celery worker), and the valid rows go in with multi-row INSERTs committed
+once per batch. Invalid rows are skipped and reported by line number without
+aborting the rest of the file.
+
+Imports posted over HTTP are saved to IMPORT_DIR as import_<task_id>.<fmt>
+and run by the import_data task, which deletes the upload (it may hold
+passwords) and leaves its report in import_<task_id>.json for the admin to
+poll.
+"""
+
+import csv
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app
+from passwords import hash_password, is_password_hash
+from models import db, User, Doctor, Patient, Appointment, AvailabilitySlot
+
+IMPORT_BATCH = 5000
+MAX_REPORTED_ERRORS = 1000
+IMPORT_ENTITIES = ('doctors', 'patients', 'appointments')
+IMPORT_FORMATS = ('csv', 'ndjson')
+APPOINTMENT_STATUSES = ('Booked', 'Completed', 'Cancelled')
+
+
+def detect_format(filename, fmt=None):
+    """Explicit format, else guess from the file extension (default csv)"""
+    if fmt:
+        return fmt
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_records(stream, fmt):
+    """Yield (line_number, dict or None) from a text stream; None marks an unparseable line"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _batches(records):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == IMPORT_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(record, field):
+    value = record.get(field)
+    return str(value).strip() if value is not None else ''
+
+
+def _flag(value, default=True):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@contextmanager
+def _hasher(workers):
+    """map()-like password hasher; a process pool unless workers == 1"""
+    if workers == 1:
+        yield map
+        return
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        yield lambda fn, items: pool.map(fn, items, chunksize=64)
+
+
+class ImportReport:
+    def __init__(self, entity):
+        self.entity = entity
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.user_ids = set()  # users whose appointment lists changed
+
+    def fail(self, line, *messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": list(messages)})
+
+    def to_dict(self):
+        return {
+            "entity": self.entity,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+def _import_accounts(batch, role, hash_map, report):
+    """Validate and insert one batch of doctor or patient accounts"""
+    candidates = []
+    seen_usernames, seen_emails = set(), set()
+    for line, record in batch:
+        if record is None:
+            report.fail(line, "Malformed record")
+            continue
+        username, email = _text(record, 'username'), _text(record, 'email')
+        errors = []
+        if not username:
+            errors.append("username is required")
+        elif username in seen_usernames:
+            errors.append("duplicate username in file")
+        if not email:
+            errors.append("email is required")
+        elif email in seen_emails:
+            errors.append("duplicate email in file")
+        if not record.get('password') and not record.get('password_hash'):
+            errors.append("password or password_hash is required")
+        elif record.get('password_hash') and not is_password_hash(str(record['password_hash'])):
+            # Login could not verify it (and werkzeug raises on unknown methods)
+            errors.append("password_hash is not a supported hash")
+        if role == 'doctor' and not _text(record, 'specialization'):
+            errors.append("specialization is required")
+        if errors:
+            report.fail(line, *errors)
+            continue
+        seen_usernames.add(username)
+        seen_emails.add(email)
+        candidates.append((line, record, username, email))
+
+    if not candidates:
+        return
+    taken_usernames = set(db.session.scalars(
+        db.select(User.username).where(User.username.in_([c[2] for c in candidates]))
+    ))
+    taken_emails = set(db.session.scalars(
+        db.select(User.email).where(User.email.in_([c[3] for c in candidates]))
+    ))
+    valid = []
+    for line, record, username, email in candidates:
+        errors = []
+        if username in taken_usernames:
+            errors.append("Username already exists")
+        if email in taken_emails:
+            errors.append("Email already exists")
+        if errors:
+            report.fail(line, *errors)
+        else:
+            valid.append((record, username, email))
+    if not valid:
+        return
+
+    plain = [str(record['password']) for record, _, _ in valid if not record.get('password_hash')]
+    hashed = iter(hash_map(hash_password, plain))
+    users = [{
+        'username': username,
+        'email': email,
+        'password': record.get('password_hash') or next(hashed),
+        'role': role
+    } for record, username, email in valid]
+    user_ids = db.session.scalars(
+        db.insert(User).returning(User.id, sort_by_parameter_order=True), users
+    ).all()
+
+    if role == 'doctor':
+        db.session.execute(db.insert(Doctor), [{
+            'user_id': user_id,
+            'specialization': _text(record, 'specialization'),
+            'is_approved': _flag(record.get('is_approved'))
+        } for user_id, (record, _, _) in zip(user_ids, valid)])
+    else:
+        db.session.execute(db.insert(Patient), [{
+            'user_id': user_id,
+            'address': _text(record, 'address') or None
+        } for user_id, (record, _, _) in zip(user_ids, valid)])
+    db.session.commit()
+    report.imported += len(valid)
+
+
+def _resolve(model, records, id_field, username_field):
+    """{id: user_id} and {username: (id, user_id)} for the profiles a batch refers to"""
+    ids = {_int(r.get(id_field)) for r in records if _int(r.get(id_field)) is not None}
+    names = {_text(r, username_field) for r in records if _text(r, username_field)}
+    by_id, by_name = {}, {}
+    query = db.select(model.id, model.user_id, User.username).join(User, User.id == model.user_id)
+    if ids:
+        for profile_id, user_id, _ in db.session.execute(query.where(model.id.in_(ids))):
+            by_id[profile_id] = user_id
+    if names:
+        for profile_id, user_id, username in db.session.execute(query.where(User.username.in_(names))):
+            by_name[username] = (profile_id, user_id)
+    return by_id, by_name
+
+
+def _pick(record, id_field, username_field, by_id, by_name):
+    profile_id = _int(record.get(id_field))
+    if profile_id is not None:
+        return (profile_id, by_id[profile_id]) if profile_id in by_id else None
+    return by_name.get(_text(record, username_field))
+
+
+def _import_appointments(batch, report):
+    """Validate and insert one batch of appointments"""
+    records = [record for _, record in batch if record is not None]
+    patients = _resolve(Patient, records, 'patient_id', 'patient_username')
+    doctors = _resolve(Doctor, records, 'doctor_id', 'doctor_username')
+
+    candidates = []
+    for line, record in batch:
+        if record is None:
+            report.fail(line, "Malformed record")
+            continue
+        errors = []
+        patient = _pick(record, 'patient_id', 'patient_username', *patients)
+        if not patient:
+            errors.append("Unknown patient")
+        doctor = _pick(record, 'doctor_id', 'doctor_username', *doctors)
+        if not doctor:
+            errors.append("Unknown doctor")
+        try:
+            date_time = datetime.fromisoformat(_text(record, 'date_time'))
+        except ValueError:
+            date_time = None
+            errors.append("Invalid date_time")
+        status = _text(record, 'status')
+        if status not in APPOINTMENT_STATUSES:
+            errors.append(f"status must be one of {', '.join(APPOINTMENT_STATUSES)}")
+        if errors:
+            report.fail(line, *errors)
+            continue
+        candidates.append((line, record, patient, doctor, date_time, status))
+
+    # At most one Booked appointment per doctor slot, within the file and against the table
+    booked = [(c[3][0], c[4]) for c in candidates if c[5] == 'Booked']
+    taken = set()
+    if booked:
+        taken = set(db.session.execute(db.select(Appointment.doctor_id, Appointment.date_time).where(
+            Appointment.status == 'Booked',
+            Appointment.doctor_id.in_({d for d, _ in booked}),
+            Appointment.date_time.in_({t for _, t in booked})
+        )).all())
+
+    rows = []
+    for line, record, patient, doctor, date_time, status in candidates:
+        if status == 'Booked':
+            if (doctor[0], date_time) in taken:
+                report.fail(line, "Doctor already has a booked appointment at this time")
+                continue
+            taken.add((doctor[0], date_time))
+        rows.append({
+            'patient_id': patient[0],
+            'doctor_id': doctor[0],
+            'date_time': date_time,
+            'status': status,
+            'diagnosis': _text(record, 'diagnosis') or None,
+            'prescription': _text(record, 'prescription') or None,
+            'notes': _text(record, 'notes') or None
+        })
+        report.user_ids.update((patient[1], doctor[1]))
+    if not rows:
+        return
+
+    db.session.execute(db.insert(Appointment), rows)
+    booked_doctors = {row['doctor_id'] for row in rows if row['status'] == 'Booked'}
+    if booked_doctors:
+        # Re-derive slot counters for the doctors that gained Booked rows
+        db.session.execute(
+            db.update(AvailabilitySlot).where(
+                AvailabilitySlot.doctor_id.in_(booked_doctors)
+            ).values(booked_count=db.select(db.func.count()).where(
+                Appointment.doctor_id == AvailabilitySlot.doctor_id,
+                Appointment.date_time == AvailabilitySlot.start,
+                Appointment.status == 'Booked'
+            ).scalar_subquery())
+        )
+    db.session.commit()
+    report.imported += len(rows)
+
+
+def import_records(entity, stream, fmt, hash_workers=None):
+    """Import every record in a text stream; returns an ImportReport"""
+    report = ImportReport(entity)
+    records = read_records(stream, fmt)
+    if entity == 'appointments':
+        for batch in _batches(records):
+            _import_appointments(batch, report)
+        return report
+
+    role = 'doctor' if entity == 'doctors' else 'patient'
+    workers = hash_workers if hash_workers is not None else os.cpu_count()
+    with _hasher(workers) as hash_map:
+        for batch in _batches(records):
+            _import_accounts(batch, role, hash_map, report)
+    return report
+
+
+def upload_path(task_id, fmt):
+    return os.path.join(current_app.config['IMPORT_DIR'], f"import_{task_id}.{fmt}")
+
+
+def result_path(task_id):
+    return os.path.join(current_app.config['IMPORT_DIR'], f"import_{task_id}.json")
+
+
+def save_upload(stream, task_id, fmt):
+    """Copy a binary upload stream to IMPORT_DIR for the import_data task"""
+    path = upload_path(task_id, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f)
+
+
+def import_upload(entity, task_id, fmt):
+    """Import a saved upload without a process pool and delete it; returns an ImportReport"""
+    path = upload_path(task_id, fmt)
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            return import_records(entity, f, fmt, hash_workers=1)
+    finally:
+        os.remove(path)
+
+
+def save_result(task_id, result):
+    """Store an import's outcome; written under a .part name so readers never see half a file"""
+    path = result_path(task_id)
+    with open(path + '.part', 'w') as f:
+        json.dump(result, f)
+    os.replace(path + '.part', path)
+
+
+def import_status(task_id):
+    """The stored outcome of an import, {"status": "pending"} while it runs, or None if unknown"""
+    try:
+        with open(result_path(task_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    if any(os.path.exists(upload_path(task_id, fmt)) for fmt in IMPORT_FORMATS):
+        return {"status": "pending"}
+    return None
+
+
+def cleanup_imports(max_age):
+    """Delete import reports and abandoned uploads older than max_age seconds; returns how many"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = os.scandir(current_app.config['IMPORT_DIR'])
+    except FileNotFoundError:
+        return 0
+    with entries:
+        for entry in entries:
+            if entry.name.startswith('import_') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+    return removed
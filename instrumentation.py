@@ -0,0 +1,290 @@
+"""
+Opt-in request / SQL instrumentation (INSTRUMENTATION_ENABLED).
+
+Every request is timed, and the SQL statements it runs are counted and timed
+through engine events. Statements slower than SLOW_QUERY_MS are logged with
+the endpoint that issued them. The totals are exposed in Prometheus text
+format at /metrics (bearer METRICS_TOKEN; the endpoint is not registered
+without one) and as a Server-Timing header on each response.
+
+Request, DB and cache metrics are kept per process, like the cache
+hit/miss counters, so scrape every web worker. Celery task durations are
+summed in the shared cache by the worker's task signals, so any web process
+can report them.
+
+An admin can add ?_profile=1 to any request to get a cProfile breakdown of
+that request (pyinstrument's when it is installed) instead of its response.
+"""
+
+import cProfile
+import hmac
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from flask import Blueprint, Response, current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from sqlalchemy import event
+from caching import cache, cache_stats
+from models import db
+
+# Request latency buckets, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROFILE_LINES = 40
+
+_lock = threading.Lock()
+_task_started = {}
+
+
+class Histogram:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+        self.counts = defaultdict(int)
+        self.sums = defaultdict(float)
+
+    def observe(self, labels, value):
+        with _lock:
+            buckets = self.buckets[labels]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            self.counts[labels] += 1
+            self.sums[labels] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for labels in sorted(self.counts):
+                for bound, count in zip(BUCKETS, self.buckets[labels]):
+                    lines.append(f"{self.name}_bucket{_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(labels + (('le', '+Inf'),))} {self.counts[labels]}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {self.sums[labels]:.6f}")
+                lines.append(f"{self.name}_count{_labels(labels)} {self.counts[labels]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = defaultdict(float)
+
+    def inc(self, labels, value=1):
+        with _lock:
+            self.values[labels] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for labels in sorted(self.values):
+                lines.append(f"{self.name}{_labels(labels)} {self.values[labels]:g}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram('hms_request_duration_seconds', 'Request latency by endpoint')
+REQUESTS = Counter('hms_requests_total', 'Requests by endpoint and status')
+DB_SECONDS = Counter('hms_db_seconds_total', 'Time spent in SQL statements by endpoint')
+DB_QUERIES = Counter('hms_db_queries_total', 'SQL statements by endpoint')
+SLOW_QUERIES = Counter('hms_db_slow_queries_total', 'SQL statements over SLOW_QUERY_MS by endpoint')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in pairs) + '}'
+
+
+def _endpoint():
+    if not has_request_context():
+        return 'background'
+    return request.endpoint or 'unmatched'
+
+
+# --- SQL ---
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    endpoint = _endpoint()
+    if has_request_context() and 'db_seconds' in g:
+        g.db_seconds += elapsed
+        g.db_queries += 1
+    labels = (('endpoint', endpoint),)
+    DB_SECONDS.inc(labels, elapsed)
+    DB_QUERIES.inc(labels)
+    if elapsed * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        SLOW_QUERIES.inc(labels)
+        current_app.logger.warning(f"[SLOW SQL] {elapsed * 1000:.0f} ms in {endpoint}: {' '.join(statement.split())[:500]}")
+
+
+def _on_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    # so the pooled connection's list doesn't grow
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+# --- Requests ---
+
+def _wants_profile():
+    if request.args.get('_profile') != '1':
+        return False
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role') == 'admin'
+    except Exception:
+        return False
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.db_seconds = 0.0
+    g.db_queries = 0
+    if _wants_profile():
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        else:
+            g.profiler = Profiler()
+            g.profiler.start()
+
+
+def _profile_response(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        return Response(out.getvalue(), mimetype='text/plain')
+    profiler.stop()
+    return Response(profiler.output_text(unicode=True), mimetype='text/plain')
+
+
+def _finish_request(response):
+    if 'request_started' not in g:
+        return response
+    if 'profiler' in g:
+        profiler = g.pop('profiler')
+        status = response.status_code
+        response = _profile_response(profiler)
+        response.headers['X-Profiled-Status'] = str(status)
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = _endpoint()
+    REQUEST_SECONDS.observe((('endpoint', endpoint), ('method', request.method)), elapsed)
+    REQUESTS.inc((('endpoint', endpoint), ('method', request.method), ('status', response.status_code)))
+    response.headers['Server-Timing'] = (
+        f"app;dur={elapsed * 1000:.1f}, db;dur={g.db_seconds * 1000:.1f};desc=\"{g.db_queries} queries\""
+    )
+    return response
+
+
+# --- Celery ---
+
+def _task_key(name, field):
+    return f"metrics:task:{name}:{field}"
+
+
+def track_celery_tasks():
+    """Sum task run times into the shared cache; call from the worker's tasks module"""
+    from celery.signals import task_prerun, task_postrun
+
+    @task_prerun.connect(weak=False)
+    def started(task_id=None, **kwargs):
+        _task_started[task_id] = time.perf_counter()
+
+    @task_postrun.connect(weak=False)
+    def finished(task_id=None, task=None, state=None, **kwargs):
+        began = _task_started.pop(task_id, None)
+        if began is None:
+            return
+        from app import app
+        with app.app_context():
+            try:
+                cache.cache.inc(_task_key(task.name, 'count'))
+                cache.cache.inc(_task_key(task.name, 'ms'), round((time.perf_counter() - began) * 1000))
+                if state != 'SUCCESS':
+                    cache.cache.inc(_task_key(task.name, 'failed'))
+            except Exception as e:
+                current_app.logger.warning(f"[METRICS] Could not record task {task.name}: {e}")
+
+
+def _task_lines():
+    from tasks import celery
+    names = sorted(name for name in celery.tasks if not name.startswith('celery.'))
+    try:
+        values = cache.get_many(*[_task_key(name, field) for name in names for field in ('count', 'ms', 'failed')])
+    except Exception as e:
+        current_app.logger.warning(f"[METRICS] Could not read task metrics: {e}")
+        return []
+    lines = [
+        "# HELP hms_celery_task_duration_seconds Celery task run time",
+        "# TYPE hms_celery_task_duration_seconds summary",
+    ]
+    failures = ["# HELP hms_celery_task_failures_total Celery tasks that did not succeed",
+                "# TYPE hms_celery_task_failures_total counter"]
+    for i, name in enumerate(names):
+        count, ms, failed = values[i * 3:i * 3 + 3]
+        if not count:
+            continue
+        labels = _labels((('task', name),))
+        lines.append(f"hms_celery_task_duration_seconds_sum{labels} {(ms or 0) / 1000:.3f}")
+        lines.append(f"hms_celery_task_duration_seconds_count{labels} {count}")
+        failures.append(f"hms_celery_task_failures_total{labels} {failed or 0}")
+    return lines + failures
+
+
+def _cache_lines():
+    lines = ["# HELP hms_cache_requests_total View cache lookups by namespace",
+             "# TYPE hms_cache_requests_total counter"]
+    ratios = ["# HELP hms_cache_hit_ratio View cache hit ratio by namespace",
+              "# TYPE hms_cache_hit_ratio gauge"]
+    for namespace in sorted({ns for ns, _ in cache_stats}):
+        hits, misses = cache_stats[(namespace, 'hit')], cache_stats[(namespace, 'miss')]
+        lines.append(f"hms_cache_requests_total{_labels((('namespace', namespace), ('result', 'hit')))} {hits}")
+        lines.append(f"hms_cache_requests_total{_labels((('namespace', namespace), ('result', 'miss')))} {misses}")
+        if hits + misses:
+            ratios.append(f"hms_cache_hit_ratio{_labels((('namespace', namespace),))} {hits / (hits + misses):.4f}")
+    return lines + ratios
+
+
+metrics_bp = Blueprint('instrumentation', __name__)
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Prometheus text exposition of this process's metrics"""
+    expected = f"Bearer {current_app.config['METRICS_TOKEN']}"
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    lines = []
+    for metric in (REQUEST_SECONDS, REQUESTS, DB_SECONDS, DB_QUERIES, SLOW_QUERIES):
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    lines.extend(_task_lines())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Install the hooks and /metrics; a no-op unless INSTRUMENTATION_ENABLED"""
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor)
+        event.listen(db.engine, 'handle_error', _on_error)
+    # Endpoint names and latencies are not for anonymous callers
+    if not app.config.get('METRICS_TOKEN'):
+        app.logger.warning("[METRICS] METRICS_TOKEN is not set; /metrics is disabled")
+        return
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,78 @@
+"""baseline schema
+
+Tables as originally created by db.create_all(). Existing databases already
+have them, so each table is only created when missing.
+
+Revision ID: 07b78a4652bd
+Revises: 
+Create Date: 2026-10-18 10:00:34.566396
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '07b78a4652bd'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password', sa.String(length=200), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        )
+    if 'doctor' not in existing:
+        op.create_table(
+            'doctor',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('specialization', sa.String(length=100), nullable=False),
+            sa.Column('availability', sa.Text(), nullable=True),
+            sa.Column('is_approved', sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'patient' not in existing:
+        op.create_table(
+            'patient',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('address', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'appointment' not in existing:
+        op.create_table(
+            'appointment',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('patient_id', sa.Integer(), nullable=False),
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('date_time', sa.DateTime(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('diagnosis', sa.Text(), nullable=True),
+            sa.Column('prescription', sa.Text(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctor.id']),
+            sa.ForeignKeyConstraint(['patient_id'], ['patient.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('appointment')
+    op.drop_table('patient')
+    op.drop_table('doctor')
+    op.drop_table('user')
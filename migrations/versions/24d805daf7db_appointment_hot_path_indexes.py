@@ -0,0 +1,46 @@
+"""appointment hot path indexes
+
+Composite indexes for booking conflict checks, doctor/patient listings, daily
+reminders and the admin log, plus the per-request user_id profile lookups.
+Indexes that db.create_all() already built are skipped.
+
+Revision ID: 24d805daf7db
+Revises: 07b78a4652bd
+Create Date: 2026-10-18 10:00:44.411611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '24d805daf7db'
+down_revision = '07b78a4652bd'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_appointment_doctor_date_status', 'appointment', ['doctor_id', 'date_time', 'status']),
+    ('ix_appointment_patient_status', 'appointment', ['patient_id', 'status']),
+    ('ix_appointment_status_date', 'appointment', ['status', 'date_time']),
+    ('ix_appointment_date_id', 'appointment', ['date_time', 'id']),
+    ('ix_doctor_user_id', 'doctor', ['user_id']),
+    ('ix_patient_user_id', 'patient', ['user_id']),
+]
+
+
+def _existing_indexes(table):
+    return {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,41 @@
+"""clinical text search index on Postgres
+
+GIN index on the weighted tsvector of appointment diagnosis / prescription /
+notes that search.clinical_page queries. Postgres only; SQLite has its FTS5
+table from 76481bf7ee00.
+
+Revision ID: 3c8e51f0a9d2
+Revises: 76481bf7ee00
+Create Date: 2026-10-18 14:02:41.118904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e51f0a9d2'
+down_revision = '76481bf7ee00'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of search.CLINICAL_TSVECTOR at this revision; the queries must
+# repeat it verbatim for the planner to use the index
+CLINICAL_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(diagnosis, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(prescription, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(notes, '')), 'C')"
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_appointment_clinical_tsv ON appointment USING gin (({CLINICAL_TSVECTOR}))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_appointment_clinical_tsv")
@@ -0,0 +1,35 @@
+"""appointment reminder marker
+
+Appointment.reminder_sent_at records when the day-before reminder went out,
+so a rerun of the reminder job skips appointments that were already notified.
+
+Revision ID: 4a71502df2c5
+Revises: 6dfdc5b9becf
+Create Date: 2026-10-18 10:12:09.265728
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a71502df2c5'
+down_revision = '6dfdc5b9becf'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {col['name'] for col in sa.inspect(op.get_bind()).get_columns('appointment')}
+
+
+def upgrade():
+    if 'reminder_sent_at' not in _columns():
+        with op.batch_alter_table('appointment') as batch_op:
+            batch_op.add_column(sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    if 'reminder_sent_at' in _columns():
+        with op.batch_alter_table('appointment') as batch_op:
+            batch_op.drop_column('reminder_sent_at')
@@ -0,0 +1,129 @@
+"""availability slot table
+
+Move Doctor.availability (a JSON blob of {"date": ["HH:MM", ...]}) into
+availability_slot rows, seed booked_count from existing Booked appointments,
+then drop the old column. Downgrade rebuilds the JSON from the slots.
+
+Revision ID: 6dfdc5b9becf
+Revises: 79999443d245
+Create Date: 2026-10-18 10:07:48.774575
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+
+# revision identifiers, used by Alembic.
+revision = '6dfdc5b9becf'
+down_revision = '79999443d245'
+branch_labels = None
+depends_on = None
+
+
+SLOT_LENGTH = timedelta(hours=1)
+
+doctor_table = sa.table(
+    'doctor',
+    sa.column('id', sa.Integer),
+    sa.column('availability', sa.Text)
+)
+slot_table = sa.table(
+    'availability_slot',
+    sa.column('doctor_id', sa.Integer),
+    sa.column('start', sa.DateTime),
+    sa.column('end', sa.DateTime),
+    sa.column('capacity', sa.Integer),
+    sa.column('booked_count', sa.Integer)
+)
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _doctor_columns():
+    return {col['name'] for col in sa.inspect(op.get_bind()).get_columns('doctor')}
+
+
+def upgrade():
+    # The table may already exist where db.create_all() ran against the new models
+    if 'availability_slot' not in _tables():
+        op.create_table(
+            'availability_slot',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('start', sa.DateTime(), nullable=False),
+            sa.Column('end', sa.DateTime(), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('booked_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctor.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('doctor_id', 'start', name='uq_availability_slot_doctor_start')
+        )
+    indexes = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('availability_slot')}
+    if 'ix_availability_slot_start_doctor' not in indexes:
+        op.create_index('ix_availability_slot_start_doctor', 'availability_slot', ['start', 'doctor_id'])
+    if 'availability' not in _doctor_columns():
+        return
+
+    bind = op.get_bind()
+    existing = set(bind.execute(sa.select(slot_table.c.doctor_id, slot_table.c.start)).tuples())
+    rows = []
+    for doctor_id, availability in bind.execute(sa.select(doctor_table.c.id, doctor_table.c.availability)):
+        if not availability:
+            continue
+        try:
+            data = json.loads(availability)
+        except ValueError:
+            print(f"[MIGRATION] Skipping unparseable availability for doctor {doctor_id}")
+            continue
+        starts = set()
+        for day, times in (data or {}).items():
+            for t in times or []:
+                try:
+                    # Truncated to the minute, as availability.parse_availability does
+                    starts.add(datetime.fromisoformat(f"{day}T{t}").replace(second=0, microsecond=0))
+                except (TypeError, ValueError):
+                    print(f"[MIGRATION] Skipping slot {day} {t!r} for doctor {doctor_id}")
+        rows.extend(
+            {'doctor_id': doctor_id, 'start': start, 'end': start + SLOT_LENGTH,
+             'capacity': 1, 'booked_count': 0}
+            for start in sorted(starts) if (doctor_id, start) not in existing
+        )
+    if rows:
+        op.bulk_insert(slot_table, rows)
+
+    op.execute("""
+        UPDATE availability_slot SET booked_count = (
+            SELECT COUNT(*) FROM appointment
+            WHERE appointment.doctor_id = availability_slot.doctor_id
+              AND appointment.date_time = availability_slot.start
+              AND appointment.status = 'Booked'
+        )
+    """)
+
+    with op.batch_alter_table('doctor') as batch_op:
+        batch_op.drop_column('availability')
+
+
+def downgrade():
+    if 'availability' not in _doctor_columns():
+        with op.batch_alter_table('doctor') as batch_op:
+            batch_op.add_column(sa.Column('availability', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    by_doctor = defaultdict(dict)
+    for doctor_id, start in bind.execute(
+        sa.select(slot_table.c.doctor_id, slot_table.c.start).order_by(slot_table.c.start)
+    ):
+        by_doctor[doctor_id].setdefault(start.date().isoformat(), []).append(start.strftime('%H:%M'))
+    for doctor_id, data in by_doctor.items():
+        bind.execute(
+            doctor_table.update().where(doctor_table.c.id == doctor_id).values(availability=json.dumps(data))
+        )
+
+    op.drop_index('ix_availability_slot_start_doctor', table_name='availability_slot')
+    op.drop_table('availability_slot')
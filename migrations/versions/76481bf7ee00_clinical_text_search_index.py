@@ -0,0 +1,78 @@
+"""clinical text search index
+
+FTS5 external-content index over appointment diagnosis / prescription /
+notes, its sync triggers, and a backfill of the rows that have any text.
+SQLite only; the Postgres index is added in 3c8e51f0a9d2.
+
+Revision ID: 76481bf7ee00
+Revises: de0ace681a7a
+Create Date: 2026-10-18 10:56:09.583257
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '76481bf7ee00'
+down_revision = 'de0ace681a7a'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of models.SEARCH_DDL['appointment'] at this revision
+FTS_TABLE = """CREATE VIRTUAL TABLE appointment_fts USING fts5(
+    diagnosis, prescription, notes, content='appointment', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+)"""
+
+BACKFILL = """INSERT INTO appointment_fts(rowid, diagnosis, prescription, notes)
+SELECT id, diagnosis, prescription, notes FROM appointment
+WHERE COALESCE(diagnosis, prescription, notes) IS NOT NULL"""
+
+TRIGGERS = {
+    'appointment_fts_insert': """CREATE TRIGGER appointment_fts_insert AFTER INSERT ON appointment
+    WHEN COALESCE(NEW.diagnosis, NEW.prescription, NEW.notes) IS NOT NULL BEGIN
+        INSERT INTO appointment_fts(rowid, diagnosis, prescription, notes)
+        VALUES (NEW.id, NEW.diagnosis, NEW.prescription, NEW.notes);
+    END""",
+    'appointment_fts_update': """CREATE TRIGGER appointment_fts_update AFTER UPDATE OF diagnosis, prescription, notes ON appointment BEGIN
+        INSERT INTO appointment_fts(appointment_fts, rowid, diagnosis, prescription, notes)
+        SELECT 'delete', OLD.id, OLD.diagnosis, OLD.prescription, OLD.notes
+        WHERE COALESCE(OLD.diagnosis, OLD.prescription, OLD.notes) IS NOT NULL;
+        INSERT INTO appointment_fts(rowid, diagnosis, prescription, notes)
+        SELECT NEW.id, NEW.diagnosis, NEW.prescription, NEW.notes
+        WHERE COALESCE(NEW.diagnosis, NEW.prescription, NEW.notes) IS NOT NULL;
+    END""",
+    'appointment_fts_delete': """CREATE TRIGGER appointment_fts_delete AFTER DELETE ON appointment
+    WHEN COALESCE(OLD.diagnosis, OLD.prescription, OLD.notes) IS NOT NULL BEGIN
+        INSERT INTO appointment_fts(appointment_fts, rowid, diagnosis, prescription, notes)
+        VALUES ('delete', OLD.id, OLD.diagnosis, OLD.prescription, OLD.notes);
+    END""",
+}
+
+
+def _sqlite_objects(kind):
+    return {row[0] for row in op.get_bind().execute(
+        sa.text("SELECT name FROM sqlite_master WHERE type = :kind"), {'kind': kind}
+    )}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    if 'appointment_fts' not in _sqlite_objects('table'):
+        op.execute(FTS_TABLE)
+        op.execute(BACKFILL)
+    triggers = _sqlite_objects('trigger')
+    for name, ddl in TRIGGERS.items():
+        if name not in triggers:
+            op.execute(ddl)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS appointment_fts")
@@ -0,0 +1,43 @@
+"""unique booked slot per doctor
+
+Partial unique index so a doctor slot can hold at most one Booked appointment.
+Slots that were already double-booked keep their earliest booking; the later
+duplicates are marked Cancelled so the index can be built.
+
+Revision ID: 79999443d245
+Revises: 24d805daf7db
+Create Date: 2026-10-18 10:06:10.069918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '79999443d245'
+down_revision = '24d805daf7db'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE appointment SET status = 'Cancelled'
+        WHERE status = 'Booked' AND id NOT IN (
+            SELECT MIN(id) FROM appointment
+            WHERE status = 'Booked'
+            GROUP BY doctor_id, date_time
+        )
+    """)
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('appointment')}
+    if 'ix_appointment_doctor_slot_booked' not in existing:
+        op.create_index(
+            'ix_appointment_doctor_slot_booked', 'appointment', ['doctor_id', 'date_time'],
+            unique=True,
+            sqlite_where=sa.text("status = 'Booked'"),
+            postgresql_where=sa.text("status = 'Booked'")
+        )
+
+
+def downgrade():
+    op.drop_index('ix_appointment_doctor_slot_booked', table_name='appointment')
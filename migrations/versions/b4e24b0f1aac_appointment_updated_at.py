@@ -0,0 +1,54 @@
+"""appointment updated at
+
+Appointment.updated_at drives incremental admin exports (?since=). Existing
+rows are stamped with the migration time so the first incremental pull
+picks them all up.
+
+Revision ID: b4e24b0f1aac
+Revises: 4a71502df2c5
+Create Date: 2026-10-18 10:17:43.028246
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e24b0f1aac'
+down_revision = '4a71502df2c5'
+branch_labels = None
+depends_on = None
+
+
+appointment_table = sa.table(
+    'appointment',
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def _columns():
+    return {col['name'] for col in sa.inspect(op.get_bind()).get_columns('appointment')}
+
+
+def _existing_indexes():
+    return {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('appointment')}
+
+
+def upgrade():
+    if 'updated_at' not in _columns():
+        with op.batch_alter_table('appointment') as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(appointment_table.update().values(updated_at=datetime.now()))
+        with op.batch_alter_table('appointment') as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+    if 'ix_appointment_updated_id' not in _existing_indexes():
+        op.create_index('ix_appointment_updated_id', 'appointment', ['updated_at', 'id'])
+
+
+def downgrade():
+    if 'ix_appointment_updated_id' in _existing_indexes():
+        op.drop_index('ix_appointment_updated_id', table_name='appointment')
+    if 'updated_at' in _columns():
+        with op.batch_alter_table('appointment') as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,111 @@
+"""directory search index
+
+SQLite: FTS5 trigram tables for the doctor and patient directories, the
+triggers that keep them in sync, and a backfill from the existing rows.
+Postgres: pg_trgm GIN indexes on the searched columns.
+
+Revision ID: de0ace681a7a
+Revises: b4e24b0f1aac
+Create Date: 2026-10-18 10:47:52.389364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'de0ace681a7a'
+down_revision = 'b4e24b0f1aac'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of models.SEARCH_DDL at this revision
+FTS_TABLES = {
+    'doctor_fts': "CREATE VIRTUAL TABLE doctor_fts USING fts5(username, email, specialization, tokenize='trigram')",
+    'patient_fts': "CREATE VIRTUAL TABLE patient_fts USING fts5(username, email, tokenize='trigram')",
+}
+
+BACKFILL = {
+    'doctor_fts': """INSERT INTO doctor_fts(rowid, username, email, specialization)
+    SELECT d.id, u.username, u.email, d.specialization FROM doctor d JOIN user u ON u.id = d.user_id""",
+    'patient_fts': """INSERT INTO patient_fts(rowid, username, email)
+    SELECT p.id, u.username, u.email FROM patient p JOIN user u ON u.id = p.user_id""",
+}
+
+TRIGGERS = {
+    'doctor_fts_insert': """CREATE TRIGGER doctor_fts_insert AFTER INSERT ON doctor BEGIN
+        INSERT INTO doctor_fts(rowid, username, email, specialization)
+        SELECT NEW.id, username, email, NEW.specialization FROM user WHERE id = NEW.user_id;
+    END""",
+    'doctor_fts_update': """CREATE TRIGGER doctor_fts_update AFTER UPDATE OF user_id, specialization ON doctor BEGIN
+        DELETE FROM doctor_fts WHERE rowid = OLD.id;
+        INSERT INTO doctor_fts(rowid, username, email, specialization)
+        SELECT NEW.id, username, email, NEW.specialization FROM user WHERE id = NEW.user_id;
+    END""",
+    'doctor_fts_delete': """CREATE TRIGGER doctor_fts_delete AFTER DELETE ON doctor BEGIN
+        DELETE FROM doctor_fts WHERE rowid = OLD.id;
+    END""",
+    'user_doctor_fts_update': """CREATE TRIGGER user_doctor_fts_update AFTER UPDATE OF username, email ON user BEGIN
+        UPDATE doctor_fts SET username = NEW.username, email = NEW.email
+        WHERE rowid IN (SELECT id FROM doctor WHERE user_id = NEW.id);
+    END""",
+    'patient_fts_insert': """CREATE TRIGGER patient_fts_insert AFTER INSERT ON patient BEGIN
+        INSERT INTO patient_fts(rowid, username, email)
+        SELECT NEW.id, username, email FROM user WHERE id = NEW.user_id;
+    END""",
+    'patient_fts_update': """CREATE TRIGGER patient_fts_update AFTER UPDATE OF user_id ON patient BEGIN
+        DELETE FROM patient_fts WHERE rowid = OLD.id;
+        INSERT INTO patient_fts(rowid, username, email)
+        SELECT NEW.id, username, email FROM user WHERE id = NEW.user_id;
+    END""",
+    'patient_fts_delete': """CREATE TRIGGER patient_fts_delete AFTER DELETE ON patient BEGIN
+        DELETE FROM patient_fts WHERE rowid = OLD.id;
+    END""",
+    'user_patient_fts_update': """CREATE TRIGGER user_patient_fts_update AFTER UPDATE OF username, email ON user BEGIN
+        UPDATE patient_fts SET username = NEW.username, email = NEW.email
+        WHERE rowid IN (SELECT id FROM patient WHERE user_id = NEW.id);
+    END""",
+}
+
+TRGM_INDEXES = [
+    ('ix_user_username_trgm', 'user', 'username'),
+    ('ix_user_email_trgm', 'user', 'email'),
+    ('ix_doctor_specialization_trgm', 'doctor', 'specialization'),
+]
+
+
+def _sqlite_objects(kind):
+    return {row[0] for row in op.get_bind().execute(
+        sa.text("SELECT name FROM sqlite_master WHERE type = :kind"), {'kind': kind}
+    )}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        tables = _sqlite_objects('table')
+        for name, ddl in FTS_TABLES.items():
+            if name not in tables:
+                op.execute(ddl)
+                op.execute(BACKFILL[name])
+        triggers = _sqlite_objects('trigger')
+        for name, ddl in TRIGGERS.items():
+            if name not in triggers:
+                op.execute(ddl)
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table, column in TRGM_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" USING gin ({column} gin_trgm_ops)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for name in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name in FTS_TABLES:
+            op.execute(f"DROP TABLE IF EXISTS {name}")
+    elif dialect == 'postgresql':
+        for name, _, _ in TRGM_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
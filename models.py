@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -16,16 +17,31 @@ class User(db.Model):
 
 class Doctor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     specialization = db.Column(db.String(100), nullable=False)
-    availability = db.Column(db.Text, nullable=True) # JSON string for availability
     is_approved = db.Column(db.Boolean, default=True)
     
     appointments = db.relationship('Appointment', backref='doctor', lazy=True)
+    slots = db.relationship('AvailabilitySlot', backref='doctor', lazy=True, cascade="all, delete-orphan")
+
+# A bookable slot a doctor has declared (replaces the old Doctor.availability JSON)
+class AvailabilitySlot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
+    start = db.Column(db.DateTime, nullable=False)
+    end = db.Column(db.DateTime, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False, default=1)
+    booked_count = db.Column(db.Integer, nullable=False, default=0) # Booked appointments in this slot
+    
+    __table_args__ = (
+        db.UniqueConstraint('doctor_id', 'start', name='uq_availability_slot_doctor_start'),
+        # Cross-doctor free-slot search: range scan on start
+        db.Index('ix_availability_slot_start_doctor', 'start', 'doctor_id'),
+    )
 
 class Patient(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     address = db.Column(db.Text, nullable=True)
     
     appointments = db.relationship('Appointment', backref='patient', lazy=True)
@@ -36,8 +52,108 @@ class Appointment(db.Model):
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
     date_time = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(20), default='Booked') # Booked, Completed, Cancelled
-    diagnosis = db.Column(db.Text, nullable=True)
-    prescription = db.Column(db.Text, nullable=True)
-    notes = db.Column(db.Text, nullable=True)
+    # Unbounded clinical text: deferred, so list queries don't load it (see queries.with_clinical)
+    diagnosis = db.deferred(db.Column(db.Text, nullable=True), group='clinical')
+    prescription = db.deferred(db.Column(db.Text, nullable=True), group='clinical')
+    notes = db.deferred(db.Column(db.Text, nullable=True), group='clinical')
+    reminder_sent_at = db.Column(db.DateTime, nullable=True) # Set once the day-before reminder is delivered
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        # Booking conflict checks and per-doctor listings
+        db.Index('ix_appointment_doctor_date_status', 'doctor_id', 'date_time', 'status'),
+        # Patient history / active-appointment checks
+        db.Index('ix_appointment_patient_status', 'patient_id', 'status'),
+        # Daily reminders and today's stats (status + time range)
+        db.Index('ix_appointment_status_date', 'status', 'date_time'),
+        # Admin log keyset pagination on (date_time, id)
+        db.Index('ix_appointment_date_id', 'date_time', 'id'),
+        # Incremental admin export (?since=) on (updated_at, id)
+        db.Index('ix_appointment_updated_id', 'updated_at', 'id'),
+        # At most one Booked appointment per doctor slot (see booking.py)
+        db.Index(
+            'ix_appointment_doctor_slot_booked', 'doctor_id', 'date_time', unique=True,
+            sqlite_where=db.text("status = 'Booked'"),
+            postgresql_where=db.text("status = 'Booked'")
+        ),
+    )
+
 
+# --- Search indexes (SQLite) ---
+#
+# FTS5 trigram tables keyed by the doctor / patient id (rowid), kept in sync
+# by triggers so every writer (ORM, bulk import, sample data) updates them.
+# Postgres uses pg_trgm indexes on the base columns instead (see search.py).
+# Clinical text is an external-content table over appointment (the text is
+# stored once, in appointment); only rows with some text are indexed. On
+# Postgres it is a GIN tsvector expression index (migration 3c8e51f0a9d2).
+SEARCH_DDL = {
+    'doctor': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS doctor_fts USING fts5(username, email, specialization, tokenize='trigram')",
+        """CREATE TRIGGER IF NOT EXISTS doctor_fts_insert AFTER INSERT ON doctor BEGIN
+            INSERT INTO doctor_fts(rowid, username, email, specialization)
+            SELECT NEW.id, username, email, NEW.specialization FROM user WHERE id = NEW.user_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS doctor_fts_update AFTER UPDATE OF user_id, specialization ON doctor BEGIN
+            DELETE FROM doctor_fts WHERE rowid = OLD.id;
+            INSERT INTO doctor_fts(rowid, username, email, specialization)
+            SELECT NEW.id, username, email, NEW.specialization FROM user WHERE id = NEW.user_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS doctor_fts_delete AFTER DELETE ON doctor BEGIN
+            DELETE FROM doctor_fts WHERE rowid = OLD.id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS user_doctor_fts_update AFTER UPDATE OF username, email ON user BEGIN
+            UPDATE doctor_fts SET username = NEW.username, email = NEW.email
+            WHERE rowid IN (SELECT id FROM doctor WHERE user_id = NEW.id);
+        END""",
+    ],
+    'patient': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS patient_fts USING fts5(username, email, tokenize='trigram')",
+        """CREATE TRIGGER IF NOT EXISTS patient_fts_insert AFTER INSERT ON patient BEGIN
+            INSERT INTO patient_fts(rowid, username, email)
+            SELECT NEW.id, username, email FROM user WHERE id = NEW.user_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS patient_fts_update AFTER UPDATE OF user_id ON patient BEGIN
+            DELETE FROM patient_fts WHERE rowid = OLD.id;
+            INSERT INTO patient_fts(rowid, username, email)
+            SELECT NEW.id, username, email FROM user WHERE id = NEW.user_id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS patient_fts_delete AFTER DELETE ON patient BEGIN
+            DELETE FROM patient_fts WHERE rowid = OLD.id;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS user_patient_fts_update AFTER UPDATE OF username, email ON user BEGIN
+            UPDATE patient_fts SET username = NEW.username, email = NEW.email
+            WHERE rowid IN (SELECT id FROM patient WHERE user_id = NEW.id);
+        END""",
+    ],
+    'appointment': [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS appointment_fts USING fts5(
+            diagnosis, prescription, notes, content='appointment', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS appointment_fts_insert AFTER INSERT ON appointment
+        WHEN COALESCE(NEW.diagnosis, NEW.prescription, NEW.notes) IS NOT NULL BEGIN
+            INSERT INTO appointment_fts(rowid, diagnosis, prescription, notes)
+            VALUES (NEW.id, NEW.diagnosis, NEW.prescription, NEW.notes);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS appointment_fts_update AFTER UPDATE OF diagnosis, prescription, notes ON appointment BEGIN
+            INSERT INTO appointment_fts(appointment_fts, rowid, diagnosis, prescription, notes)
+            SELECT 'delete', OLD.id, OLD.diagnosis, OLD.prescription, OLD.notes
+            WHERE COALESCE(OLD.diagnosis, OLD.prescription, OLD.notes) IS NOT NULL;
+            INSERT INTO appointment_fts(rowid, diagnosis, prescription, notes)
+            SELECT NEW.id, NEW.diagnosis, NEW.prescription, NEW.notes
+            WHERE COALESCE(NEW.diagnosis, NEW.prescription, NEW.notes) IS NOT NULL;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS appointment_fts_delete AFTER DELETE ON appointment
+        WHEN COALESCE(OLD.diagnosis, OLD.prescription, OLD.notes) IS NOT NULL BEGIN
+            INSERT INTO appointment_fts(appointment_fts, rowid, diagnosis, prescription, notes)
+            VALUES ('delete', OLD.id, OLD.diagnosis, OLD.prescription, OLD.notes);
+        END""",
+    ],
+}
 
+for _model in (Doctor, Patient, Appointment):
+    _name = _model.__tablename__
+    for _statement in SEARCH_DDL[_name]:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(_model.__table__, 'before_drop', DDL(f"DROP TABLE IF EXISTS {_name}_fts").execute_if(dialect='sqlite'))
@@ -0,0 +1,75 @@
+"""
+Outbound notification backends.
+
+Callers build Message tuples and hand a whole batch to send_batch(), so a
+backend can reuse one connection per batch. The backend is chosen by the
+NOTIFIER_BACKEND config key: 'console' (default, prints), 'memory' (keeps
+messages in an outbox for tests) or 'smtp'.
+"""
+
+import smtplib
+from collections import namedtuple
+from email.message import EmailMessage
+
+Message = namedtuple('Message', ['key', 'to', 'subject', 'body'])
+
+
+class ConsoleNotifier:
+    """Prints each message; the development default"""
+
+    def send_batch(self, messages):
+        for msg in messages:
+            print(f"[NOTIFY] To {msg.to}: {msg.subject}\n{msg.body}")
+        return [msg.key for msg in messages]
+
+
+class MemoryNotifier:
+    """Collects messages in self.outbox instead of sending them"""
+
+    def __init__(self):
+        self.outbox = []
+
+    def send_batch(self, messages):
+        self.outbox.extend(messages)
+        return [msg.key for msg in messages]
+
+
+class SMTPNotifier:
+    """Sends each batch over a single SMTP connection"""
+
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send_batch(self, messages):
+        delivered = []
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            for msg in messages:
+                email = EmailMessage()
+                email['From'] = self.sender
+                email['To'] = msg.to
+                email['Subject'] = msg.subject
+                email.set_content(msg.body)
+                try:
+                    smtp.send_message(email)
+                except smtplib.SMTPRecipientsRefused as e:
+                    print(f"[NOTIFY] Rejected {msg.to}: {e}")
+                    continue
+                delivered.append(msg.key)
+        return delivered
+
+
+_memory = MemoryNotifier()
+
+
+def get_notifier(config):
+    """Build the backend named by config['NOTIFIER_BACKEND']"""
+    backend = config.get('NOTIFIER_BACKEND', 'console')
+    if backend == 'memory':
+        return _memory
+    if backend == 'smtp':
+        return SMTPNotifier(config['SMTP_HOST'], config['SMTP_PORT'], config['MAIL_SENDER'])
+    if backend == 'console':
+        return ConsoleNotifier()
+    raise ValueError(f"Unknown NOTIFIER_BACKEND {backend!r}")
@@ -0,0 +1,190 @@
+"""
+Password hashing and login throttling.
+
+Hashes use passlib with a configurable scheme (PASSWORD_SCHEME: pbkdf2_sha256,
+bcrypt or argon2) and cost (PASSWORD_ROUNDS). Hashes made with another
+scheme or a lower cost, including the original werkzeug hashes, still
+verify and are replaced by a current hash on the next successful login.
+
+Login verification runs in a bounded thread pool. An unknown username is
+verified against a dummy hash, so it takes as long as a wrong password and
+response times don't reveal which usernames exist. When the pool and its
+short queue are full, logins are refused with a 503 instead of piling up
+on the CPU. Repeated failures per username and per client IP are counted
+in the shared cache, and once over the limit a login is refused before any
+hashing is done.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from passlib.context import CryptContext
+from werkzeug.security import check_password_hash
+from caching import cache_delete, cache_get, cache_set
+from models import db
+
+PASSWORD_SCHEMES = ('pbkdf2_sha256', 'bcrypt', 'argon2')
+# Cost when PASSWORD_ROUNDS is unset; passlib's own pbkdf2 default (29000) is well below current guidance
+DEFAULT_ROUNDS = {'pbkdf2_sha256': 600000, 'bcrypt': 12}
+
+_context = None
+_pool = None
+_slots = None
+_dummy_hash = None
+
+
+class LoginThrottled(Exception):
+    def __init__(self, msg, status=429, retry_after=60):
+        self.msg = msg
+        self.status = status
+        self.retry_after = retry_after
+
+
+def configure(scheme='pbkdf2_sha256', rounds=None, threads=None, queue=None):
+    """Build the hashing context and the verification pool"""
+    global _context, _pool, _slots, _dummy_hash
+    if scheme not in PASSWORD_SCHEMES:
+        raise ValueError(f"PASSWORD_SCHEME must be one of {', '.join(PASSWORD_SCHEMES)}")
+    schemes = [scheme] + [s for s in PASSWORD_SCHEMES if s != scheme and _has_backend(s)]
+    if not _has_backend(scheme):
+        raise RuntimeError(f"PASSWORD_SCHEME={scheme} needs its backend installed (argon2-cffi / bcrypt)")
+    settings = {}
+    rounds = rounds or DEFAULT_ROUNDS.get(scheme)
+    if rounds:
+        # min_rounds as well, so raising the cost upgrades older hashes on login
+        settings[f"{scheme}__rounds"] = settings[f"{scheme}__min_rounds"] = rounds
+    _context = CryptContext(schemes=schemes, default=scheme, deprecated='auto', **settings)
+    _dummy_hash = None
+
+    threads = threads or os.cpu_count() or 1
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+    _pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='password')
+    _slots = threading.BoundedSemaphore(threads + (queue if queue is not None else threads * 4))
+
+
+def init_app(app):
+    configure(
+        app.config['PASSWORD_SCHEME'],
+        app.config['PASSWORD_ROUNDS'],
+        app.config['PASSWORD_HASH_THREADS'],
+        app.config['LOGIN_QUEUE_LIMIT']
+    )
+
+
+def _has_backend(scheme):
+    from passlib import hash as handlers
+    handler = getattr(handlers, scheme)
+    # pbkdf2_sha256 is pure hashlib; bcrypt / argon2 need their C packages
+    return handler.has_backend() if hasattr(handler, 'has_backend') else True
+
+
+def _get_context():
+    if _context is None:
+        from config import Config
+        configure(Config.PASSWORD_SCHEME, Config.PASSWORD_ROUNDS, Config.PASSWORD_HASH_THREADS, Config.LOGIN_QUEUE_LIMIT)
+    return _context
+
+
+def hash_password(password):
+    return _get_context().hash(password)
+
+
+def is_password_hash(value):
+    """Whether value is a hash verify_password can check: one of the passlib schemes, or werkzeug's format"""
+    context = _get_context()
+    scheme = context.identify(value, required=False)
+    if scheme is not None:
+        try:
+            context.handler(scheme).from_string(value)
+        except ValueError:
+            return False
+        return True
+    # werkzeug: scrypt[:n:r:p]$salt$hash or pbkdf2[:hash_name[:iterations]]$salt$hash
+    parts = value.split('$', 2)
+    if len(parts) != 3 or not all(parts):
+        return False
+    method, *args = parts[0].split(':')
+    if method == 'scrypt':
+        return not args or (len(args) == 3 and all(a.isdigit() for a in args))
+    if method == 'pbkdf2':
+        return len(args) <= 2 and (not args or args[0] in hashlib.algorithms_available) and (
+            len(args) < 2 or args[1].isdigit())
+    return False
+
+
+def _get_dummy_hash():
+    """A hash of a random password with the current scheme and cost"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(os.urandom(16).hex())
+    return _dummy_hash
+
+
+def verify_password(stored, password):
+    """(matches, replacement hash or None); a replacement means the stored hash is outdated"""
+    if not stored or password is None:
+        return False, None
+    context = _get_context()
+    if context.identify(stored, required=False) is None:
+        # werkzeug format (scrypt:... / pbkdf2:...) from before passlib
+        if check_password_hash(stored, password):
+            return True, context.hash(password)
+        return False, None
+    return context.verify_and_update(password, stored)
+
+
+def verify_user(user, password):
+    """
+    Check a login password off the request thread; upgrades the stored hash
+    on success. A None user (unknown username) is checked against the dummy
+    hash and always fails.
+    """
+    _get_context()
+    stored = user.password if user is not None else _get_dummy_hash()
+    if not _slots.acquire(blocking=False):
+        raise LoginThrottled("Too many logins in progress, please retry", status=503, retry_after=1)
+    try:
+        ok, new_hash = _pool.submit(verify_password, stored, password).result()
+    finally:
+        _slots.release()
+    if user is None:
+        return False
+    if ok and new_hash:
+        user.password = new_hash
+        db.session.commit()
+    return ok
+
+
+# --- Failed-attempt limiter ---
+
+def _failure_keys(username, ip):
+    window = current_app.config['LOGIN_FAILURE_WINDOW']
+    bucket = int(time.time() // window)
+    return [
+        (f"login_fail:user:{username}:{bucket}", current_app.config['LOGIN_MAX_FAILURES']),
+        (f"login_fail:ip:{ip}:{bucket}", current_app.config['LOGIN_MAX_FAILURES_PER_IP']),
+    ]
+
+
+def check_login_allowed(username, ip):
+    """Raise LoginThrottled while the username or IP is over its failure limit"""
+    window = current_app.config['LOGIN_FAILURE_WINDOW']
+    for key, limit in _failure_keys(username, ip):
+        if (cache_get(key) or 0) >= limit:
+            raise LoginThrottled("Too many failed login attempts, please try again later",
+                                 retry_after=window - int(time.time()) % window)
+
+
+def record_failure(username, ip):
+    # get + set rather than an atomic increment: the limit is approximate under races
+    for key, _ in _failure_keys(username, ip):
+        cache_set(key, (cache_get(key) or 0) + 1, timeout=current_app.config['LOGIN_FAILURE_WINDOW'])
+
+
+def clear_failures(username, ip):
+    """A successful login resets the username's count (the IP keeps its own)"""
+    cache_delete(_failure_keys(username, ip)[0][0])
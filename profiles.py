@@ -0,0 +1,94 @@
+"""
+The calling doctor's / patient's profile id, without a query per request.
+
+Login puts the profile id in the token (profile_id claim). Resolved ids are
+kept in a small per-process LRU and in the shared cache, so the hot routes
+skip the Doctor/Patient lookup entirely. Both are keyed by the 'profiles'
+generation token (as cached_value keys are): deleting a profile or changing
+a doctor's approval bumps the token, so every process re-checks on its next
+request and the change applies immediately, and a lookup that raced the
+change can only store its stale id under the old token.
+"""
+
+import threading
+from collections import OrderedDict
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from caching import bump_generation, cache_delete, cache_get, cache_set, generation
+from models import Doctor, Patient
+
+PROFILE_NAMESPACE = 'profiles'
+PROFILE_LRU_SIZE = 1024
+PROFILE_MODELS = {'doctor': Doctor, 'patient': Patient}
+
+_lru = OrderedDict()  # (role, user_id) -> (generation, profile id or None)
+_lock = threading.Lock()
+
+
+def _cache_key(role, user_id, gen):
+    return f"profile:{role}:{user_id}:{gen}"
+
+
+def usable_profile_id(role, profile):
+    """The id a token may act as: None for a missing profile or an unapproved doctor"""
+    if profile is None or (role == 'doctor' and not profile.is_approved):
+        return None
+    return profile.id
+
+
+def _load(role, user_id, claimed_id):
+    model = PROFILE_MODELS[role]
+    query = model.query.filter_by(user_id=user_id)
+    if claimed_id is not None:
+        # Primary-key lookup; the user_id check keeps a forged claim from switching profiles
+        query = query.filter_by(id=claimed_id)
+    return usable_profile_id(role, query.first())
+
+
+def remember_profile(role, user_id, profile_id, gen=None):
+    """Prime the shared cache, e.g. at login where the profile was just loaded"""
+    gen = gen or generation(PROFILE_NAMESPACE)
+    if gen is not None:
+        cache_set(_cache_key(role, user_id, gen), profile_id or 0)
+
+
+def current_profile(role):
+    """Profile id of the calling 'doctor' or 'patient', or None if it is gone / unapproved / another role"""
+    claims = get_jwt()
+    if claims.get('role') != role:
+        return None
+    user_id = get_jwt_identity()
+    gen = generation(PROFILE_NAMESPACE)
+    if gen is None:
+        # Cache backend unavailable, so there is nothing to validate an entry against
+        return _load(role, user_id, claims.get('profile_id'))
+
+    key = (role, user_id)
+    with _lock:
+        entry = _lru.get(key)
+        if entry and entry[0] == gen:
+            _lru.move_to_end(key)
+            return entry[1]
+
+    cached = cache_get(_cache_key(role, user_id, gen))
+    if cached is None:
+        profile_id = _load(role, user_id, claims.get('profile_id'))
+        remember_profile(role, user_id, profile_id, gen)
+    else:
+        profile_id = cached or None
+
+    with _lock:
+        _lru[key] = (gen, profile_id)
+        _lru.move_to_end(key)
+        while len(_lru) > PROFILE_LRU_SIZE:
+            _lru.popitem(last=False)
+    return profile_id
+
+
+def invalidate_profile(role, user_id):
+    """Call after deleting a profile or changing a doctor's approval"""
+    gen = generation(PROFILE_NAMESPACE)
+    if gen is not None:
+        cache_delete(_cache_key(role, str(user_id), gen))
+    with _lock:
+        _lru.pop((role, str(user_id)), None)
+    bump_generation(PROFILE_NAMESPACE)
@@ -0,0 +1,146 @@
+"""
+Shared query builders for the listing endpoints.
+
+Every listing route serializes the doctor's / patient's username next to each
+row, so these builders eager-load the related Doctor/Patient/User rows up front
+instead of letting each row fire its own lazy SELECTs. Appointment clinical
+text is deferred; routes that return it ask for it with with_clinical().
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload, undefer
+from models import db, User, Doctor, Patient, Appointment
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+CLINICAL_COLUMNS = ('diagnosis', 'prescription', 'notes')
+
+
+def appointment_query():
+    """Appointment query with doctor, patient and both users joined in"""
+    return Appointment.query.options(
+        joinedload(Appointment.doctor).joinedload(Doctor.user),
+        joinedload(Appointment.patient).joinedload(Patient.user)
+    )
+
+
+def with_clinical(*names):
+    """Loader options for the named clinical text columns (default: diagnosis, prescription and notes)"""
+    return [undefer(getattr(Appointment, name)) for name in names or CLINICAL_COLUMNS]
+
+
+def doctor_query():
+    """Doctor query with the owning user joined in"""
+    return Doctor.query.options(joinedload(Doctor.user))
+
+
+def patient_query():
+    """Patient query with the owning user joined in"""
+    return Patient.query.options(joinedload(Patient.user))
+
+
+def dashboard_stats(day):
+    """
+    Admin dashboard counters in a single round-trip. Each counter is a scalar
+    subquery so it can be answered from an index range (status/date_time)
+    rather than one CASE-per-row pass over the whole appointments table.
+    """
+    day_start = datetime.combine(day, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
+
+    def count(model, *criteria):
+        return db.select(db.func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+    row = db.session.execute(db.select(
+        count(Doctor),
+        count(Patient),
+        count(Appointment),
+        count(Appointment, Appointment.date_time >= day_start, Appointment.date_time < day_end),
+        count(Appointment, Appointment.status == 'Completed')
+    )).one()
+    return {
+        'total_doctors': row[0],
+        'total_patients': row[1],
+        'total_appointments': row[2],
+        'today_appointments': row[3],
+        'completed_appointments': row[4]
+    }
+
+
+def doctor_patient_summary(doctor_id, now):
+    """
+    One row per patient seen by a doctor, aggregated in a single GROUP BY:
+    id, username, email, total_appointments, last_visit (latest Completed)
+    and next_booked (earliest upcoming Booked).
+    """
+    last_visit = db.func.max(db.case(
+        (Appointment.status == 'Completed', Appointment.date_time)
+    ))
+    next_booked = db.func.min(db.case(
+        ((Appointment.status == 'Booked') & (Appointment.date_time >= now), Appointment.date_time)
+    ))
+    return (
+        db.select(
+            Patient.id,
+            User.username,
+            User.email,
+            db.func.count(Appointment.id).label('total_appointments'),
+            last_visit.label('last_visit'),
+            next_booked.label('next_booked')
+        )
+        .join(Patient, Patient.id == Appointment.patient_id)
+        .join(User, User.id == Patient.user_id)
+        .where(Appointment.doctor_id == doctor_id)
+        .group_by(Patient.id, User.id)
+    )
+
+
+# --- Keyset pagination ---
+
+def encode_cursor(*values):
+    """Pack the sort key of the last row on a page into an opaque token"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, *types):
+    """
+    Unpack a token from encode_cursor into one value per type in types
+    (e.g. str, int for a (date_time, id) key); raises ValueError if it is
+    malformed or the values don't match.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    # bool is an int subclass, but never a valid key
+    if any(type(v) is bool or not isinstance(v, t) for v, t in zip(values, types)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def page_size(value):
+    """Clamp a requested page size to [1, MAX_PAGE_SIZE]"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, limit, cursor_for):
+    """
+    Fetch one page of an already ordered/filtered query.
+    cursor_for(row) returns the sort-key tuple used to build the next cursor.
+    Returns (rows, next_cursor) where next_cursor is None on the last page.
+    """
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(*cursor_for(rows[-1]))
+    return rows, None
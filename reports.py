@@ -0,0 +1,85 @@
+"""
+Monthly doctor activity reports.
+
+All reports for a month come out of one scan of that month's appointments,
+ordered by doctor. Only one doctor's rows are held at a time (the summary is
+printed above the detail table), and each report is rendered through the
+compiled Jinja template straight into that doctor's file.
+"""
+
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from flask import current_app
+from models import db, User, Doctor, Patient, Appointment
+
+SCAN_BATCH = 1000
+
+
+def last_month(today=None):
+    """(first day, first day of the following month) for the month before today"""
+    today = today or date.today()
+    end = today.replace(day=1)
+    start = (end - timedelta(days=1)).replace(day=1)
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+
+def _month_rows(start, end, doctor_id=None):
+    """Flat (doctor_id, date_time, status, diagnosis, patient_name) rows in doctor order"""
+    query = db.session.query(
+        Appointment.doctor_id,
+        Appointment.date_time,
+        Appointment.status,
+        Appointment.diagnosis,
+        User.username.label('patient_name')
+    ).join(Patient, Patient.id == Appointment.patient_id).join(
+        User, User.id == Patient.user_id
+    ).filter(Appointment.date_time >= start, Appointment.date_time < end)
+    if doctor_id is not None:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    return query.order_by(Appointment.doctor_id, Appointment.date_time, Appointment.id).yield_per(SCAN_BATCH)
+
+
+def generate_monthly_reports(out_dir=None, today=None, doctor_id=None):
+    """
+    Write one HTML report per doctor for last month (or just doctor_id's).
+    Doctors with no appointments still get an empty report.
+    Returns the list of file paths written.
+    """
+    out_dir = out_dir or current_app.config['REPORT_DIR']
+    os.makedirs(out_dir, exist_ok=True)
+    template = current_app.jinja_env.get_template('monthly_report.html')
+    start, end = last_month(today)
+
+    doctors = db.session.query(Doctor.id, User.username).join(User, User.id == Doctor.user_id)
+    if doctor_id is not None:
+        doctors = doctors.filter(Doctor.id == doctor_id)
+    doctors = doctors.order_by(Doctor.id).all()
+
+    # Merge-join the doctor list with the appointment scan; both are ordered by doctor id
+    groups = groupby(_month_rows(start, end, doctor_id), key=lambda row: row.doctor_id)
+    pending = next(groups, None)
+
+    written = []
+    for doc_id, doctor_name in doctors:
+        while pending and pending[0] < doc_id:
+            pending = next(groups, None)
+        rows = []
+        if pending and pending[0] == doc_id:
+            rows = list(pending[1])
+            pending = next(groups, None)
+
+        statuses = Counter(row.status for row in rows)
+        summary = {
+            'total': len(rows),
+            'completed': statuses['Completed'],
+            'cancelled': statuses['Cancelled']
+        }
+        path = os.path.join(out_dir, f"monthly_report_doctor_{doc_id}_{start.strftime('%Y_%m')}.html")
+        with open(path, 'w') as f:
+            f.writelines(template.generate(
+                doctor_name=doctor_name, period=start, summary=summary, appointments=rows
+            ))
+        written.append(path)
+    return written
@@ -1,10 +1,22 @@
-from flask import Blueprint, render_template, jsonify, request
+import uuid
+import click
+from flask import Blueprint, Response, current_app, render_template, jsonify, request, send_file, stream_with_context
 from models import db, User, Doctor, Patient, Appointment
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy.orm import joinedload
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, date, timedelta
-import json
-from tasks import export_patient_history
+from tasks import export_patient_history, import_data
+from exports import EXPORT_FORMATS, STREAM_FORMATS, export_requested, find_export, mark_requested, parquet_available, stream_export
+from importer import IMPORT_ENTITIES, IMPORT_FORMATS, detect_format, import_records, import_status, save_upload
+import booking
+import events
+from booking import BookingError
+from availability import apply_availability, availability_json, free_slots
+from queries import DEFAULT_PAGE_SIZE, appointment_query, doctor_query, patient_query, keyset_page, decode_cursor, page_size, dashboard_stats, doctor_patient_summary, with_clinical
+from passwords import LoginThrottled, check_login_allowed, clear_failures, hash_password, record_failure, verify_user
+from profiles import current_profile, invalidate_profile, remember_profile, usable_profile_id
+from search import CLINICAL_FIELDS, SearchUnavailable, clinical_expression, clinical_page, search_page
+from caching import cache_get, cache_set, cache_delete, cache_stats, cached_value, cached_view, conditional_view, bump_generation
 from functools import wraps
 
 def admin_required(fn):
@@ -17,7 +29,182 @@ def admin_required(fn):
         return fn(*args, **kwargs)
     return wrapper
 
-bp = Blueprint('main', __name__)
+def parse_date_bound(value, end=False):
+    """
+    Parse a date/datetime query parameter for a half-open range filter.
+    A bare date used as an upper bound covers that whole day. A value with a
+    UTC offset is converted to naive local time, which is how appointment and
+    slot times are stored.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def stats_cache_key():
+    # Keyed by day so today_appointments rolls over at midnight
+    return f"admin_stats:{date.today().isoformat()}"
+
+def invalidate_stats():
+    """Drop the cached admin stats after any write that changes a counter"""
+    cache_delete(stats_cache_key())
+
+def availability_namespace(doctor_id):
+    return f"availability:{doctor_id}"
+
+def appointments_namespace(user_id):
+    return f"appointments:user:{user_id}"
+
+def appointment_namespaces(*criteria):
+    """Appointment-list namespaces of both parties of every appointment matching criteria"""
+    rows = db.session.execute(
+        db.select(Doctor.user_id, Patient.user_id).distinct()
+        .select_from(Appointment)
+        .join(Doctor, Doctor.id == Appointment.doctor_id)
+        .join(Patient, Patient.id == Appointment.patient_id)
+        .where(*criteria)
+    ).all()
+    return {appointments_namespace(user_id) for row in rows for user_id in row}
+
+def own_appointments(**kwargs):
+    """Change marker for the calling doctor's / patient's appointments"""
+    return appointments_namespace(get_jwt_identity())
+
+def clinical_appointments(**kwargs):
+    """Change marker for the appointments a clinical search covers (all of them for admins)"""
+    return 'appointments' if get_jwt().get('role') == 'admin' else own_appointments()
+
+def invalidate_after_import(report):
+    """Drop cached views that a bulk import may have changed"""
+    if not report.imported:
+        return
+    invalidate_stats()
+    if report.entity == 'appointments':
+        bump_generation('appointments', *(appointments_namespace(user_id) for user_id in report.user_ids))
+    else:
+        bump_generation(report.entity)
+
+def bump_appointment_versions(appt):
+    """Mark the appointment lists of both parties (and the admin log) as changed"""
+    bump_generation(
+        'appointments',
+        appointments_namespace(appt.doctor.user_id),
+        appointments_namespace(appt.patient.user_id)
+    )
+
+def appointment_changed(appt, kind):
+    """
+    After a committed write: mark both parties' appointment lists as changed
+    and push the change to their live streams, each shaped like a row of
+    their own list
+    """
+    # One query for everything below, instead of a lazy load per relationship
+    appt = appointment_query().options(*with_clinical('diagnosis', 'prescription')).filter_by(id=appt.id).one()
+    bump_appointment_versions(appt)
+    events.publish(appt.doctor.user_id, {"type": kind, "appointment": doctor_appointment_json(appt)})
+    events.publish(appt.patient.user_id, {"type": kind, "appointment": patient_appointment_json(appt)})
+
+BOOTSTRAP_SLOTS = 8  # next free slots shown on the patient dashboard
+
+# --- Response payloads ---
+# Shared by the individual views and the /api/bootstrap/<role> dashboards
+
+def admin_stats_payload():
+    key = stats_cache_key()
+    stats = cache_get(key)
+    if stats is None:
+        stats = dashboard_stats(date.today())
+        cache_set(key, stats)
+    return stats
+
+def admin_doctors_payload():
+    result = []
+    for d in doctor_query().all():
+        result.append({
+            "id": d.id,
+            "username": d.user.username,
+            "email": d.user.email,
+            "specialization": d.specialization,
+            "is_approved": d.is_approved
+        })
+    return result
+
+def doctor_appointment_json(a):
+    return {
+        "id": a.id,
+        "patient_name": a.patient.user.username,
+        "patient_id": a.patient.id,
+        "date_time": a.date_time.isoformat(),
+        "status": a.status,
+        "diagnosis": a.diagnosis,
+        "prescription": a.prescription
+    }
+
+def doctor_appointments_payload(doctor_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    One keyset page of a doctor's appointments, newest first, as
+    {"items", "next_cursor"}. Raises ValueError for a malformed cursor.
+    """
+    query = appointment_query().options(*with_clinical('diagnosis', 'prescription')).filter_by(doctor_id=doctor_id)
+    if cursor:
+        last_date_time, last_id = decode_cursor(cursor, str, int)
+        query = query.filter(
+            db.tuple_(Appointment.date_time, Appointment.id) < (datetime.fromisoformat(last_date_time), last_id)
+        )
+    query = query.order_by(Appointment.date_time.desc(), Appointment.id.desc())
+    appointments, next_cursor = keyset_page(query, limit, lambda a: (a.date_time.isoformat(), a.id))
+    return {"items": [doctor_appointment_json(a) for a in appointments], "next_cursor": next_cursor}
+
+def public_doctors_payload():
+    result = []
+    for d in doctor_query().filter_by(is_approved=True).all():
+        result.append({
+            "id": d.id,
+            "name": d.user.username,
+            "specialization": d.specialization
+        })
+    return result
+
+def specializations_payload():
+    specializations = db.session.query(Doctor.specialization).distinct().all()
+    return [s[0] for s in specializations if s[0]]
+
+def patient_appointment_json(a):
+    return {
+        "id": a.id,
+        "doctor_name": a.doctor.user.username,
+        "date_time": a.date_time.isoformat(),
+        "status": a.status
+    }
+
+def patient_appointments_payload(patient_id):
+    return [patient_appointment_json(a) for a in appointment_query().filter_by(patient_id=patient_id).all()]
+
+def patient_profile_payload(patient):
+    return {
+        'username': patient.user.username,
+        'email': patient.user.email,
+        'address': patient.address
+    }
+
+def free_slots_payload(**filters):
+    result = []
+    for slot in free_slots(**filters):
+        result.append({
+            "slot_id": slot.id,
+            "doctor_id": slot.doctor_id,
+            "doctor_name": slot.doctor.user.username,
+            "specialization": slot.doctor.specialization,
+            "start": slot.start.isoformat(),
+            "end": slot.end.isoformat()
+        })
+    return result
+
+bp = Blueprint('main', __name__, cli_group=None)
 
 @bp.route('/')
 def index():
@@ -28,10 +215,26 @@ def index():
 @bp.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
-    user = User.query.filter_by(username=data.get('username')).first()
-    if user and check_password_hash(user.password, data.get('password')):
-        access_token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
+    username = data.get('username')
+    try:
+        # Over-limit usernames / IPs are turned away before any hashing
+        check_login_allowed(username, request.remote_addr)
+        user = User.query.filter_by(username=username).first()
+        # Unknown usernames are hashed too, so timing doesn't tell them apart
+        ok = verify_user(user, data.get('password'))
+    except LoginThrottled as e:
+        return jsonify({"msg": e.msg}), e.status, {'Retry-After': str(e.retry_after)}
+    if ok:
+        clear_failures(username, request.remote_addr)
+        claims = {'role': user.role}
+        profile = getattr(user, f"{user.role}_profile", None)
+        if profile:
+            # Lets current_profile() skip the Doctor/Patient lookup on later requests
+            claims['profile_id'] = profile.id
+            remember_profile(user.role, str(user.id), usable_profile_id(user.role, profile))
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
         return jsonify(access_token=access_token, role=user.role, username=user.username), 200
+    record_failure(username, request.remote_addr)
     return jsonify({"msg": "Bad username or password"}), 401
 
 @bp.route('/api/register', methods=['POST'])
@@ -40,7 +243,7 @@ def register():
     if User.query.filter_by(username=data.get('username')).first():
         return jsonify({"msg": "Username already exists"}), 400
     
-    hashed_password = generate_password_hash(data.get('password'))
+    hashed_password = hash_password(data.get('password'))
     new_user = User(username=data.get('username'), email=data.get('email'), password=hashed_password, role='patient')
     db.session.add(new_user)
     db.session.commit()
@@ -49,6 +252,8 @@ def register():
     new_patient = Patient(user_id=new_user.id)
     db.session.add(new_patient)
     db.session.commit()
+    invalidate_stats()
+    bump_generation('patients')
     
     return jsonify({"msg": "User created successfully"}), 201
 
@@ -56,25 +261,11 @@ def register():
 @bp.route('/api/admin/stats', methods=['GET'])
 @admin_required
 def admin_stats():
-    
-    total_doctors = Doctor.query.count()
-    total_patients = Patient.query.count()
-    total_appointments = Appointment.query.count()
-    today_appointments = Appointment.query.filter(
-        db.func.date(Appointment.date_time) == date.today()
-    ).count()
-    completed_appointments = Appointment.query.filter_by(status='Completed').count()
-    
-    return jsonify({
-        'total_doctors': total_doctors,
-        'total_patients': total_patients,
-        'total_appointments': total_appointments,
-        'today_appointments': today_appointments,
-        'completed_appointments': completed_appointments
-    }), 200
+    return jsonify(admin_stats_payload()), 200
 
 @bp.route('/api/admin/doctors', methods=['GET', 'POST'])
 @admin_required
+@conditional_view('doctors')
 def manage_doctors():
         
     if request.method == 'POST':
@@ -82,7 +273,7 @@ def manage_doctors():
         if User.query.filter_by(username=data.get('username')).first():
              return jsonify({"msg": "Username already exists"}), 400
              
-        hashed_password = generate_password_hash(data.get('password'))
+        hashed_password = hash_password(data.get('password'))
         new_user = User(username=data.get('username'), email=data.get('email'), password=hashed_password, role='doctor')
         db.session.add(new_user)
         db.session.commit()
@@ -90,19 +281,11 @@ def manage_doctors():
         new_doctor = Doctor(user_id=new_user.id, specialization=data.get('specialization'))
         db.session.add(new_doctor)
         db.session.commit()
+        invalidate_stats()
+        bump_generation('doctors')
         return jsonify({"msg": "Doctor added"}), 201
-        
-    doctors = Doctor.query.all()
-    result = []
-    for d in doctors:
-        result.append({
-            "id": d.id,
-            "username": d.user.username,
-            "email": d.user.email,
-            "specialization": d.specialization,
-            "is_approved": d.is_approved
-        })
-    return jsonify(result), 200
+    
+    return jsonify(admin_doctors_payload()), 200
 
 @bp.route('/api/admin/doctor/<int:id>', methods=['DELETE'])
 @admin_required
@@ -115,17 +298,57 @@ def delete_doctor(id):
         return jsonify({"msg": f"Cannot delete doctor. They have {active_appts} active appointment(s). Please reassign or cancel them first."}), 400
         
     # Delete all past appointments (required due to Foreign Key constraints)
+    changed = appointment_namespaces(Appointment.doctor_id == doctor.id)
     Appointment.query.filter_by(doctor_id=doctor.id).delete()
     
     user = User.query.get(doctor.user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_profile('doctor', user.id)
+    invalidate_stats()
+    bump_generation('doctors', 'appointments', availability_namespace(id), *changed)
     return jsonify({"msg": "Doctor deleted successfully"}), 200
 
 @bp.route('/api/admin/appointments', methods=['GET'])
 @admin_required
+@conditional_view('appointments', 'doctors', 'patients')
 def admin_appointments():
-    appointments = Appointment.query.all()
+    """List appointments newest first, one keyset page at a time"""
+    limit = page_size(request.args.get('limit'))
+    query = appointment_query()
+    
+    # Server-side filters
+    status = request.args.get('status')
+    if status:
+        query = query.filter(Appointment.status == status)
+    doctor_id = request.args.get('doctor_id', type=int)
+    if doctor_id:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    
+    try:
+        date_from = parse_date_bound(request.args.get('date_from'))
+        date_to = parse_date_bound(request.args.get('date_to'), end=True)
+        cursor = request.args.get('cursor')
+        if cursor:
+            last_date_time, last_id = decode_cursor(cursor, str, int)
+            last_date_time = datetime.fromisoformat(last_date_time)
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor or date filter"}), 400
+    
+    if date_from:
+        query = query.filter(Appointment.date_time >= date_from)
+    if date_to:
+        query = query.filter(Appointment.date_time < date_to)
+    if cursor:
+        query = query.filter(
+            db.tuple_(Appointment.date_time, Appointment.id) < (last_date_time, last_id)
+        )
+    
+    query = query.order_by(Appointment.date_time.desc(), Appointment.id.desc())
+    appointments, next_cursor = keyset_page(
+        query, limit, lambda a: (a.date_time.isoformat(), a.id)
+    )
+    
     result = []
     for a in appointments:
         result.append({
@@ -135,20 +358,95 @@ def admin_appointments():
             "date_time": a.date_time.isoformat(),
             "status": a.status
         })
+    return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
+@bp.route('/api/admin/cache/stats', methods=['GET'])
+@admin_required
+def admin_cache_stats():
+    """Hit/miss counters of the public view cache for this worker process"""
+    result = {}
+    for (namespace, outcome), count in cache_stats.items():
+        result.setdefault(namespace, {'hit': 0, 'miss': 0})[outcome] = count
     return jsonify(result), 200
 
+@bp.route('/api/admin/export/<any(appointments, patients, doctors):entity>', methods=['GET'])
+@admin_required
+def admin_export(entity):
+    """Stream a whole table as NDJSON or CSV; appointments accept ?since= for incremental pulls (inserts and updates, not deletions)"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in STREAM_FORMATS:
+        return jsonify({"msg": "format must be 'ndjson' or 'csv'"}), 400
+    try:
+        since = parse_date_bound(request.args.get('since'))
+    except ValueError:
+        return jsonify({"msg": "Invalid since"}), 400
+    if since and entity != 'appointments':
+        return jsonify({"msg": "since is only supported for appointments"}), 400
+    
+    return Response(
+        stream_with_context(stream_export(entity, fmt, since)),
+        mimetype=STREAM_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={entity}.{fmt}"}
+    )
+
+@bp.route('/api/admin/import/<any(doctors, patients, appointments):entity>', methods=['POST'])
+@admin_required
+def admin_import(entity):
+    """Queue a bulk import of CSV/NDJSON (multipart 'file' or the raw request body); poll the returned task_id"""
+    upload = request.files.get('file')
+    fmt = detect_format(upload.filename if upload else None, request.args.get('format'))
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"msg": "format must be 'csv' or 'ndjson'"}), 400
+    
+    # The worker runs the import (and its password hashing), not this request
+    task_id = str(uuid.uuid4())
+    save_upload(upload.stream if upload else request.stream, task_id, fmt)
+    import_data.apply_async((entity, task_id, fmt), task_id=task_id)
+    return jsonify({"msg": "Import started", "task_id": task_id}), 202
+
+@bp.route('/api/admin/import/<uuid:task_id>', methods=['GET'])
+@admin_required
+def admin_import_status(task_id):
+    """Poll an import started by POST /api/admin/import/<entity>; the report is included once done"""
+    result = import_status(str(task_id))
+    if result is None:
+        return jsonify({"msg": "Import not found"}), 404
+    return jsonify(dict(result, task_id=str(task_id))), 200
+
+@bp.cli.command('import-data')
+@click.argument('entity', type=click.Choice(IMPORT_ENTITIES))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Defaults to the file extension')
+@click.option('--workers', type=int, help='Password hashing processes (default IMPORT_HASH_WORKERS, 0 = one per CPU)')
+def import_data_command(entity, path, fmt, workers):
+    """Bulk import doctors, patients or appointments from a CSV/NDJSON file"""
+    if workers is None:
+        workers = current_app.config['IMPORT_HASH_WORKERS']
+    started = datetime.now()
+    with open(path, encoding='utf-8', newline='') as f:
+        report = import_records(entity, f, detect_format(path, fmt), workers or None)
+    invalidate_after_import(report)
+    
+    elapsed = (datetime.now() - started).total_seconds()
+    click.echo(f"Imported {report.imported} {entity}, {report.failed} failed ({elapsed:.1f}s)")
+    for error in report.errors[:20]:
+        click.echo(f"  line {error['line']}: {'; '.join(error['errors'])}")
+    if report.failed > 20:
+        click.echo(f"  ... and {report.failed - 20} more")
+
 # Search endpoints
 @bp.route('/api/admin/search/doctors', methods=['GET'])
 @admin_required
+@conditional_view('doctors')
 def search_doctors_admin():
-    
-    query = request.args.get('q', '').lower()
-    specialization = request.args.get('specialization', '').lower()
-    
-    doctors = Doctor.query.join(User).filter(
-        (User.username.ilike(f'%{query}%')) |
-        (Doctor.specialization.ilike(f'%{specialization}%'))
-    ).all()
+    """Ranked doctor search by name, email or specialization (q), optionally within a specialization"""
+    try:
+        doctors, next_cursor, truncated = search_page(
+            'doctor', request.args.get('q'), request.args.get('cursor'),
+            page_size(request.args.get('limit')), request.args.get('specialization')
+        )
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor"}), 400
     
     result = []
     for d in doctors:
@@ -159,18 +457,20 @@ def search_doctors_admin():
             "specialization": d.specialization,
             "is_approved": d.is_approved
         })
-    return jsonify(result), 200
+    return jsonify({"items": result, "next_cursor": next_cursor, "truncated": truncated}), 200
 
 @bp.route('/api/admin/search/patients', methods=['GET'])
 @admin_required
+@conditional_view('patients')
 def search_patients():
-    
-    query = request.args.get('q', '').lower()
-    
-    patients = Patient.query.join(User).filter(
-        User.username.ilike(f'%{query}%') |
-        User.email.ilike(f'%{query}%')
-    ).all()
+    """Ranked patient search by name or email"""
+    try:
+        patients, next_cursor, truncated = search_page(
+            'patient', request.args.get('q'), request.args.get('cursor'),
+            page_size(request.args.get('limit'))
+        )
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor"}), 400
     
     result = []
     for p in patients:
@@ -180,62 +480,62 @@ def search_patients():
             "email": p.user.email,
             "address": p.address
         })
-    return jsonify(result), 200
+    return jsonify({"items": result, "next_cursor": next_cursor, "truncated": truncated}), 200
 
 # --- Doctor ---
 @bp.route('/api/doctor/appointments', methods=['GET'])
 @jwt_required()
+@conditional_view(own_appointments, 'patients')
 def doctor_appointments():
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    if not doctor:
+    """The doctor's appointments newest first, one keyset page at a time"""
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
         return jsonify({"msg": "Doctor profile not found"}), 404
-        
-    appointments = Appointment.query.filter_by(doctor_id=doctor.id).all()
-    result = []
-    for a in appointments:
-        result.append({
-            "id": a.id,
-            "patient_name": a.patient.user.username,
-            "patient_id": a.patient.id,
-            "date_time": a.date_time.isoformat(),
-            "status": a.status,
-            "diagnosis": a.diagnosis,
-            "prescription": a.prescription
-        })
-    return jsonify(result), 200
+    
+    try:
+        payload = doctor_appointments_payload(doctor_id, page_size(request.args.get('limit')), request.args.get('cursor'))
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor"}), 400
+    return jsonify(payload), 200
 
 @bp.route('/api/doctor/appointment/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_appointment(id):
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    appt = Appointment.query.filter_by(id=id, doctor_id=doctor.id).first_or_404()
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
+        return jsonify({"msg": "Doctor profile not found"}), 404
+    appt = Appointment.query.filter_by(id=id, doctor_id=doctor_id).first_or_404()
     
     data = request.get_json()
-    if 'status' in data:
-        appt.status = data['status']
     if 'diagnosis' in data:
         appt.diagnosis = data['diagnosis']
     if 'prescription' in data:
         appt.prescription = data['prescription']
     if 'notes' in data:
         appt.notes = data['notes']
-        
-    db.session.commit()
+    
+    # Re-opening an appointment can collide with a newer booking of the slot
+    try:
+        if 'status' in data:
+            booking.change_status(appt, data['status'])
+        booking.commit_slot()
+    except BookingError as e:
+        return jsonify({"msg": e.msg}), e.status
+    invalidate_stats()
+    appointment_changed(appt, 'updated')
     return jsonify({"msg": "Appointment updated"}), 200
 
 @bp.route('/api/doctor/patient/<int:patient_id>/history', methods=['GET'])
 @jwt_required()
+@conditional_view(own_appointments)
 def doctor_view_patient_history(patient_id):
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    if not doctor:
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
         return jsonify({"msg": "Doctor profile not found"}), 404
     
-    appointments = Appointment.query.filter_by(
+    appointments = Appointment.query.options(*with_clinical()).filter_by(
         patient_id=patient_id,
-        doctor_id=doctor.id,
+        doctor_id=doctor_id,
         status='Completed'
     ).all()
     
@@ -250,34 +550,67 @@ def doctor_view_patient_history(patient_id):
         })
     return jsonify(result), 200
 
+@bp.route('/api/clinical/search', methods=['GET'])
+@jwt_required()
+@conditional_view(clinical_appointments, 'doctors', 'patients')
+def search_clinical_text():
+    """Appointments whose diagnosis, prescription or notes match q; doctors see only their own"""
+    role = get_jwt().get('role')
+    doctor_id = None
+    if role == 'doctor':
+        doctor_id = current_profile('doctor')
+        if not doctor_id:
+            return jsonify({"msg": "Doctor profile not found"}), 404
+    elif role != 'admin':
+        return jsonify({"msg": "Doctors and admins only"}), 403
+    
+    q = request.args.get('q', '')
+    field = request.args.get('field')
+    if not clinical_expression(q):
+        return jsonify({"msg": "q is required"}), 400
+    if field and field not in CLINICAL_FIELDS:
+        return jsonify({"msg": f"field must be one of: {', '.join(CLINICAL_FIELDS)}"}), 400
+    try:
+        hits, next_cursor = clinical_page(q, doctor_id, field, request.args.get('cursor'), page_size(request.args.get('limit')))
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor"}), 400
+    except SearchUnavailable as e:
+        return jsonify({"msg": str(e)}), 501
+    
+    result = []
+    for a, snippets in hits:
+        result.append({
+            "id": a.id,
+            "doctor_name": a.doctor.user.username,
+            "patient_id": a.patient_id,
+            "patient_name": a.patient.user.username,
+            "date_time": a.date_time.isoformat(),
+            "status": a.status,
+            "snippets": snippets
+        })
+    return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
 # --- Patient ---
 @bp.route('/api/patient/doctors', methods=['GET'])
+@conditional_view('doctors')
+@cached_view('doctors')
 def get_doctors():
     """Get all approved doctors"""
-    doctors = Doctor.query.filter_by(is_approved=True).all()
-    result = []
-    for d in doctors:
-        result.append({
-            "id": d.id,
-            "name": d.user.username,
-            "specialization": d.specialization
-        })
-    return jsonify(result), 200
+    return jsonify(public_doctors_payload()), 200
 
 @bp.route('/api/patient/search/doctors', methods=['GET'])
+@conditional_view('doctors')
+@cached_view('doctors')
 def search_doctors_patient():
-    """Search doctors by name or specialization"""
-    query = request.args.get('q', '').lower()
-    specialization = request.args.get('specialization', '').lower()
-    
-    doctors_query = Doctor.query.filter_by(is_approved=True).join(User)
+    """Search approved doctors by name or specialization"""
+    try:
+        doctors, next_cursor, truncated = search_page(
+            'doctor', request.args.get('q'), request.args.get('cursor'),
+            page_size(request.args.get('limit')), request.args.get('specialization'), approved_only=True
+        )
+    except (ValueError, TypeError):
+        return jsonify({"msg": "Invalid cursor"}), 400
     
-    if query:
-        doctors_query = doctors_query.filter(User.username.ilike(f'%{query}%'))
-    if specialization:
-        doctors_query = doctors_query.filter(Doctor.specialization.ilike(f'%{specialization}%'))
-    
-    doctors = doctors_query.all()
     result = []
     for d in doctors:
         result.append({
@@ -285,74 +618,45 @@ def search_doctors_patient():
             "name": d.user.username,
             "specialization": d.specialization
         })
-    return jsonify(result), 200
+    return jsonify({"items": result, "next_cursor": next_cursor, "truncated": truncated}), 200
 
 @bp.route('/api/patient/book', methods=['POST'])
 @jwt_required()
 def book_appointment():
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    
-    if not patient:
+    patient_id = current_profile('patient')
+    if not patient_id:
         return jsonify({"msg": "Patient profile not found"}), 404
     
     data = request.get_json()
-    date_time = datetime.fromisoformat(data.get('date_time'))
-    doctor_id = data.get('doctor_id')
-    
-    # CRITICAL: Check for appointment conflicts
-    existing_appointment = Appointment.query.filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.date_time == date_time,
-        Appointment.status == 'Booked'
-    ).first()
-    
-    if existing_appointment:
-        return jsonify({"msg": "This time slot is already booked. Please choose another time."}), 400
-    
-    # Validate date is in the future
-    if date_time < datetime.now():
-        return jsonify({"msg": "Cannot book appointments in the past"}), 400
-    
-    new_appt = Appointment(
-        patient_id=patient.id,
-        doctor_id=doctor_id,
-        date_time=date_time
-    )
-    db.session.add(new_appt)
-    db.session.commit()
-    return jsonify({"msg": "Appointment booked successfully"}), 201
+    try:
+        new_appt = booking.book(patient_id, data.get('doctor_id'), data.get('date_time'))
+    except BookingError as e:
+        return jsonify({"msg": e.msg}), e.status
+    invalidate_stats()
+    appointment_changed(new_appt, 'created')
+    return jsonify({"msg": "Appointment booked successfully", "appointment_id": new_appt.id}), 201
 
 @bp.route('/api/patient/appointments', methods=['GET'])
 @jwt_required()
+@conditional_view(own_appointments, 'doctors')
 def patient_appointments():
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    if not patient:
+    patient_id = current_profile('patient')
+    if not patient_id:
         return jsonify({"msg": "Patient profile not found"}), 404
         
-    appointments = Appointment.query.filter_by(patient_id=patient.id).all()
-    result = []
-    for a in appointments:
-        result.append({
-            "id": a.id,
-            "doctor_name": a.doctor.user.username,
-            "date_time": a.date_time.isoformat(),
-            "status": a.status
-        })
-    return jsonify(result), 200
+    return jsonify(patient_appointments_payload(patient_id)), 200
 
 @bp.route('/api/patient/treatment-history', methods=['GET'])
 @jwt_required()
+@conditional_view(own_appointments, 'doctors')
 def patient_treatment_history():
     """Get detailed treatment history for patient"""
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    if not patient:
+    patient_id = current_profile('patient')
+    if not patient_id:
         return jsonify({"msg": "Patient profile not found"}), 404
     
-    appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
+    appointments = appointment_query().options(*with_clinical()).filter_by(
+        patient_id=patient_id,
         status='Completed'
     ).all()
     
@@ -372,23 +676,28 @@ def patient_treatment_history():
 @bp.route('/api/patient/appointment/<int:id>', methods=['DELETE'])
 @jwt_required()
 def cancel_appointment(id):
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    appt = Appointment.query.filter_by(id=id, patient_id=patient.id).first_or_404()
+    patient_id = current_profile('patient')
+    if not patient_id:
+        return jsonify({"msg": "Patient profile not found"}), 404
+    appt = Appointment.query.filter_by(id=id, patient_id=patient_id).first_or_404()
     
-    appt.status = 'Cancelled'
-    db.session.commit()
+    try:
+        booking.cancel(appt)
+    except BookingError as e:
+        return jsonify({"msg": e.msg}), e.status
+    invalidate_stats()
+    appointment_changed(appt, 'cancelled')
     return jsonify({"msg": "Appointment cancelled"}), 200
 
 @bp.route('/api/patient/profile', methods=['GET', 'PUT'])
 @jwt_required()
+@conditional_view('patients')
 def patient_profile():
     """Get or update patient profile"""
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    
-    if not patient:
+    patient_id = current_profile('patient')
+    if not patient_id:
         return jsonify({"msg": "Patient profile not found"}), 404
+    patient = db.session.get(Patient, patient_id, options=[joinedload(Patient.user)])
     
     if request.method == 'PUT':
         data = request.get_json()
@@ -399,29 +708,83 @@ def patient_profile():
         if 'address' in data:
             patient.address = data['address']
         db.session.commit()
+        bump_generation('patients')
         return jsonify({"msg": "Profile updated successfully"}), 200
     
-    return jsonify({
-        'username': patient.user.username,
-        'email': patient.user.email,
-        'address': patient.address
-    }), 200
+    return jsonify(patient_profile_payload(patient)), 200
 
 @bp.route('/api/patient/export', methods=['POST'])
 @jwt_required()
 def export_data():
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    task = export_patient_history.delay(patient.id)
+    patient_id = current_profile('patient')
+    if not patient_id:
+        return jsonify({"msg": "Patient profile not found"}), 404
+    
+    data = request.get_json(silent=True) or {}
+    fmt = data.get('format', 'csv.gz')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"msg": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if fmt == 'parquet' and not parquet_available():
+        return jsonify({"msg": "Parquet export is not available on this server"}), 400
+    
+    task = export_patient_history.delay(patient_id, fmt)
+    mark_requested(patient_id, task.id)
     return jsonify({"msg": "Export started", "task_id": task.id}), 202
 
+@bp.route('/api/patient/export/<uuid:task_id>', methods=['GET'])
+@jwt_required()
+def export_status(task_id):
+    """Poll an export started by POST /api/patient/export"""
+    task_id = str(task_id)
+    patient_id = current_profile('patient')
+    if not patient_id:
+        return jsonify({"msg": "Patient profile not found"}), 404
+    
+    if not export_requested(patient_id, task_id):
+        # Not this patient's, or cleaned up after EXPORT_RETENTION_HOURS
+        return jsonify({"msg": "Export not found"}), 404
+    
+    # State first: the file is written before the task succeeds, so a finished task without one has failed
+    try:
+        state = export_patient_history.AsyncResult(task_id).state
+    except Exception as e:
+        current_app.logger.warning(f"[EXPORT] Could not read task state for {task_id}: {e}")
+        state = 'PENDING'
+    if find_export(patient_id, task_id):
+        return jsonify({
+            "task_id": task_id,
+            "status": "ready",
+            "download_url": f"/api/patient/export/{task_id}/download"
+        }), 200
+    # SUCCESS without a file: nothing to export (e.g. the patient was deleted) or the file is gone
+    failed = state in ('SUCCESS', 'FAILURE', 'REVOKED')
+    return jsonify({"task_id": task_id, "status": "failed" if failed else "pending"}), 200
+
+@bp.route('/api/patient/export/<uuid:task_id>/download', methods=['GET'])
+@jwt_required()
+def export_download(task_id):
+    """Stream a finished export file (supports Range / conditional requests)"""
+    task_id = str(task_id)
+    patient_id = current_profile('patient')
+    if not patient_id:
+        return jsonify({"msg": "Patient profile not found"}), 404
+    
+    found = find_export(patient_id, task_id)
+    if not found:
+        return jsonify({"msg": "Export not found"}), 404
+    
+    path, fmt = found
+    extension, mimetype = EXPORT_FORMATS[fmt]
+    return send_file(path, mimetype=mimetype, as_attachment=True,
+                     download_name=f"treatment_history.{extension}", conditional=True)
+
 # ============= NEWLY ADDED MISSING ENDPOINTS =============
 
 # --- Admin: Update Doctor ---
 @bp.route('/api/admin/doctor/<int:id>', methods=['PUT'])
 @admin_required
 def update_doctor(id):
-    """Update doctor profile (username, email, specialization)"""
+    """Update doctor profile (username, email, specialization, is_approved)"""
     
     doctor = Doctor.query.get_or_404(id)
     data = request.get_json()
@@ -435,17 +798,37 @@ def update_doctor(id):
     # Update doctor fields
     if 'specialization' in data:
         doctor.specialization = data['specialization']
+    approval_changed = 'is_approved' in data and bool(data['is_approved']) != doctor.is_approved
+    if approval_changed:
+        doctor.is_approved = bool(data['is_approved'])
     
     db.session.commit()
+    if approval_changed:
+        # An unapproved doctor's existing tokens stop working on the next request
+        invalidate_profile('doctor', doctor.user_id)
+    bump_generation('doctors')
     return jsonify({"msg": "Doctor updated successfully"}), 200
 
 # --- Admin: Patient Management ---
 @bp.route('/api/admin/patients', methods=['GET'])
 @admin_required
+@conditional_view('patients')
 def admin_list_patients():
-    """List all patients"""
+    """List patients by id, one keyset page at a time"""
+    limit = page_size(request.args.get('limit'))
+    query = patient_query()
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_id, = decode_cursor(cursor, int)
+        except ValueError:
+            return jsonify({"msg": "Invalid cursor"}), 400
+        query = query.filter(Patient.id > last_id)
+    
+    query = query.order_by(Patient.id)
+    patients, next_cursor = keyset_page(query, limit, lambda p: (p.id,))
     
-    patients = Patient.query.all()
     result = []
     for p in patients:
         result.append({
@@ -455,7 +838,7 @@ def admin_list_patients():
             "email": p.user.email,
             "address": p.address
         })
-    return jsonify(result), 200
+    return jsonify({"items": result, "next_cursor": next_cursor}), 200
 
 @bp.route('/api/admin/patient/<int:id>', methods=['DELETE'])
 @admin_required
@@ -476,12 +859,16 @@ def admin_delete_patient(id):
         }), 400
     
     # Delete all appointments for this patient
+    changed = appointment_namespaces(Appointment.patient_id == patient.id)
     Appointment.query.filter_by(patient_id=patient.id).delete()
     
     # Delete user (cascades to patient)
     user = User.query.get(patient.user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_profile('patient', user.id)
+    invalidate_stats()
+    bump_generation('patients', 'appointments', *changed)
     return jsonify({"msg": "Patient deleted successfully"}), 200
 
 # --- Patient: Reschedule Appointment ---
@@ -489,103 +876,89 @@ def admin_delete_patient(id):
 @jwt_required()
 def reschedule_appointment(id):
     """Reschedule an appointment to a new date/time"""
-    current_user_id = get_jwt_identity()
-    patient = Patient.query.filter_by(user_id=current_user_id).first()
-    
-    if not patient:
+    patient_id = current_profile('patient')
+    if not patient_id:
         return jsonify({"msg": "Patient profile not found"}), 404
     
-    appt = Appointment.query.filter_by(id=id, patient_id=patient.id).first_or_404()
-    
-    # Only allow rescheduling of booked appointments
-    if appt.status != 'Booked':
-        return jsonify({"msg": "Can only reschedule booked appointments"}), 400
+    appt = Appointment.query.filter_by(id=id, patient_id=patient_id).first_or_404()
     
     data = request.get_json()
-    new_date_time = datetime.fromisoformat(data.get('date_time'))
-    
-    # Validate date is in the future
-    if new_date_time < datetime.now():
-        return jsonify({"msg": "Cannot reschedule to a past date"}), 400
-    
-    # Check for conflicts
-    existing_appointment = Appointment.query.filter(
-        Appointment.doctor_id == appt.doctor_id,
-        Appointment.date_time == new_date_time,
-        Appointment.status == 'Booked',
-        Appointment.id != id  # Exclude current appointment
-    ).first()
-    
-    if existing_appointment:
-        return jsonify({"msg": "This time slot is already booked. Please choose another time."}), 400
-    
-    appt.date_time = new_date_time
-    db.session.commit()
+    try:
+        booking.reschedule(appt, data.get('date_time'))
+    except BookingError as e:
+        return jsonify({"msg": e.msg}), e.status
+    invalidate_stats()
+    appointment_changed(appt, 'rescheduled')
     return jsonify({"msg": "Appointment rescheduled successfully"}), 200
 
 # --- Specializations List ---
 @bp.route('/api/specializations', methods=['GET'])
+@conditional_view('doctors')
+@cached_view('doctors')
 def get_specializations():
     """Get all unique specializations/departments"""
-    specializations = db.session.query(Doctor.specialization).distinct().all()
-    result = [s[0] for s in specializations if s[0]]
-    return jsonify(result), 200
+    return jsonify(specializations_payload()), 200
 
 # --- Doctor: Availability Management ---
 @bp.route('/api/doctor/availability', methods=['GET', 'POST'])
 @jwt_required()
 def doctor_availability():
     """Get or set doctor availability for next 7 days"""
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    
-    if not doctor:
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
         return jsonify({"msg": "Doctor profile not found"}), 404
     
     if request.method == 'POST':
         # Set availability (JSON format: {"2024-01-15": ["09:00", "10:00", "14:00"], ...})
-        data = request.get_json()
-        doctor.availability = json.dumps(data)
+        try:
+            added, removed = apply_availability(doctor_id, request.get_json())
+        except (ValueError, TypeError):
+            return jsonify({"msg": "Invalid availability format"}), 400
         db.session.commit()
-        return jsonify({"msg": "Availability updated"}), 200
+        bump_generation(availability_namespace(doctor_id))
+        return jsonify({"msg": "Availability updated", "added": added, "removed": removed}), 200
     
-    # GET - Return availability
-    if doctor.availability:
-        availability_data = json.loads(doctor.availability)
-    else:
-        availability_data = {}
-    
-    return jsonify(availability_data), 200
+    return jsonify(availability_json(doctor_id)), 200
 
 @bp.route('/api/doctor/<int:doctor_id>/availability', methods=['GET'])
+@conditional_view(availability_namespace)
+@cached_view(availability_namespace)
 def get_doctor_availability(doctor_id):
     """Get availability for a specific doctor (for patients)"""
-    doctor = Doctor.query.get_or_404(doctor_id)
-    
-    if doctor.availability:
-        availability_data = json.loads(doctor.availability)
-    else:
-        availability_data = {}
+    Doctor.query.get_or_404(doctor_id)
+    return jsonify(availability_json(doctor_id)), 200
+
+@bp.route('/api/slots/search', methods=['GET'])
+def search_free_slots():
+    """Earliest free slots across all approved doctors"""
+    try:
+        window_start = parse_date_bound(request.args.get('from'))
+        window_end = parse_date_bound(request.args.get('to'), end=True)
+    except ValueError:
+        return jsonify({"msg": "Invalid from/to date"}), 400
     
-    return jsonify(availability_data), 200
+    return jsonify(free_slots_payload(
+        specialization=request.args.get('specialization') or None,
+        start=max(window_start, datetime.now()) if window_start else None,
+        end=window_end,
+        limit=page_size(request.args.get('limit'))
+    )), 200
 
 # --- Doctor: Enhanced Dashboard Features ---
 @bp.route('/api/doctor/appointments/upcoming', methods=['GET'])
 @jwt_required()
 def doctor_upcoming_appointments():
     """Get upcoming appointments for doctor (next 7 days)"""
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    
-    if not doctor:
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
         return jsonify({"msg": "Doctor profile not found"}), 404
     
     # Get appointments for next 7 days
     today = datetime.now()
     next_week = today + timedelta(days=7)
     
-    appointments = Appointment.query.filter(
-        Appointment.doctor_id == doctor.id,
+    appointments = appointment_query().filter(
+        Appointment.doctor_id == doctor_id,
         Appointment.status == 'Booked',
         Appointment.date_time >= today,
         Appointment.date_time <= next_week
@@ -602,36 +975,124 @@ def doctor_upcoming_appointments():
         })
     return jsonify(result), 200
 
+# No ETag: next_booked moves on as time passes, not only when data is written
 @bp.route('/api/doctor/patients', methods=['GET'])
 @jwt_required()
 def doctor_patients():
-    """Get list of unique patients assigned to this doctor"""
-    current_user_id = get_jwt_identity()
-    doctor = Doctor.query.filter_by(user_id=current_user_id).first()
-    
-    if not doctor:
+    """List this doctor's patients with visit counts, one keyset page at a time"""
+    doctor_id = current_profile('doctor')
+    if not doctor_id:
         return jsonify({"msg": "Doctor profile not found"}), 404
     
-    # Get unique patients who have appointments with this doctor
-    patient_ids = db.session.query(Appointment.patient_id).filter(
-        Appointment.doctor_id == doctor.id
-    ).distinct().all()
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'last_visit'):
+        return jsonify({"msg": "sort must be 'id' or 'last_visit'"}), 400
+    
+    limit = page_size(request.args.get('limit'))
+    summary = doctor_patient_summary(doctor_id, datetime.now()).subquery()
+    query = db.session.query(summary)
+    
+    # Never-visited patients sort last under last_visit; the sentinel keeps the keyset comparison NULL-free
+    never = datetime(1900, 1, 1)
+    last_visit = db.func.coalesce(summary.c.last_visit, never)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            if sort == 'last_visit':
+                last_seen, last_id = decode_cursor(cursor, str, int)
+                last_seen = datetime.fromisoformat(last_seen)
+            else:
+                last_id, = decode_cursor(cursor, int)
+        except (ValueError, TypeError):
+            return jsonify({"msg": "Invalid cursor"}), 400
+        if sort == 'last_visit':
+            query = query.filter(db.or_(
+                last_visit < last_seen,
+                db.and_(last_visit == last_seen, summary.c.id > last_id)
+            ))
+        else:
+            query = query.filter(summary.c.id > last_id)
+    
+    if sort == 'last_visit':
+        query = query.order_by(last_visit.desc(), summary.c.id)
+        cursor_for = lambda row: ((row.last_visit or never).isoformat(), row.id)
+    else:
+        query = query.order_by(summary.c.id)
+        cursor_for = lambda row: (row.id,)
+    
+    rows, next_cursor = keyset_page(query, limit, cursor_for)
     
     result = []
-    for pid_tuple in patient_ids:
-        patient = Patient.query.get(pid_tuple[0])
-        if patient:
-            # Count appointments for this patient
-            appt_count = Appointment.query.filter_by(
-                doctor_id=doctor.id,
-                patient_id=patient.id
-            ).count()
-            
-            result.append({
-                "id": patient.id,
-                "username": patient.user.username,
-                "email": patient.user.email,
-                "total_appointments": appt_count
-            })
+    for row in rows:
+        result.append({
+            "id": row.id,
+            "username": row.username,
+            "email": row.email,
+            "total_appointments": row.total_appointments,
+            "last_visit": row.last_visit.isoformat() if row.last_visit else None,
+            "next_booked": row.next_booked.isoformat() if row.next_booked else None
+        })
+    return jsonify({"items": result, "next_cursor": next_cursor}), 200
+
+# --- Dashboard bootstrap ---
+@bp.route('/api/bootstrap/<any(admin, doctor, patient):role>', methods=['GET'])
+@jwt_required()
+def bootstrap(role):
+    """
+    Everything a dashboard shows on first load, in one request: the token is
+    decoded and the profile resolved once for all of it.
+    """
+    if get_jwt().get('role') != role:
+        return jsonify({"msg": f"{role.capitalize()}s only"}), 403
+    if role == 'admin':
+        return jsonify({
+            "stats": admin_stats_payload(),
+            "doctors": admin_doctors_payload()
+        }), 200
     
-    return jsonify(result), 200
+    profile_id = current_profile(role)
+    if not profile_id:
+        return jsonify({"msg": f"{role.capitalize()} profile not found"}), 404
+    if role == 'doctor':
+        return jsonify({
+            "appointments": doctor_appointments_payload(profile_id),
+            "availability": availability_json(profile_id)
+        }), 200
+    
+    patient = db.session.get(Patient, profile_id, options=[joinedload(Patient.user)])
+    return jsonify({
+        "doctors": cached_value('doctors', 'public_doctors', public_doctors_payload),
+        "specializations": cached_value('doctors', 'specializations', specializations_payload),
+        "appointments": patient_appointments_payload(profile_id),
+        "profile": patient_profile_payload(patient),
+        "next_slots": free_slots_payload(limit=BOOTSTRAP_SLOTS)
+    }), 200
+
+# --- Live appointment updates ---
+@bp.route('/api/stream/appointments', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def appointment_stream():
+    """
+    Server-Sent Events: an 'appointment' event ({"type", "appointment"}) for
+    every appointment of the calling doctor or patient that is created,
+    updated, cancelled or rescheduled. The token may come as ?token=, since
+    EventSource can't send headers; the stream ends with an 'expired' event
+    when it expires, and without one after EVENTS_MAX_STREAM seconds.
+    """
+    claims = get_jwt()
+    if claims.get('role') not in ('doctor', 'patient'):
+        return jsonify({"msg": "Doctors and patients only"}), 403
+    
+    # Subscribe before answering so nothing published from here on is missed
+    try:
+        subscription = events.get_broker(current_app.config).subscribe(events.user_channel(get_jwt_identity()))
+    except Exception as e:
+        current_app.logger.warning(f"[EVENTS] subscribe failed: {e}")
+        return jsonify({"msg": "Live updates are unavailable"}), 503
+    return Response(
+        events.stream(subscription, current_app.config['EVENTS_KEEPALIVE'], claims.get('exp'),
+                      current_app.config['EVENTS_MAX_STREAM']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
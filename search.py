@@ -0,0 +1,367 @@
+"""
+Doctor / patient directory search, and search over clinical text.
+
+On SQLite the names, emails and specializations are indexed in FTS5 trigram
+tables (doctor_fts, patient_fts; see models.SEARCH_DDL), which answer
+substring queries from the index instead of scanning user with ilike. On
+Postgres the same substring filters run against pg_trgm GIN indexes.
+
+A query is split into words; every word of 3+ characters must occur
+somewhere in the record. Single-word queries also match username prefixes
+(through the unique username index for patients), which is all that 1-2
+character queries can match. A specialization of 3+ characters is matched
+in the index as well; a shorter one falls back to an ilike filter on the
+(small) doctor table. When nothing matches, a typo-tolerant pass accepts
+records where all but one of each word's 3-character segments occur, so a
+single wrong, missing or extra letter still finds the record. With neither
+a query nor a specialization, every record is listed in id order.
+
+Matches are ranked in Python: username prefix first, then other prefix
+matches, then substrings, shortest value first; typo-tolerant matches by
+trigram similarity to the query or one of its words. Only the first
+SEARCH_CANDIDATES matches (in id order, plus the username-prefix matches)
+are ranked, which keeps every query to a few index probes however common
+the term is; pages are offsets into that ranked list. When a lookup hits
+that cap the result is marked truncated: there are more matches than the
+pages reach, and the query should be narrowed.
+"""
+
+import html
+import re
+from models import db, User, Doctor, Patient, Appointment
+from queries import DEFAULT_PAGE_SIZE, appointment_query, decode_cursor, doctor_query, encode_cursor, keyset_page, patient_query
+
+SEARCH_CANDIDATES = 200
+FUZZY_CANDIDATES = 50
+MIN_FUZZY_LENGTH = 6
+MIN_SIMILARITY = 0.3
+
+# Columns searched per directory, in the order they are stored in the FTS table
+FIELDS = {'doctor': ('username', 'email', 'specialization'), 'patient': ('username', 'email')}
+MODELS = {'doctor': Doctor, 'patient': Patient}
+
+
+def _terms(text):
+    return (text or '').strip().lower().split()
+
+
+def _phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _segments(term):
+    """Split a word into 2-3 pieces of 3+ characters"""
+    count = min(3, len(term) // 3)
+    size = len(term) / count
+    return [term[round(i * size):round((i + 1) * size)] for i in range(count)]
+
+
+def _fuzzy_expression(term):
+    """FTS expression matching the word with one edit: all segments but one present"""
+    segments = [_phrase(s) for s in _segments(term)]
+    if len(segments) == 2:
+        return f"({segments[0]} OR {segments[1]})"
+    a, b, c = segments
+    return f"(({a} AND {b}) OR ({a} AND {c}) OR ({b} AND {c}))"
+
+
+def _match_expression(terms, fuzzy, specialization=None):
+    parts = [_fuzzy_expression(t) if fuzzy and len(t) >= MIN_FUZZY_LENGTH else _phrase(t)
+             for t in terms if len(t) >= 3]
+    if specialization and len(specialization) >= 3:
+        parts.append(f"specialization : {_phrase(specialization)}")
+    return ' AND '.join(parts)
+
+
+# --- Candidate lookup ---
+
+def _sqlite_candidates(kind, terms, fuzzy, specialization, approved_only):
+    limit = FUZZY_CANDIDATES if fuzzy else SEARCH_CANDIDATES
+    expression = _match_expression(terms, fuzzy, specialization)
+    if not expression:
+        return []
+    columns = ', '.join(f"f.{name}" for name in FIELDS[kind])
+    sql = f"SELECT f.rowid, {columns} FROM {kind}_fts f"
+    if approved_only:
+        sql += " JOIN doctor d ON d.id = f.rowid AND d.is_approved"
+    sql += f" WHERE {kind}_fts MATCH :q LIMIT :limit"
+    return db.session.execute(db.text(sql), {'q': expression, 'limit': limit}).all()
+
+
+def _base_query(kind, approved_only):
+    model = MODELS[kind]
+    columns = [model.id, User.username, User.email]
+    if kind == 'doctor':
+        columns.append(Doctor.specialization)
+    query = db.select(*columns).join(User, User.id == model.user_id)
+    if approved_only:
+        query = query.where(Doctor.is_approved)
+    return query
+
+
+def _contains(value):
+    """ilike pattern matching value anywhere, with its own % and _ taken literally (escape='\\')"""
+    return '%' + value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _like_candidates(kind, terms, fuzzy, specialization, approved_only):
+    """pg_trgm (or plain ilike) path for databases without FTS5"""
+    searched = [User.username, User.email] + ([Doctor.specialization] if kind == 'doctor' else [])
+    query = _base_query(kind, approved_only)
+    long_terms = [t for t in terms if len(t) >= 3]
+    if specialization:
+        query = query.where(Doctor.specialization.ilike(_contains(specialization), escape='\\'))
+    elif not long_terms:
+        return []
+    if fuzzy:
+        if db.engine.dialect.name != 'postgresql':
+            return []
+        # pg_trgm similarity operator, served by the same GIN indexes
+        text = ' '.join(terms)
+        query = query.where(db.or_(*[column.op('%')(text) for column in searched]))
+        query = query.order_by(db.func.similarity(User.username, text).desc())
+        return db.session.execute(query.limit(FUZZY_CANDIDATES)).all()
+    for term in long_terms:
+        query = query.where(db.or_(*[column.ilike(_contains(term), escape='\\') for column in searched]))
+    return db.session.execute(query.limit(SEARCH_CANDIDATES)).all()
+
+
+def _prefix_candidates(kind, prefix, approved_only):
+    """Usernames starting with the query"""
+    query = _base_query(kind, approved_only)
+    if kind == 'doctor':
+        # A small table: scanning it beats walking every user's name in the username index
+        query = query.where(User.username.startswith(prefix, autoescape=True))
+    else:
+        query = query.where(User.username >= prefix, User.username < prefix + '\U0010ffff').order_by(User.username)
+    return db.session.execute(query.limit(SEARCH_CANDIDATES)).all()
+
+
+# --- Ranking ---
+
+def _best_match(values, text):
+    """(0 username / 1 other field / 2 no field starts with text, length of the shortest match)"""
+    for tier, candidates in ((0, values[:1]), (1, values[1:])):
+        hits = [len(v) for v in candidates if v.startswith(text)]
+        if hits:
+            return tier, min(hits)
+    return 2, min((len(v) for v in values if text in v), default=len(values[0]))
+
+
+def _rank(rows, terms, text, specialization):
+    """Drop rows missing a short word, then order prefix matches first, shortest match first"""
+    ranked = {}
+    for row in rows:
+        if row[0] in ranked:
+            continue
+        values = [(v or '').lower() for v in row[1:]]
+        if any(not any(t in v for v in values) for t in terms if len(t) < 3):
+            continue
+        if specialization and specialization not in values[2]:
+            continue
+        ranked[row[0]] = _best_match(values, text) + (row[0],)
+    return sorted(ranked, key=ranked.get)
+
+
+def _trigrams(value):
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _words(value):
+    """The value and its words (an email's local part, a username's pieces)"""
+    return [value] + [w for w in re.split(r'[^a-z0-9]+', value) if w and w != value]
+
+
+def _fuzzy_rank(rows, text):
+    """Order near-misses by trigram similarity to the query (as pg_trgm does), dropping the weakest"""
+    wanted = _trigrams(text)
+    scored = []
+    for row in rows:
+        words = [w for v in row[1:] for w in _words((v or '').lower())]
+        similarity = max(len(wanted & grams) / len(wanted | grams) for grams in map(_trigrams, words))
+        if similarity >= MIN_SIMILARITY:
+            scored.append((-similarity, row[0]))
+    return [row_id for _, row_id in sorted(scored)]
+
+
+def search_ids(kind, q, specialization=None, approved_only=False):
+    """
+    Ranked doctor / patient ids matching q (and, for doctors, a specialization
+    substring), and whether a candidate lookup hit its cap.
+    """
+    terms = _terms(q)
+    text = ' '.join(terms)
+    specialization = (specialization or '').strip().lower()
+    if not terms and not specialization:
+        return [], False
+    indexed = any(len(t) >= 3 for t in terms) or len(specialization) >= 3
+    candidates = _sqlite_candidates if db.engine.dialect.name == 'sqlite' and indexed else _like_candidates
+
+    rows, truncated = [], False
+    if terms and ' ' not in text:
+        found = _prefix_candidates(kind, text, approved_only)
+        truncated = len(found) >= SEARCH_CANDIDATES
+        rows += found
+    if indexed or specialization:
+        found = candidates(kind, terms, False, specialization, approved_only)
+        truncated = truncated or len(found) >= SEARCH_CANDIDATES
+        rows += found
+    ids = _rank(rows, terms, text, specialization)
+    if ids or len(text) < MIN_FUZZY_LENGTH:
+        return ids, truncated
+    found = candidates(kind, terms, True, specialization, approved_only)
+    return _fuzzy_rank(found, text), len(found) >= FUZZY_CANDIDATES
+
+
+def search_page(kind, q, cursor=None, limit=DEFAULT_PAGE_SIZE, specialization=None, approved_only=False):
+    """
+    One page of ranked Doctor / Patient rows (user joined in), the next
+    cursor, and whether the matches were truncated at SEARCH_CANDIDATES.
+    Without q or specialization, all rows page by id instead. Raises
+    ValueError for a malformed cursor.
+    """
+    model = MODELS[kind]
+    query = doctor_query() if kind == 'doctor' else patient_query()
+    if not _terms(q) and not (specialization or '').strip():
+        if approved_only:
+            query = query.filter(Doctor.is_approved)
+        if cursor:
+            last_id, = decode_cursor(cursor, int)
+            query = query.filter(model.id > last_id)
+        rows, next_cursor = keyset_page(query.order_by(model.id), limit, lambda row: (row.id,))
+        return rows, next_cursor, False
+
+    offset = 0
+    if cursor:
+        offset, = decode_cursor(cursor, int)
+        if offset < 0:
+            raise ValueError("Invalid cursor")
+    ids, truncated = search_ids(kind, q, specialization, approved_only)
+    page = ids[offset:offset + limit]
+    rows = {row.id: row for row in query.filter(model.id.in_(page))} if page else {}
+    next_cursor = encode_cursor(offset + limit) if offset + limit < len(ids) else None
+    return [rows[i] for i in page if i in rows], next_cursor, truncated
+
+
+# --- Clinical text ---
+#
+# On SQLite, diagnoses, prescriptions and notes are indexed in
+# appointment_fts, an FTS5 external-content table over appointment (porter
+# stemming, so "migraines" finds "migraine"). On Postgres they are one
+# weighted tsvector (A/B/C per column, so a field search is a weight filter)
+# behind a GIN expression index; queries repeat CLINICAL_TSVECTOR verbatim
+# so the planner matches it to the index. Every word is matched as a prefix.
+# Hits come newest appointment id first, so the pages are keyset pages on
+# the id.
+
+CLINICAL_FIELDS = ('diagnosis', 'prescription', 'notes')
+CLINICAL_WEIGHTS = dict(zip(CLINICAL_FIELDS, 'ABC'))
+CLINICAL_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(diagnosis, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(prescription, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(notes, '')), 'C')"
+)
+SNIPPET_TOKENS = 12
+# Highlight markers that cannot appear in escaped text; swapped for <mark> after escaping
+_OPEN, _CLOSE = '\x02', '\x03'
+
+
+class SearchUnavailable(Exception):
+    """The database has no full-text search to answer a clinical search"""
+
+
+def _clinical_words(q):
+    return re.findall(r'\w+', (q or '').lower())
+
+
+def clinical_expression(q, field=None):
+    """FTS query for the words in q (all required, each as a prefix), optionally in one column"""
+    words = _clinical_words(q)
+    if not words:
+        return ''
+    expression = ' AND '.join(f'"{w}"*' for w in words)
+    return f"{field} : ({expression})" if field else expression
+
+
+def _tsquery(q, field=None):
+    """to_tsquery text for the words in q, each as a prefix, optionally limited to one column's weight"""
+    weight = CLINICAL_WEIGHTS[field] if field else ''
+    return ' & '.join(f"{w}:*{weight}" for w in _clinical_words(q))
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def _sqlite_clinical_hits(q, doctor_id, field, last_id, limit):
+    params = {'q': clinical_expression(q, field), 'limit': limit}
+    columns = ', '.join(
+        f"snippet(appointment_fts, {i}, '{_OPEN}', '{_CLOSE}', '…', {SNIPPET_TOKENS})"
+        for i in range(len(CLINICAL_FIELDS))
+    )
+    sql = f"SELECT f.rowid, {columns} FROM appointment_fts f"
+    if doctor_id is not None:
+        sql += " JOIN appointment a ON a.id = f.rowid AND a.doctor_id = :doctor_id"
+        params['doctor_id'] = doctor_id
+    sql += " WHERE appointment_fts MATCH :q"
+    if last_id is not None:
+        sql += " AND f.rowid < :last_id"
+        params['last_id'] = last_id
+    sql += " ORDER BY f.rowid DESC LIMIT :limit"
+    return db.session.execute(db.text(sql), params).all()
+
+
+def _postgres_clinical_hits(q, doctor_id, field, last_id, limit):
+    # The page is picked first, so ts_headline only runs on the rows returned
+    params = {'q': _tsquery(q, field), 'words': _tsquery(q), 'limit': limit}
+    sql = f"SELECT id, diagnosis, prescription, notes FROM appointment WHERE ({CLINICAL_TSVECTOR}) @@ to_tsquery('english', :q)"
+    if doctor_id is not None:
+        sql += " AND doctor_id = :doctor_id"
+        params['doctor_id'] = doctor_id
+    if last_id is not None:
+        sql += " AND id < :last_id"
+        params['last_id'] = last_id
+    sql += " ORDER BY id DESC LIMIT :limit"
+    options = f'StartSel="{_OPEN}", StopSel="{_CLOSE}", MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}'
+    columns = ', '.join(
+        f"ts_headline('english', page.{name}, query, :options)" if field in (None, name) else 'NULL'
+        for name in CLINICAL_FIELDS
+    )
+    params['options'] = options
+    return db.session.execute(db.text(
+        f"SELECT page.id, {columns} FROM ({sql}) page, to_tsquery('english', :words) query ORDER BY page.id DESC"
+    ), params).all()
+
+
+def clinical_page(q, doctor_id=None, field=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of (appointment, snippets) for appointments whose clinical text
+    matches q, limited to one doctor's when doctor_id is given. snippets maps
+    each matching column to an HTML-escaped excerpt with <mark>ed hits.
+    Raises ValueError for a malformed cursor, SearchUnavailable on a
+    database with neither FTS5 nor Postgres text search.
+    """
+    dialect = db.engine.dialect.name
+    if dialect not in ('sqlite', 'postgresql'):
+        raise SearchUnavailable("Clinical search needs SQLite FTS5 or Postgres")
+    if not _clinical_words(q):
+        return [], None
+    last_id = None
+    if cursor:
+        last_id, = decode_cursor(cursor, int)
+    hits_for = _sqlite_clinical_hits if dialect == 'sqlite' else _postgres_clinical_hits
+    hits = hits_for(q, doctor_id, field, last_id, limit + 1)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1][0])
+    ids = [hit[0] for hit in hits]
+    appointments = {a.id: a for a in appointment_query().filter(Appointment.id.in_(ids))} if ids else {}
+    page = []
+    for hit in hits:
+        snippets = {name: _highlight(text) for name, text in zip(CLINICAL_FIELDS, hit[1:]) if text and _OPEN in text}
+        if hit[0] in appointments:
+            page.append((appointments[hit[0]], snippets))
+    return page, next_cursor
@@ -1,6 +1,67 @@
-const { createApp, ref, onMounted, computed } = Vue;
+const { createApp, ref, onMounted, onUnmounted, computed, watch } = Vue;
 const { createRouter, createWebHashHistory } = VueRouter;
 
+// --- Conditional GET ---
+// Remembers the ETag and body of each GET response (per token + URL) and sends
+// If-None-Match on the next request; a 304 is replayed as the stored body so
+// callers can keep using res.ok / res.json().
+const etagCache = new Map();
+
+const fetchWithETag = async (url, options = {}) => {
+    const headers = { ...(options.headers || {}) };
+    const key = (headers['Authorization'] || '') + ' ' + url;
+    const entry = etagCache.get(key);
+    if (entry) headers['If-None-Match'] = entry.etag;
+
+    const res = await fetch(url, { ...options, headers });
+    if (res.status === 304 && entry) {
+        return new Response(entry.body, { status: 200, headers: { 'Content-Type': 'application/json' } });
+    }
+    const etag = res.headers.get('ETag');
+    if (res.ok && etag) {
+        etagCache.set(key, { etag, body: await res.clone().text() });
+    }
+    return res;
+};
+
+// --- Live appointment updates ---
+// Opens the /api/stream/appointments event stream (the token goes in the query
+// string: EventSource can't send headers) and calls onChange({type, appointment})
+// for every change to the caller's appointments. Changes made while the stream
+// was down are not replayed, so onResync loads the lists each time it opens,
+// the first time included: loading them before subscribing could miss a change.
+// If the stream can't open at all, onResync still runs once.
+const streamAppointments = (token, onChange, onResync) => {
+    const source = new EventSource('/api/stream/appointments?token=' + encodeURIComponent(token));
+    let synced = false;
+    const resync = () => {
+        synced = true;
+        onResync();
+    };
+    source.addEventListener('appointment', (e) => onChange(JSON.parse(e.data)));
+    // The token has expired, so every request would now be refused: sign in again
+    source.addEventListener('expired', () => {
+        source.close();
+        localStorage.clear();
+        window.dispatchEvent(new Event('auth-change'));
+        router.push('/login');
+    });
+    source.onopen = resync;
+    source.onerror = () => {
+        if (!synced) resync();
+    };
+    return source;
+};
+
+const isLive = (source) => source && source.readyState === EventSource.OPEN;
+
+// The list with appt merged in (or appended), or taken out when belongs(appt) is false
+const upsertAppointment = (list, appt, belongs = () => true) => {
+    if (!belongs(appt)) return list.filter(a => a.id !== appt.id);
+    if (!list.some(a => a.id === appt.id)) return list.concat(appt);
+    return list.map(a => a.id === appt.id ? { ...a, ...appt } : a);
+};
+
 // --- Components ---
 
 const Login = {
@@ -141,12 +202,12 @@ const AdminDashboard = {
                     </button>
                 </li>
                 <li class="nav-item">
-                    <button class="nav-link" :class="{ active: activeTab === 'patients' }" @click="activeTab = 'patients'">
+                    <button class="nav-link" :class="{ active: activeTab === 'patients' }" @click="openTab('patients')">
                         Manage Patients
                     </button>
                 </li>
                 <li class="nav-item">
-                    <button class="nav-link" :class="{ active: activeTab === 'appointments' }" @click="activeTab = 'appointments'">
+                    <button class="nav-link" :class="{ active: activeTab === 'appointments' }" @click="openTab('appointments')">
                         All Appointments
                     </button>
                 </li>
@@ -265,11 +326,39 @@ const AdminDashboard = {
                         </tbody>
                     </table>
                 </div>
+                <div v-if="patientsCursor" class="text-center mt-3">
+                    <button @click="fetchPatients(true)" class="btn btn-outline-primary">Load More</button>
+                </div>
             </div>
             
             <!-- Appointments Tab -->
             <div v-if="activeTab === 'appointments'" class="glass-panel">
                 <h3 class="mb-4">System Appointments Log</h3>
+                <form class="row g-2 mb-3" @submit.prevent="fetchAppointments()">
+                    <div class="col-md-3">
+                        <select class="form-select" v-model="appointmentFilters.status">
+                            <option value="">All Statuses</option>
+                            <option>Booked</option>
+                            <option>Completed</option>
+                            <option>Cancelled</option>
+                        </select>
+                    </div>
+                    <div class="col-md-3">
+                        <select class="form-select" v-model="appointmentFilters.doctor_id">
+                            <option value="">All Doctors</option>
+                            <option v-for="doc in doctors" :key="doc.id" :value="doc.id">{{ doc.username }}</option>
+                        </select>
+                    </div>
+                    <div class="col-md-2">
+                        <input type="date" class="form-control" v-model="appointmentFilters.date_from" title="From">
+                    </div>
+                    <div class="col-md-2">
+                        <input type="date" class="form-control" v-model="appointmentFilters.date_to" title="To">
+                    </div>
+                    <div class="col-md-2">
+                        <button type="submit" class="btn btn-primary w-100">Filter</button>
+                    </div>
+                </form>
                 <div class="table-responsive">
                     <table class="table">
                         <thead>
@@ -301,6 +390,9 @@ const AdminDashboard = {
                         </tbody>
                     </table>
                 </div>
+                <div v-if="appointmentsCursor" class="text-center mt-3">
+                    <button @click="fetchAppointments(true)" class="btn btn-outline-primary">Load More</button>
+                </div>
             </div>
         </div>
 
@@ -366,6 +458,12 @@ const AdminDashboard = {
         const appointments = ref([]);
         const stats = ref({});
 
+        // Keyset pagination state; patients and appointments load on first tab visit
+        const patientsCursor = ref(null);
+        const appointmentsCursor = ref(null);
+        const appointmentFilters = ref({ status: '', doctor_id: '', date_from: '', date_to: '' });
+        const loadedTabs = new Set();
+
         const activeTab = ref('dashboard');
         const doctorSearch = ref('');
         const patientSearch = ref('');
@@ -389,31 +487,54 @@ const AdminDashboard = {
 
         const fetchDoctors = async () => {
             try {
-                const res = await fetch('/api/admin/doctors', {
+                const res = await fetchWithETag('/api/admin/doctors', {
                     headers: { 'Authorization': 'Bearer ' + token }
                 });
                 if (res.ok) doctors.value = await res.json();
             } catch (e) { console.error(e); }
         };
 
-        const fetchPatients = async () => {
+        const fetchPatients = async (more = false) => {
             try {
-                const res = await fetch('/api/admin/patients', {
+                const params = new URLSearchParams();
+                if (more && patientsCursor.value) params.set('cursor', patientsCursor.value);
+                const res = await fetchWithETag('/api/admin/patients?' + params, {
                     headers: { 'Authorization': 'Bearer ' + token }
                 });
-                if (res.ok) patients.value = await res.json();
+                if (res.ok) {
+                    const data = await res.json();
+                    patients.value = more ? patients.value.concat(data.items) : data.items;
+                    patientsCursor.value = data.next_cursor;
+                }
             } catch (e) { console.error(e); }
         };
 
-        const fetchAppointments = async () => {
+        const fetchAppointments = async (more = false) => {
             try {
-                const res = await fetch('/api/admin/appointments', {
+                const params = new URLSearchParams();
+                for (const [key, value] of Object.entries(appointmentFilters.value)) {
+                    if (value) params.set(key, value);
+                }
+                if (more && appointmentsCursor.value) params.set('cursor', appointmentsCursor.value);
+                const res = await fetchWithETag('/api/admin/appointments?' + params, {
                     headers: { 'Authorization': 'Bearer ' + token }
                 });
-                if (res.ok) appointments.value = await res.json();
+                if (res.ok) {
+                    const data = await res.json();
+                    appointments.value = more ? appointments.value.concat(data.items) : data.items;
+                    appointmentsCursor.value = data.next_cursor;
+                }
             } catch (e) { console.error(e); }
         };
 
+        const openTab = (tab) => {
+            activeTab.value = tab;
+            if (loadedTabs.has(tab)) return;
+            loadedTabs.add(tab);
+            if (tab === 'patients') fetchPatients();
+            if (tab === 'appointments') fetchAppointments();
+        };
+
         const filteredDoctors = computed(() => {
             if (!doctorSearch.value) return doctors.value;
             const term = doctorSearch.value.toLowerCase();
@@ -509,15 +630,25 @@ const AdminDashboard = {
             }
         };
 
-        onMounted(() => {
-            fetchStats();
-            fetchDoctors();
-            fetchPatients();
-            fetchAppointments();
-        });
+        // Stats and doctors in one request; the fetch* helpers refresh them after edits
+        const bootstrap = async () => {
+            try {
+                const res = await fetch('/api/bootstrap/admin', {
+                    headers: { 'Authorization': 'Bearer ' + token }
+                });
+                if (res.ok) {
+                    const data = await res.json();
+                    stats.value = data.stats;
+                    doctors.value = data.doctors;
+                }
+            } catch (e) { console.error(e); }
+        };
+
+        onMounted(bootstrap);
 
         return {
             doctors, patients, appointments, stats,
+            patientsCursor, appointmentsCursor, appointmentFilters, fetchPatients, fetchAppointments, openTab,
             activeTab, doctorSearch, patientSearch, filteredDoctors, filteredPatients,
             newDoc, editingDoctor, showAddDoctorModal,
             addDoctor, editDoctor, updateDoctor, deleteDoctor, deletePatient,
@@ -600,6 +731,9 @@ const DoctorDashboard = {
                     </tbody>
                 </table>
             </div>
+            <div v-if="appointmentsCursor" class="text-center mt-3">
+                <button @click="fetchAppointments(true)" class="btn btn-outline-primary">Load More</button>
+            </div>
             
             <div v-if="editingAppt" class="mt-4 p-4 glass-panel border border-primary">
                 <h4 class="mb-3">Update Appointment #{{ editingAppt.id }}</h4>
@@ -662,7 +796,13 @@ const DoctorDashboard = {
 
         <!-- My Patients Tab -->
         <div v-if="activeTab === 'patients'" class="glass-panel">
-            <h3 class="mb-4">My Patients</h3>
+            <div class="d-flex justify-content-between align-items-center mb-4">
+                <h3 class="mb-0">My Patients</h3>
+                <select v-model="patientSort" @change="fetchPatients()" class="form-select" style="width: auto;">
+                    <option value="id">Sort by ID</option>
+                    <option value="last_visit">Sort by Last Visit</option>
+                </select>
+            </div>
             <div class="table-responsive">
                 <table class="table">
                     <thead>
@@ -671,6 +811,8 @@ const DoctorDashboard = {
                             <th>Patient Name</th>
                             <th>Email</th>
                             <th>Total Appointments</th>
+                            <th>Last Visit</th>
+                            <th>Next Booked</th>
                         </tr>
                     </thead>
                     <tbody>
@@ -681,13 +823,18 @@ const DoctorDashboard = {
                             <td>
                                 <span class="badge bg-info">{{ patient.total_appointments }}</span>
                             </td>
+                            <td>{{ patient.last_visit ? new Date(patient.last_visit).toLocaleDateString() : '-' }}</td>
+                            <td>{{ patient.next_booked ? new Date(patient.next_booked).toLocaleString() : '-' }}</td>
                         </tr>
                         <tr v-if="myPatients.length === 0">
-                            <td colspan="4" class="text-center text-muted py-4">No patients assigned yet.</td>
+                            <td colspan="6" class="text-center text-muted py-4">No patients assigned yet.</td>
                         </tr>
                     </tbody>
                 </table>
             </div>
+            <div v-if="patientsCursor" class="text-center mt-3">
+                <button @click="fetchPatients(true)" class="btn btn-outline-primary">Load More</button>
+            </div>
         </div>
 
         <!-- Availability Tab -->
@@ -730,8 +877,11 @@ const DoctorDashboard = {
     `,
     setup() {
         const appointments = ref([]);
+        const appointmentsCursor = ref(null);
         const upcomingAppointments = ref([]);
         const myPatients = ref([]);
+        const patientsCursor = ref(null);
+        const patientSort = ref('id');
         const editingAppt = ref(null);
         const activeTab = ref('appointments');
         const availability = ref({});
@@ -744,27 +894,67 @@ const DoctorDashboard = {
             '13:00', '14:00', '15:00', '16:00', '17:00'
         ];
 
-        const fetchAppointments = async () => {
-            const res = await fetch('/api/doctor/appointments', {
+        const fetchAppointments = async (more = false) => {
+            const params = new URLSearchParams();
+            if (more && appointmentsCursor.value) params.set('cursor', appointmentsCursor.value);
+            const res = await fetchWithETag('/api/doctor/appointments?' + params, {
                 headers: { 'Authorization': 'Bearer ' + token }
             });
-            if (res.ok) appointments.value = await res.json();
+            if (res.ok) {
+                const data = await res.json();
+                appointments.value = more ? appointments.value.concat(data.items) : data.items;
+                appointmentsCursor.value = data.next_cursor;
+            }
         };
 
         const fetchUpcoming = async () => {
-            const res = await fetch('/api/doctor/appointments/upcoming', {
+            const res = await fetchWithETag('/api/doctor/appointments/upcoming', {
                 headers: { 'Authorization': 'Bearer ' + token }
             });
             if (res.ok) upcomingAppointments.value = await res.json();
         };
 
-        const fetchPatients = async () => {
-            const res = await fetch('/api/doctor/patients', {
+        const fetchPatients = async (more = false) => {
+            const params = new URLSearchParams({ sort: patientSort.value });
+            if (more && patientsCursor.value) params.set('cursor', patientsCursor.value);
+            const res = await fetchWithETag('/api/doctor/patients?' + params, {
                 headers: { 'Authorization': 'Bearer ' + token }
             });
-            if (res.ok) myPatients.value = await res.json();
+            if (res.ok) {
+                const data = await res.json();
+                myPatients.value = more ? myPatients.value.concat(data.items) : data.items;
+                patientsCursor.value = data.next_cursor;
+            }
         };
 
+        const resync = () => {
+            fetchAppointments();
+            if (activeTab.value === 'upcoming') fetchUpcoming();
+        };
+
+        // Upcoming = Booked in the next 7 days, soonest first (as the endpoint returns it)
+        const isUpcoming = (appt) => {
+            const when = new Date(appt.date_time);
+            const now = new Date();
+            return appt.status === 'Booked' && when >= now && when <= new Date(now.getTime() + 7 * 86400000);
+        };
+
+        // Newest first, as the endpoint pages them; a change past the last loaded
+        // row is left for Load More
+        const newestFirst = (a, b) => b.date_time.localeCompare(a.date_time) || b.id - a.id;
+        const isLoaded = (appt) => {
+            const list = appointments.value;
+            return !appointmentsCursor.value || !list.length || newestFirst(appt, list[list.length - 1]) <= 0;
+        };
+
+        const applyChange = ({ appointment }) => {
+            appointments.value = upsertAppointment(appointments.value, appointment, isLoaded).sort(newestFirst);
+            upcomingAppointments.value = upsertAppointment(upcomingAppointments.value, appointment, isUpcoming)
+                .sort((a, b) => a.date_time.localeCompare(b.date_time));
+        };
+
+        let live = null;
+
         const editAppt = (appt) => {
             editingAppt.value = { ...appt };
         };
@@ -781,8 +971,8 @@ const DoctorDashboard = {
             if (res.ok) {
                 alert('Appointment updated successfully!');
                 editingAppt.value = null;
-                fetchAppointments();
-                if (activeTab.value === 'upcoming') fetchUpcoming();
+                // The stream delivers the change; reload only when it is down
+                if (!isLive(live)) resync();
             }
         };
 
@@ -823,19 +1013,6 @@ const DoctorDashboard = {
             availabilitySaved.value = false;
         };
 
-        const fetchAvailability = async () => {
-            try {
-                const res = await fetch('/api/doctor/availability', {
-                    headers: { 'Authorization': 'Bearer ' + token }
-                });
-                if (res.ok) {
-                    availability.value = await res.json();
-                }
-            } catch (e) {
-                console.error(e);
-            }
-        };
-
         const saveAvailability = async () => {
             try {
                 const res = await fetch('/api/doctor/availability', {
@@ -857,20 +1034,46 @@ const DoctorDashboard = {
             }
         };
 
+        // Appointments and availability in one request
+        const bootstrap = async () => {
+            try {
+                const res = await fetch('/api/bootstrap/doctor', {
+                    headers: { 'Authorization': 'Bearer ' + token }
+                });
+                if (res.ok) {
+                    const data = await res.json();
+                    appointments.value = data.appointments.items;
+                    appointmentsCursor.value = data.appointments.next_cursor;
+                    availability.value = data.availability;
+                }
+            } catch (e) { console.error(e); }
+        };
+
         onMounted(() => {
-            fetchAppointments();
             generateAvailabilityDays();
-            fetchAvailability();
+            let loaded = false;
+            live = streamAppointments(token, applyChange, () => {
+                // Availability only needs the first load; reconnects reload the lists
+                if (loaded) return resync();
+                loaded = true;
+                bootstrap();
+            });
         });
 
+        onUnmounted(() => live && live.close());
+
         return {
             appointments,
+            appointmentsCursor,
             upcomingAppointments,
             myPatients,
+            patientsCursor,
+            patientSort,
             editingAppt,
             activeTab,
             editAppt,
             saveAppt,
+            fetchAppointments,
             fetchUpcoming,
             fetchPatients,
             // Availability
@@ -934,6 +1137,21 @@ const PatientDashboard = {
                 </div>
             </div>
 
+            <!-- Next Available Slots -->
+            <div class="glass-panel mb-4">
+                <h5 class="mb-3">Next Available</h5>
+                <div v-if="nextSlots.length === 0" class="text-muted">
+                    No open slots found.
+                </div>
+                <div v-else class="d-flex flex-wrap gap-2">
+                    <button v-for="slot in nextSlots" :key="slot.slot_id" 
+                            @click="bookSlot(slot)"
+                            class="btn btn-sm btn-outline-success">
+                        Dr. {{ slot.doctor_name }} &middot; {{ new Date(slot.start).toLocaleString() }}
+                    </button>
+                </div>
+            </div>
+
             <!-- Doctors List -->
             <div class="row g-4">
                 <div v-for="doc in filteredDoctors" :key="doc.id" class="col-md-6 col-lg-4">
@@ -1011,7 +1229,12 @@ const PatientDashboard = {
         <!-- My Appointments Tab -->
         <div v-if="activeTab === 'appointments'">
             <div class="glass-panel">
-                <h3 class="mb-4">My Appointments</h3>
+                <div class="d-flex justify-content-between align-items-center mb-4">
+                    <h3 class="mb-0">My Appointments</h3>
+                    <button @click="exportHistory" class="btn btn-outline-primary" :disabled="exporting">
+                        {{ exporting ? 'Preparing export...' : 'Export History (CSV)' }}
+                    </button>
+                </div>
                 
                 <div v-if="appointments.length === 0" class="text-center py-5 text-muted">
                     No appointments found.
@@ -1108,29 +1331,46 @@ const PatientDashboard = {
         const doctorAvailability = ref({});
         const bookingDoctor = ref({});
         const reschedulingAppt = ref(null);
+        const nextSlots = ref([]);
 
         const token = localStorage.getItem('token');
 
         const fetchData = async () => {
-            // Fetch Doctors
-            const docRes = await fetch('/api/patient/doctors');
-            if (docRes.ok) doctors.value = await docRes.json();
-
-            // Fetch Specializations
-            const specRes = await fetch('/api/specializations');
-            if (specRes.ok) specializations.value = await specRes.json();
-
-            // Fetch Appointments
-            const apptRes = await fetch('/api/patient/appointments', {
+            // Doctors, specializations, appointments, profile and next free slots in one request
+            const res = await fetch('/api/bootstrap/patient', {
                 headers: { 'Authorization': 'Bearer ' + token }
             });
-            if (apptRes.ok) appointments.value = await apptRes.json();
+            if (!res.ok) return;
+            const data = await res.json();
+            doctors.value = data.doctors;
+            specializations.value = data.specializations;
+            appointments.value = data.appointments;
+            profile.value = data.profile;
+            if (selectedSpec.value) fetchNextSlots();
+            else nextSlots.value = data.next_slots;
+        };
 
-            // Fetch Profile
-            const profRes = await fetch('/api/patient/profile', {
-                headers: { 'Authorization': 'Bearer ' + token }
-            });
-            if (profRes.ok) profile.value = await profRes.json();
+        const fetchNextSlots = async () => {
+            const params = new URLSearchParams({ limit: 8 });
+            if (selectedSpec.value) params.set('specialization', selectedSpec.value);
+            const res = await fetch('/api/slots/search?' + params);
+            nextSlots.value = res.ok ? await res.json() : [];
+        };
+
+        watch(selectedSpec, fetchNextSlots);
+
+        // Bookings, cancellations and the doctor's updates arrive on the stream;
+        // each one can take or free a slot, so the suggestions are reloaded too
+        const applyChange = ({ appointment }) => {
+            appointments.value = upsertAppointment(appointments.value, appointment);
+            fetchNextSlots();
+        };
+
+        let live = null;
+
+        // After a write: the stream brings the change, so reload only when it is down
+        const refresh = () => {
+            if (!isLive(live)) fetchData();
         };
 
         const filteredDoctors = computed(() => {
@@ -1141,7 +1381,7 @@ const PatientDashboard = {
         const viewDoctorAvailability = async (doc) => {
             selectedDoctorProfile.value = doc;
             // Fetch availability
-            const res = await fetch(`/api/doctor/${doc.id}/availability`);
+            const res = await fetchWithETag(`/api/doctor/${doc.id}/availability`);
             if (res.ok) {
                 doctorAvailability.value = await res.json();
             } else {
@@ -1155,6 +1395,12 @@ const PatientDashboard = {
             showBookingModal.value = true;
         };
 
+        const bookSlot = (slot) => {
+            bookingDoctor.value = doctors.value.find(d => d.id === slot.doctor_id) || { id: slot.doctor_id, name: slot.doctor_name };
+            dateTime.value = slot.start.slice(0, 16);
+            showBookingModal.value = true;
+        };
+
         const book = async () => {
             const res = await fetch('/api/patient/book', {
                 method: 'POST',
@@ -1168,7 +1414,7 @@ const PatientDashboard = {
                 })
             });
             if (res.ok) {
-                fetchData();
+                refresh();
                 alert('Appointment Booked Successfully!');
                 showBookingModal.value = false;
                 dateTime.value = '';
@@ -1185,7 +1431,7 @@ const PatientDashboard = {
                 method: 'DELETE',
                 headers: { 'Authorization': 'Bearer ' + token }
             });
-            if (res.ok) fetchData();
+            if (res.ok) refresh();
         };
 
         const rescheduleAppt = (appt) => {
@@ -1207,13 +1453,60 @@ const PatientDashboard = {
             if (res.ok) {
                 alert('Appointment Rescheduled!');
                 reschedulingAppt.value = null;
-                fetchData();
+                refresh();
             } else {
                 const data = await res.json();
                 alert(data.msg || 'Reschedule failed');
             }
         };
 
+        const exporting = ref(false);
+
+        const exportHistory = async () => {
+            exporting.value = true;
+            try {
+                const res = await fetch('/api/patient/export', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Authorization': 'Bearer ' + token
+                    },
+                    body: JSON.stringify({ format: 'csv.gz' })
+                });
+                if (!res.ok) {
+                    const data = await res.json();
+                    alert(data.msg || 'Export failed');
+                    return;
+                }
+                const { task_id } = await res.json();
+
+                // Poll until the worker has written the file
+                for (let attempt = 0; attempt < 60; attempt++) {
+                    const statusRes = await fetch('/api/patient/export/' + task_id, {
+                        headers: { 'Authorization': 'Bearer ' + token }
+                    });
+                    if (!statusRes.ok) break;
+                    const status = await statusRes.json();
+                    if (status.status === 'ready') {
+                        const fileRes = await fetch(status.download_url, {
+                            headers: { 'Authorization': 'Bearer ' + token }
+                        });
+                        const link = document.createElement('a');
+                        link.href = URL.createObjectURL(await fileRes.blob());
+                        link.download = 'treatment_history.csv.gz';
+                        link.click();
+                        setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+                        return;
+                    }
+                    if (status.status === 'failed') break;
+                    await new Promise(resolve => setTimeout(resolve, 2000));
+                }
+                alert('Export did not finish, please try again later');
+            } finally {
+                exporting.value = false;
+            }
+        };
+
         const updateProfile = async () => {
             const res = await fetch('/api/patient/profile', {
                 method: 'PUT',
@@ -1226,14 +1519,19 @@ const PatientDashboard = {
             if (res.ok) alert('Profile updated successfully!');
         };
 
-        onMounted(fetchData);
+        onMounted(() => {
+            live = streamAppointments(token, applyChange, fetchData);
+        });
+
+        onUnmounted(() => live && live.close());
 
         return {
             doctors, specializations, appointments, profile,
-            activeTab, selectedSpec, filteredDoctors,
+            activeTab, selectedSpec, filteredDoctors, nextSlots,
             showDoctorModal, showBookingModal, selectedDoctorProfile, doctorAvailability, bookingDoctor,
             dateTime, newDateTime, reschedulingAppt,
-            viewDoctorAvailability, selectDoctorForBooking, book, cancelAppt, rescheduleAppt, confirmReschedule, updateProfile
+            viewDoctorAvailability, selectDoctorForBooking, bookSlot, book, cancelAppt, rescheduleAppt, confirmReschedule, updateProfile,
+            exporting, exportHistory
         };
     }
 };
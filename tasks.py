@@ -1,211 +1,209 @@
 from celery import Celery
 from config import Config
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 import time
-import csv
-from io import StringIO
 
 def make_celery(app_name=__name__):
     return Celery(app_name, broker=Config.CELERY_BROKER_URL, backend=Config.CELERY_RESULT_BACKEND)
 
 celery = make_celery()
 
-@celery.task
-def send_daily_reminders():
-    """Send daily reminders to patients with appointments tomorrow"""
-    from app import app
-    from models import db, Appointment, Patient
-    
-    with app.app_context():
-        tomorrow = date.today() + timedelta(days=1)
-        appointments = Appointment.query.filter(
-            db.func.date(Appointment.date_time) == tomorrow,
-            Appointment.status == 'Booked'
-        ).all()
-        
-        reminders_sent = 0
-        for appt in appointments:
-            patient_email = appt.patient.user.email
-            doctor_name = appt.doctor.user.username
-            appt_time = appt.date_time.strftime('%I:%M %p')
-            
-            # In production, use actual email service
-            message = f"""
+if Config.INSTRUMENTATION_ENABLED:
+    from instrumentation import track_celery_tasks
+    track_celery_tasks()
+
+def _tomorrow_window():
+    # Half-open range instead of date(date_time) so the (status, date_time) index applies
+    tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    return tomorrow, tomorrow + timedelta(days=1)
+
+def _reminder_filters(start, end):
+    from models import Appointment
+    return (
+        Appointment.status == 'Booked',
+        Appointment.date_time >= start,
+        Appointment.date_time < end,
+        Appointment.reminder_sent_at.is_(None)
+    )
+
+def _reminder_message(appt):
+    from notifier import Message
+    body = f"""
             Dear {appt.patient.user.username},
             
             This is a reminder for your appointment tomorrow.
             
-            Doctor: Dr. {doctor_name}
-            Time: {appt_time}
+            Doctor: Dr. {appt.doctor.user.username}
+            Time: {appt.date_time.strftime('%I:%M %p')}
             
             Please arrive 15 minutes early.
             
             Best regards,
             Hospital Management System
             """
+    return Message(appt.id, appt.patient.user.email, "Appointment Reminder", body)
+
+@celery.task
+def send_daily_reminders():
+    """Fan out reminders for tomorrow's appointments in chunks of REMINDER_CHUNK_SIZE"""
+    from celery import chord
+    from app import app
+    from models import db, Appointment
+    
+    with app.app_context():
+        start, end = _tomorrow_window()
+        chunk_size = app.config['REMINDER_CHUNK_SIZE']
+        # Only ids are streamed here; each sub-task loads its own rows
+        ids = db.session.query(Appointment.id).filter(*_reminder_filters(start, end)).order_by(Appointment.id)
+        
+        chunks, chunk = [], []
+        for (appt_id,) in ids.yield_per(chunk_size):
+            chunk.append(appt_id)
+            if len(chunk) == chunk_size:
+                chunks.append(chunk)
+                chunk = []
+        if chunk:
+            chunks.append(chunk)
+        db.session.remove()
+    
+    if not chunks:
+        print("Daily reminders sent: 0")
+        return "Sent 0 reminders"
+    
+    # The window goes with each chunk: a batch that runs after midnight must not recompute "tomorrow"
+    window = (start.isoformat(), end.isoformat())
+    chord(send_reminder_batch.s(chunk, *window) for chunk in chunks)(summarize_reminders.s())
+    print(f"[REMINDER] Queued {sum(map(len, chunks))} reminders in {len(chunks)} batches")
+    return f"Queued {len(chunks)} reminder batches"
+
+@celery.task
+def send_reminder_batch(appointment_ids, start=None, end=None):
+    """
+    Send reminders for one chunk, marking each appointment as it is delivered.
+    start / end are the ISO bounds of the day send_daily_reminders queued it for.
+    """
+    from app import app
+    from models import db, Appointment
+    from queries import appointment_query
+    from notifier import get_notifier
+    
+    with app.app_context():
+        if start is None:
+            # Chunk queued before the window was passed along
+            start, end = _tomorrow_window()
+        else:
+            start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        notifier = get_notifier(app.config)
+        batch_size = app.config['REMINDER_SEND_BATCH']
+        sent = 0
+        for i in range(0, len(appointment_ids), batch_size):
+            # Re-applying the filters skips rows delivered by an earlier (crashed) run
+            # or cancelled/rescheduled since the chunk was queued
+            batch = appointment_query().filter(
+                Appointment.id.in_(appointment_ids[i:i + batch_size]),
+                *_reminder_filters(start, end)
+            ).all()
+            if not batch:
+                continue
             
-            print(f"[REMINDER] Sending to {patient_email}: {message}")
-            # TODO: Replace with actual email/SMS sending
-            # send_email(patient_email, "Appointment Reminder", message)
-            reminders_sent += 1
-        
-        print(f"Daily reminders sent: {reminders_sent}")
-        return f"Sent {reminders_sent} reminders"
+            delivered = notifier.send_batch([_reminder_message(appt) for appt in batch])
+            if delivered:
+                db.session.execute(
+                    db.update(Appointment)
+                    .where(Appointment.id.in_(delivered))
+                    .values(reminder_sent_at=datetime.now())
+                )
+            # Commit per batch so a crash only repeats the batch in flight
+            db.session.commit()
+            sent += len(delivered)
+        return sent
+
+@celery.task
+def summarize_reminders(counts):
+    """Chord callback: total reminders sent across all batches"""
+    total = sum(counts)
+    print(f"Daily reminders sent: {total}")
+    return f"Sent {total} reminders"
 
 @celery.task
 def generate_monthly_report(doctor_id):
     """Generate monthly activity report for a doctor"""
     from app import app
-    from models import db, Appointment, Doctor
-    from datetime import datetime
+    from models import Doctor
+    from reports import generate_monthly_reports
     
     with app.app_context():
-        doctor = Doctor.query.get(doctor_id)
-        if not doctor:
+        if not Doctor.query.get(doctor_id):
             return "Doctor not found"
         
-        # Get last month's data
-        today = date.today()
-        first_day_last_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        last_day_last_month = today.replace(day=1) - timedelta(days=1)
-        
-        appointments = Appointment.query.filter(
-            Appointment.doctor_id == doctor_id,
-            Appointment.date_time >= first_day_last_month,
-            Appointment.date_time <= last_day_last_month
-        ).all()
-        
-        total_appts = len(appointments)
-        completed = len([a for a in appointments if a.status == 'Completed'])
-        cancelled = len([a for a in appointments if a.status == 'Cancelled'])
-        
-        # Create HTML report
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                h1 {{ color: #333; }}
-                table {{ border-collapse: collapse; width: 100%; margin-top: 20px; }}
-                th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-                th {{ background-color: #4CAF50; color: white; }}
-                .summary {{ background-color: #f2f2f2; padding: 15px; margin: 20px 0; }}
-            </style>
-        </head>
-        <body>
-            <h1>Monthly Activity Report - Dr. {doctor.user.username}</h1>
-            <p><strong>Period:</strong> {first_day_last_month.strftime('%B %Y')}</p>
-            
-            <div class="summary">
-                <h2>Summary</h2>
-                <p>Total Appointments: {total_appts}</p>
-                <p>Completed: {completed}</p>
-                <p>Cancelled: {cancelled}</p>
-            </div>
-            
-            <h2>Appointment Details</h2>
-            <table>
-                <tr>
-                    <th>Date</th>
-                    <th>Patient</th>
-                    <th>Status</th>
-                    <th>Diagnosis</th>
-                </tr>
-        """
-        
-        for appt in appointments:
-            html_content += f"""
-                <tr>
-                    <td>{appt.date_time.strftime('%Y-%m-%d %H:%M')}</td>
-                    <td>{appt.patient.user.username}</td>
-                    <td>{appt.status}</td>
-                    <td>{appt.diagnosis or 'N/A'}</td>
-                </tr>
-            """
-        
-        html_content += """
-            </table>
-        </body>
-        </html>
-        """
-        
-        # Save report
-        filename = f"monthly_report_doctor_{doctor_id}_{first_day_last_month.strftime('%Y_%m')}.html"
-        with open(filename, 'w') as f:
-            f.write(html_content)
-        
+        filename, = generate_monthly_reports(doctor_id=doctor_id)
         print(f"[REPORT] Generated: {filename}")
         # TODO: Send email with report
         # send_email(doctor.user.email, "Monthly Activity Report", html_content)
         
         return f"Report generated: {filename}"
 
-@celery.task
-def export_patient_history(patient_id):
-    """Export patient treatment history as CSV"""
+@celery.task(bind=True)
+def export_patient_history(self, patient_id, fmt='csv.gz'):
+    """Export patient treatment history as CSV (optionally gzipped) or Parquet"""
     from app import app
-    from models import db, Appointment, Patient
+    from models import Patient
+    from exports import write_patient_history
     
     with app.app_context():
         patient = Patient.query.get(patient_id)
         if not patient:
             return "Patient not found"
         
-        appointments = Appointment.query.filter_by(
-            patient_id=patient_id,
-            status='Completed'
-        ).all()
-        
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            'Appointment ID',
-            'Date',
-            'Doctor',
-            'Specialization',
-            'Diagnosis',
-            'Prescription',
-            'Notes'
-        ])
-        
-        for appt in appointments:
-            writer.writerow([
-                appt.id,
-                appt.date_time.strftime('%Y-%m-%d %H:%M'),
-                appt.doctor.user.username,
-                appt.doctor.specialization,
-                appt.diagnosis or '',
-                appt.prescription or '',
-                appt.notes or ''
-            ])
-        
-        # Save CSV file
-        filename = f"patient_{patient_id}_history.csv"
-        with open(filename, 'w', newline='') as f:
-            f.write(output.getvalue())
+        filename = write_patient_history(patient_id, self.request.id, fmt)
         
-        print(f"[EXPORT] CSV created: {filename}")
+        print(f"[EXPORT] Created: {filename}")
         # TODO: Send email with CSV attachment
         # send_email(patient.user.email, "Your Treatment History", attachment=filename)
         
-        return f"CSV exported: {filename}"
+        return f"Exported: {filename}"
+
+@celery.task
+def import_data(entity, task_id, fmt):
+    """Run a bulk import uploaded to /api/admin/import and store its report"""
+    from app import app
+    from importer import import_upload, save_result
+    from routes import invalidate_after_import
+    
+    with app.app_context():
+        try:
+            report = import_upload(entity, task_id, fmt)
+        except Exception:
+            save_result(task_id, {"status": "failed", "entity": entity})
+            raise
+        invalidate_after_import(report)
+        save_result(task_id, dict(report.to_dict(), status='done'))
+        print(f"[IMPORT] {entity}: {report.imported} imported, {report.failed} failed")
+        return f"Imported {report.imported} {entity}"
+
+@celery.task
+def cleanup_exports():
+    """Delete patient exports and import reports older than EXPORT_RETENTION_HOURS (called by scheduler)"""
+    from app import app
+    from exports import cleanup_exports as remove_old_exports
+    from importer import cleanup_imports
+    
+    with app.app_context():
+        max_age = app.config['EXPORT_RETENTION_HOURS'] * 3600
+        removed = remove_old_exports(max_age)
+        print(f"[EXPORT] Removed {removed} expired export files")
+        imports = cleanup_imports(max_age)
+        print(f"[IMPORT] Removed {imports} expired import files")
+        return f"Removed {removed} export files, {imports} import files"
 
 @celery.task
 def generate_all_monthly_reports():
     """Generate monthly reports for ALL doctors (called by scheduler)"""
     from app import app
-    from models import Doctor
+    from reports import generate_monthly_reports
     
     with app.app_context():
-        doctors = Doctor.query.all()
-        reports_generated = 0
-        
-        for doctor in doctors:
-            try:
-                generate_monthly_report.delay(doctor.id)
-                reports_generated += 1
-            except Exception as e:
-                print(f"[ERROR] Failed to generate report for doctor {doctor.id}: {e}")
-        
-        print(f"[MONTHLY REPORTS] Triggered {reports_generated} report generations")
-        return f"Triggered {reports_generated} monthly reports"
+        # One scan of last month's appointments instead of one task (and query) per doctor
+        reports = generate_monthly_reports()
+        print(f"[MONTHLY REPORTS] Generated {len(reports)} reports")
+        return f"Generated {len(reports)} monthly reports"
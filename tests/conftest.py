@@ -0,0 +1,61 @@
+"""
+Shared fixtures. The app is imported once, with the in-process TestConfig
+and a throwaway SQLite file (threaded tests need a real file rather than an
+in-memory database); every test starts from freshly created tables.
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ['APP_CONFIG'] = 'config.TestConfig'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='hms_tests_'), 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import app as flask_app
+from caching import cache
+from models import db
+
+
+class StatementCounter:
+    """before_cursor_execute listener counting the SQL statements sent"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        cache.clear()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def statements(app):
+    counter = StatementCounter()
+    event.listen(db.engine, 'before_cursor_execute', counter)
+    yield counter
+    event.remove(db.engine, 'before_cursor_execute', counter)
+
+
+def bearer(user_id, role, profile_id=None):
+    """Authorization header for a user, as /api/login would issue it (needs an app context)"""
+    claims = {'role': role}
+    if profile_id is not None:
+        claims['profile_id'] = profile_id
+    return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id), additional_claims=claims)}
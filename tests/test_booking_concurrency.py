@@ -0,0 +1,46 @@
+"""
+Concurrent bookings of one slot: the partial unique index on Booked
+(doctor_id, date_time) must let exactly one of them through and turn the
+rest into 409s, never a double booking or a 500.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from models import db, User, Doctor, Patient, Appointment
+from conftest import bearer
+
+N = 200
+
+
+def test_exactly_one_of_concurrent_bookings_succeeds(app):
+    db.session.execute(db.insert(User), [
+        {'id': i + 1, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'role': 'doctor' if i == 0 else 'patient'}
+        for i in range(N + 1)
+    ])
+    db.session.execute(db.insert(Doctor), [{'id': 1, 'user_id': 1, 'specialization': 'General', 'is_approved': True}])
+    db.session.execute(db.insert(Patient), [{'id': i + 1, 'user_id': i + 2} for i in range(N)])
+    db.session.commit()
+    headers = [bearer(i + 2, 'patient', profile_id=i + 1) for i in range(N)]
+
+    slot = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0).isoformat()
+    barrier = threading.Barrier(N)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def book(i):
+        client = app.test_client()
+        barrier.wait()
+        res = client.post('/api/patient/book', json={'doctor_id': 1, 'date_time': slot}, headers=headers[i])
+        with lock:
+            statuses[res.status_code] += 1
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(N)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert statuses == {201: 1, 409: N - 1}
+    assert Appointment.query.filter_by(doctor_id=1, status='Booked').count() == 1
@@ -0,0 +1,22 @@
+"""Range filters accept any ISO 8601 date-time, including ones with a UTC offset"""
+
+import pytest
+from conftest import bearer
+
+
+@pytest.mark.parametrize('query', [
+    'from=2030-01-01T09:00:00%2B00:00',
+    'to=2030-01-01T09:00:00Z',
+    'from=2030-01-01T09:00:00-05:00&to=2030-01-02',
+])
+def test_slot_search_accepts_offsets(client, query):
+    assert client.get('/api/slots/search?' + query).status_code == 200
+
+
+def test_admin_appointments_accepts_offsets(client):
+    res = client.get('/api/admin/appointments?date_from=2030-01-01T09:00:00%2B05:30', headers=bearer(1, 'admin'))
+    assert res.status_code == 200
+
+
+def test_slot_search_rejects_garbage(client):
+    assert client.get('/api/slots/search?from=soon').status_code == 400
@@ -0,0 +1,44 @@
+"""/api/doctor/appointments pages newest first on (date_time, id) like the admin log"""
+
+from datetime import datetime, timedelta
+import pytest
+from models import db, User, Doctor, Patient, Appointment
+from conftest import bearer
+
+
+@pytest.fixture
+def doctor(app):
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'doctor', 'email': 'doctor@example.com', 'password': 'x', 'role': 'doctor'},
+        {'id': 2, 'username': 'patient', 'email': 'patient@example.com', 'password': 'x', 'role': 'patient'},
+    ])
+    db.session.execute(db.insert(Doctor), [{'id': 1, 'user_id': 1, 'specialization': 'General', 'is_approved': True}])
+    db.session.execute(db.insert(Patient), [{'id': 1, 'user_id': 2}])
+    # Pairs of appointments at the same time, so the id breaks ties
+    start = datetime(2024, 1, 1, 9)
+    db.session.execute(db.insert(Appointment), [
+        {'doctor_id': 1, 'patient_id': 1, 'status': 'Completed', 'date_time': start + timedelta(hours=i // 2)}
+        for i in range(25)
+    ])
+    db.session.commit()
+    return bearer(1, 'doctor', profile_id=1)
+
+
+def test_pages_cover_every_appointment_once(client, doctor):
+    seen, cursor = [], None
+    while True:
+        res = client.get('/api/doctor/appointments?limit=10' + (f'&cursor={cursor}' if cursor else ''), headers=doctor)
+        assert res.status_code == 200
+        body = res.get_json()
+        seen += [(a['date_time'], a['id']) for a in body['items']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == 25
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_malformed_cursor_is_rejected(client, doctor):
+    res = client.get('/api/doctor/appointments?cursor=bm9wZQ', headers=doctor)
+    assert res.status_code == 400
@@ -0,0 +1,24 @@
+"""
+Stream lifetime: a stream is cut after max_age seconds without a farewell
+(the browser reconnects), but one whose token expires ends with an 'expired'
+event, since its reconnect would be refused.
+"""
+
+import time
+import events
+
+
+def frames(expires=None, max_age=None):
+    subscription = events.MemoryBroker().subscribe('test')
+    return list(events.stream(subscription, 0.05, expires, max_age))
+
+
+def test_capped_stream_ends_without_an_expired_event():
+    body = ''.join(frames(expires=time.time() + 60, max_age=0.1))
+    assert body.startswith('retry: ')
+    assert 'event: expired' not in body
+
+
+def test_stream_ends_with_an_expired_event_when_the_token_expires():
+    body = frames(expires=time.time() + 0.1, max_age=60)
+    assert body[-1] == 'event: expired\ndata: {}\n\n'
@@ -0,0 +1,54 @@
+"""Patient history export status: ready, failed and unknown exports all end the client's polling"""
+
+import os
+import pytest
+from models import db, User, Patient
+from exports import cleanup_exports, find_export
+from tasks import celery
+from conftest import bearer
+
+
+@pytest.fixture
+def exporting(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXPORT_DIR', str(tmp_path))
+    monkeypatch.setattr(celery.conf, 'task_always_eager', True)
+    monkeypatch.setattr(celery.conf, 'task_store_eager_result', True)
+    monkeypatch.setattr(celery.conf, 'result_backend', 'cache+memory://')
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'patient', 'email': 'patient@example.com', 'password': 'x', 'role': 'patient'},
+    ])
+    db.session.execute(db.insert(Patient), [{'id': 1, 'user_id': 1}])
+    db.session.commit()
+    return bearer(1, 'patient', profile_id=1)
+
+
+def start_export(client, headers):
+    res = client.post('/api/patient/export', json={'format': 'csv'}, headers=headers)
+    assert res.status_code == 202
+    return res.get_json()['task_id']
+
+
+def test_finished_export_is_ready(client, exporting):
+    task_id = start_export(client, exporting)
+    res = client.get(f'/api/patient/export/{task_id}', headers=exporting)
+    assert res.get_json()['status'] == 'ready'
+
+
+def test_finished_task_without_a_file_has_failed(client, exporting):
+    task_id = start_export(client, exporting)
+    os.remove(find_export(1, task_id)[0])
+    res = client.get(f'/api/patient/export/{task_id}', headers=exporting)
+    assert res.status_code == 200
+    assert res.get_json()['status'] == 'failed'
+
+
+def test_unknown_export_is_not_found(client, exporting):
+    res = client.get('/api/patient/export/6f1c1b7e-0000-4000-8000-000000000000', headers=exporting)
+    assert res.status_code == 404
+
+
+def test_cleanup_removes_expired_exports(client, exporting):
+    task_id = start_export(client, exporting)
+    assert cleanup_exports(max_age=3600) == 0
+    assert cleanup_exports(max_age=-1) == 2  # the file and its marker
+    assert client.get(f'/api/patient/export/{task_id}', headers=exporting).status_code == 404
@@ -0,0 +1,49 @@
+"""HTTP bulk imports run as a Celery task; the admin polls the task id for the report"""
+
+import os
+import pytest
+from werkzeug.security import generate_password_hash
+from models import db, User, Patient
+from tasks import celery
+from conftest import bearer
+
+CSV = (
+    "username,email,password_hash,address\n"
+    f"alice,alice@example.com,{generate_password_hash('secret', method='pbkdf2:sha256:1000')},1 Main St\n"
+    "admin,bob@example.com,pbkdf2:sha256:1000$salt$00,2 Main St\n"
+    "carol,carol@example.com,md5$salt$00,3 Main St\n"
+)
+
+
+@pytest.fixture
+def importing(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMPORT_DIR', str(tmp_path))
+    monkeypatch.setattr(celery.conf, 'task_always_eager', True)
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'admin', 'email': 'admin@example.com', 'password': 'x', 'role': 'admin'},
+    ])
+    db.session.commit()
+    return bearer(1, 'admin')
+
+
+def test_import_returns_a_task_and_reports_when_done(client, importing, tmp_path):
+    res = client.post('/api/admin/import/patients', data=CSV, content_type='text/csv', headers=importing)
+    assert res.status_code == 202
+    task_id = res.get_json()['task_id']
+
+    res = client.get(f'/api/admin/import/{task_id}', headers=importing)
+    assert res.status_code == 200
+    report = res.get_json()
+    assert (report['status'], report['imported'], report['failed']) == ('done', 1, 2)
+    assert report['errors'] == [
+        {'line': 3, 'errors': ['Username already exists']},
+        {'line': 4, 'errors': ['password_hash is not a supported hash']},
+    ]
+    assert Patient.query.join(User).filter(User.username == 'alice').count() == 1
+    # The upload is deleted once imported; only the report is left
+    assert os.listdir(tmp_path) == [f'import_{task_id}.json']
+
+
+def test_unknown_import_is_not_found(client, importing):
+    res = client.get('/api/admin/import/6f1c1b7e-0000-4000-8000-000000000000', headers=importing)
+    assert res.status_code == 404
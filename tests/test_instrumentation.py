@@ -0,0 +1,42 @@
+"""Instrumentation: failed statements don't leak start times, and /metrics needs METRICS_TOKEN"""
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+import instrumentation
+from models import db
+
+
+def test_failed_statement_leaves_no_start_time():
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'before_cursor_execute', instrumentation._before_cursor)
+    event.listen(engine, 'after_cursor_execute', instrumentation._after_cursor)
+    event.listen(engine, 'handle_error', instrumentation._on_error)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM missing_table'))
+        assert conn.info['query_started'] == []
+
+
+def instrumented_app(**config):
+    app = Flask(__name__)
+    app.config.update(INSTRUMENTATION_ENABLED=True, SQLALCHEMY_DATABASE_URI='sqlite://', **config)
+    db.init_app(app)
+    instrumentation.init_app(app)
+    return app
+
+
+def test_metrics_is_not_served_without_a_token():
+    client = instrumented_app().test_client()
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_requires_the_token():
+    client = instrumented_app(METRICS_TOKEN='s3cret').test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    res = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert res.status_code == 200
+    assert b'hms_requests_total' in res.data
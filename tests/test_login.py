@@ -0,0 +1,27 @@
+"""Logins for unknown usernames cost a password verification, like wrong passwords"""
+
+import passwords
+from models import db, User
+
+
+def test_unknown_username_is_verified_against_a_dummy_hash(app, client, monkeypatch):
+    db.session.add(User(username='alice', email='alice@example.com', role='patient',
+                        password=passwords.hash_password('right')))
+    db.session.commit()
+    verified = []
+    real_verify = passwords.verify_password
+
+    def verify(stored, password):
+        verified.append(stored)
+        return real_verify(stored, password)
+
+    monkeypatch.setattr(passwords, 'verify_password', verify)
+    assert client.post('/api/login', json={'username': 'alice', 'password': 'wrong'}).status_code == 401
+    assert client.post('/api/login', json={'username': 'nobody', 'password': 'wrong'}).status_code == 401
+
+    real_hash, dummy_hash = verified
+    assert dummy_hash != real_hash
+    # Same scheme and cost, so both take as long
+    context = passwords._get_context()
+    assert context.identify(dummy_hash) == context.identify(real_hash)
+    assert not context.needs_update(dummy_hash)
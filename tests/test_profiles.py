@@ -0,0 +1,29 @@
+"""Cached profile ids are keyed by the 'profiles' generation, so a write that raced an invalidation is never read"""
+
+from flask_jwt_extended import verify_jwt_in_request
+from caching import generation
+from models import db, User, Doctor
+from profiles import PROFILE_NAMESPACE, current_profile, invalidate_profile, remember_profile
+from conftest import bearer
+
+
+def test_stale_profile_write_is_ignored_after_invalidation(app):
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'doctor', 'email': 'doctor@example.com', 'password': 'x', 'role': 'doctor'},
+    ])
+    db.session.execute(db.insert(Doctor), [{'id': 1, 'user_id': 1, 'specialization': 'General', 'is_approved': True}])
+    db.session.commit()
+
+    with app.test_request_context(headers=bearer(1, 'doctor', profile_id=1)):
+        verify_jwt_in_request()
+        assert current_profile('doctor') == 1
+
+        # A request that loaded the profile before the approval was revoked ...
+        stale_gen = generation(PROFILE_NAMESPACE)
+        db.session.get(Doctor, 1).is_approved = False
+        db.session.commit()
+        invalidate_profile('doctor', 1)
+        # ... and stores it afterwards
+        remember_profile('doctor', '1', 1, stale_gen)
+
+        assert current_profile('doctor') is None
@@ -0,0 +1,89 @@
+"""
+The appointment listings must run a fixed number of SQL statements however
+many rows they return: the related doctor / patient / user rows are joined
+in by the query builders in queries.py, never lazy-loaded per row.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from caching import cache
+from models import db, User, Doctor, Patient, Appointment
+from conftest import bearer
+
+N = 20
+
+LISTINGS = [
+    ('/api/admin/appointments', 'admin'),
+    ('/api/doctor/appointments', 'doctor'),
+    ('/api/doctor/appointments/upcoming', 'doctor'),
+    ('/api/patient/appointments', 'patient'),
+    ('/api/patient/treatment-history', 'patient'),
+]
+
+
+def seed_accounts():
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'admin', 'email': 'admin@example.com', 'password': 'x', 'role': 'admin'},
+        {'id': 2, 'username': 'doctor', 'email': 'doctor@example.com', 'password': 'x', 'role': 'doctor'},
+        {'id': 3, 'username': 'patient', 'email': 'patient@example.com', 'password': 'x', 'role': 'patient'},
+    ])
+    db.session.execute(db.insert(Doctor), [{'id': 1, 'user_id': 2, 'specialization': 'Cardiology', 'is_approved': True}])
+    db.session.execute(db.insert(Patient), [{'id': 1, 'user_id': 3}])
+    db.session.commit()
+
+
+def add_appointments(start, end):
+    """
+    For each i in start..end-1, an appointment of doctor 1 with a new patient
+    and one of patient 1 with a new doctor, so a per-row lazy load would show
+    up as extra statements. Even i are Completed in the past, odd i Booked
+    within the next week.
+    """
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    users, doctors, patients, appointments = [], [], [], []
+    for i in range(start, end):
+        doctor_user, patient_user, other = 10 + 2 * i, 11 + 2 * i, 2 + i
+        users += [
+            {'id': doctor_user, 'username': f'doctor{i}', 'email': f'doctor{i}@example.com', 'password': 'x', 'role': 'doctor'},
+            {'id': patient_user, 'username': f'patient{i}', 'email': f'patient{i}@example.com', 'password': 'x', 'role': 'patient'},
+        ]
+        doctors.append({'id': other, 'user_id': doctor_user, 'specialization': 'Neurology', 'is_approved': True})
+        patients.append({'id': other, 'user_id': patient_user})
+        if i % 2 == 0:
+            fields = {'status': 'Completed', 'date_time': now - timedelta(days=1, hours=i),
+                      'diagnosis': 'Migraine', 'prescription': 'Rest', 'notes': 'Follow up'}
+        else:
+            fields = {'status': 'Booked', 'date_time': now + timedelta(hours=1 + i)}
+        appointments += [dict(fields, doctor_id=1, patient_id=other), dict(fields, doctor_id=other, patient_id=1)]
+    db.session.execute(db.insert(User), users)
+    db.session.execute(db.insert(Doctor), doctors)
+    db.session.execute(db.insert(Patient), patients)
+    db.session.execute(db.insert(Appointment), appointments)
+    db.session.commit()
+
+
+def statements_for(client, statements, url, headers):
+    cache.clear()
+    statements.count = 0
+    res = client.get(url, headers=headers)
+    assert res.status_code == 200, res.get_json()
+    body = res.get_json()
+    return statements.count, len(body['items'] if isinstance(body, dict) else body)
+
+
+@pytest.mark.parametrize('url,role', LISTINGS)
+def test_listing_statement_count_is_independent_of_rows(app, client, statements, url, role):
+    seed_accounts()
+    headers = {
+        'admin': bearer(1, 'admin'),
+        'doctor': bearer(2, 'doctor', profile_id=1),
+        'patient': bearer(3, 'patient', profile_id=1),
+    }[role]
+
+    add_appointments(0, N)
+    small, small_rows = statements_for(client, statements, url, headers)
+    add_appointments(N, 10 * N)
+    large, large_rows = statements_for(client, statements, url, headers)
+
+    assert large_rows > small_rows
+    assert large == small, f"{url}: {small} statements for {small_rows} rows, {large} for {large_rows}"
@@ -0,0 +1,28 @@
+"""Reminder batches use the day they were queued for, whenever they run"""
+
+from datetime import datetime, timedelta
+from models import db, User, Doctor, Patient, Appointment
+from notifier import get_notifier
+from tasks import send_reminder_batch
+
+
+def test_batch_sends_for_the_queued_window_after_midnight(app):
+    db.session.execute(db.insert(User), [
+        {'id': 1, 'username': 'doctor', 'email': 'doctor@example.com', 'password': 'x', 'role': 'doctor'},
+        {'id': 2, 'username': 'patient', 'email': 'patient@example.com', 'password': 'x', 'role': 'patient'},
+    ])
+    db.session.execute(db.insert(Doctor), [{'id': 1, 'user_id': 1, 'specialization': 'General'}])
+    db.session.execute(db.insert(Patient), [{'id': 1, 'user_id': 2}])
+    # Queued yesterday for "tomorrow", which is today by the time the batch runs
+    day = datetime.combine(datetime.now().date(), datetime.min.time())
+    db.session.add(Appointment(id=1, doctor_id=1, patient_id=1, status='Booked', date_time=day + timedelta(hours=23)))
+    db.session.commit()
+    outbox = get_notifier(app.config).outbox
+    outbox.clear()
+
+    sent = send_reminder_batch([1], day.isoformat(), (day + timedelta(days=1)).isoformat())
+
+    assert sent == 1
+    assert [msg.key for msg in outbox] == [1]
+    db.session.expire_all()
+    assert db.session.get(Appointment, 1).reminder_sent_at is not None
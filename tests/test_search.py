@@ -0,0 +1,94 @@
+"""Directory search: listing without a query, short specialization filters, and capped matches; clinical search ETags"""
+
+import pytest
+import search
+from datetime import datetime
+from models import db, User, Doctor, Patient, Appointment
+from conftest import bearer
+
+SPECIALIZATIONS = ['Neurology', 'General Medicine', 'Cardiology', 'ENT']
+
+
+@pytest.fixture
+def directory(app):
+    users = [{'id': 1, 'username': 'admin', 'email': 'admin@example.com', 'password': 'x', 'role': 'admin'}]
+    doctors, patients = [], []
+    for i in range(12):
+        users.append({'id': 10 + i, 'username': f'doctor{i}', 'email': f'doctor{i}@example.com',
+                      'password': 'x', 'role': 'doctor'})
+        doctors.append({'id': i + 1, 'user_id': 10 + i, 'specialization': SPECIALIZATIONS[i % 4],
+                        'is_approved': i != 0})
+    for i in range(30):
+        users.append({'id': 100 + i, 'username': f'patient{i}', 'email': f'patient{i}@example.com',
+                      'password': 'x', 'role': 'patient'})
+        patients.append({'id': i + 1, 'user_id': 100 + i})
+    db.session.execute(db.insert(User), users)
+    db.session.execute(db.insert(Doctor), doctors)
+    db.session.execute(db.insert(Patient), patients)
+    db.session.commit()
+    return bearer(1, 'admin')
+
+
+def all_pages(client, url, headers=None):
+    items, cursor = [], None
+    while True:
+        res = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert res.status_code == 200
+        body = res.get_json()
+        items += body['items']
+        cursor = body['next_cursor']
+        if not cursor:
+            return items, body['truncated']
+
+
+def test_no_query_lists_every_approved_doctor(client, directory):
+    items, truncated = all_pages(client, '/api/patient/search/doctors?limit=5')
+    assert [d['id'] for d in items] == list(range(2, 13))
+    assert not truncated
+
+
+def test_no_query_lists_every_patient_for_admins(client, directory):
+    items, _ = all_pages(client, '/api/admin/search/patients?limit=7', directory)
+    assert len(items) == 30
+
+
+def test_short_specialization_filters_by_substring(client, directory):
+    items, _ = all_pages(client, '/api/patient/search/doctors?specialization=ne')
+    assert {d['specialization'] for d in items} == {'Neurology', 'General Medicine'}
+    items, _ = all_pages(client, '/api/patient/search/doctors?q=doctor1&specialization=ne')
+    # doctor10 (Cardiology) and doctor11 (ENT) match the name but not the specialization
+    assert [d['name'] for d in items] == ['doctor1']
+
+
+def test_like_wildcards_in_a_specialization_are_literal(app, directory):
+    for wildcard in ('_', '%'):
+        assert search._like_candidates('doctor', [], False, wildcard, True) == []
+    assert len(search._like_candidates('doctor', [], False, 'ne', True)) == 5
+
+
+def test_capped_matches_are_marked_truncated(client, directory, monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 10)
+    items, truncated = all_pages(client, '/api/admin/search/patients?q=patient', directory)
+    assert truncated
+    items, truncated = all_pages(client, '/api/admin/search/patients?q=patient29', directory)
+    assert [p['username'] for p in items] == ['patient29']
+    assert not truncated
+
+
+def test_postgres_clinical_query_matches_prefixes_within_the_field_weight():
+    assert search._tsquery('Migraines, rest') == 'migraines:* & rest:*'
+    assert search._tsquery('rest', 'prescription') == 'rest:*B'
+
+
+def test_clinical_search_etag_changes_with_patient_names(client, directory):
+    db.session.add(Appointment(doctor_id=2, patient_id=1, date_time=datetime(2026, 1, 5, 9), status='Completed',
+                               diagnosis='Migraine'))
+    db.session.commit()
+    first = client.get('/api/clinical/search?q=migraine', headers=directory)
+    assert first.get_json()['items'][0]['patient_name'] == 'patient0'
+
+    res = client.put('/api/patient/profile', json={'username': 'renamed'}, headers=bearer(100, 'patient', profile_id=1))
+    assert res.status_code == 200
+    res = client.get('/api/clinical/search?q=migraine', headers=dict(directory, **{'If-None-Match': first.headers['ETag']}))
+    assert res.status_code == 200
+    assert res.get_json()['items'][0]['patient_name'] == 'renamed'